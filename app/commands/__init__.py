@@ -0,0 +1 @@
+"""Operational commands for the expense service (run with ``python -m app.commands.<name>``)."""
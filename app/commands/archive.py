@@ -0,0 +1,46 @@
+"""Move expenses older than the retention window to expenses_archive.
+
+    python -m app.commands.archive [--older-than-months 24] [--batch-size 5000]
+
+Every batch commits on its own, so an interrupted run is resumed by the next one.
+On MySQL, when ``expenses`` is partitioned (migration 006), the command then adds the
+monthly partitions for the coming ``EXPENSES_PARTITION_AHEAD_MONTHS`` and drops the
+old partitions the archival emptied; run it monthly from cron. It also deletes the
+change feed events older than ``EXPENSES_CHANGES_RETENTION_DAYS``.
+"""
+import argparse
+import logging
+import sys
+
+from app.core.database import SessionLocal
+from app.services import archive_service, change_feed_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-months", type=int, default=None, help="Whole months kept in expenses")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows moved per transaction")
+    parser.add_argument("--skip-partitions", action="store_true", help="Do not touch the MySQL partitions")
+    parser.add_argument("--skip-changes", action="store_true", help="Keep the old change feed events")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    cutoff = archive_service.archive_cutoff(months=args.older_than_months)
+    report = archive_service.archive_expenses(SessionLocal, cutoff=cutoff, batch_size=args.batch_size)
+    print(
+        f"Archived {report.moved} expenses before {report.cutoff:%Y-%m-%d} "
+        f"for {report.users} users in {report.batches} batches."
+    )
+    if not args.skip_partitions:
+        with SessionLocal() as db:
+            partitions = archive_service.maintain_partitions(db, cutoff=cutoff)
+        if partitions.added or partitions.dropped:
+            print(f"Partitions added: {partitions.added or '-'}; dropped: {partitions.dropped or '-'}.")
+    if not args.skip_changes:
+        pruned = change_feed_service.prune_changes(SessionLocal, batch_size=args.batch_size)
+        print(f"Pruned {pruned} change feed events.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
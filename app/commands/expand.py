@@ -0,0 +1,52 @@
+"""Generate the PLANNED rows of installment and recurring expenses.
+
+    python -m app.commands.expand [--horizon-months 3] [--workers 4] [--batch-users 100]
+    python -m app.commands.expand --loop [--interval 3600]
+
+Safe to run from cron, next to the API and more than once at a time: every batch of
+users commits on its own and periods that already exist are skipped, so an
+interrupted run is resumed by the next one. Exits with status 1 if a batch failed.
+"""
+import argparse
+import logging
+import sys
+import time
+
+from app.core.config import EXPANSION_INTERVAL_SECONDS
+from app.core.database import SessionLocal
+from app.services import expansion_service
+
+
+def _run_once(args) -> int:
+    report = expansion_service.expand_all(
+        SessionLocal,
+        horizon_months=args.horizon_months,
+        batch_users=args.batch_users,
+        workers=args.workers,
+    )
+    print(
+        f"Expanded {report.users} users in {report.batches} batches: "
+        f"{report.inserted} planned rows, {report.failed_batches} failed batches."
+    )
+    return 1 if report.failed_batches else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--horizon-months", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Batches processed in parallel")
+    parser.add_argument("--batch-users", type=int, default=None, help="Users per batch (one transaction each)")
+    parser.add_argument("--loop", action="store_true", help="Keep running, one pass every --interval seconds")
+    parser.add_argument("--interval", type=float, default=EXPANSION_INTERVAL_SECONDS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.loop:
+        return _run_once(args)
+    while True:
+        _run_once(args)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Create the missing service tables and apply migrations/*.sql in order.
+
+    python -m app.commands.migrate [--dir migrations]
+
+The one-shot ``migrate`` service of Docker-compose.yml runs it before the API starts.
+The scripts alter ``expenses`` but never create it, so the tables of the models are
+created first when missing (as ``DB_CREATE_SCHEMA=1`` does, but from one process).
+Then every script not yet listed in ``schema_migrations`` runs statement by statement
+on one connection and is recorded. The scripts are idempotent: one interrupted halfway
+(MySQL commits each DDL statement on its own) simply runs again on the next start.
+The scripts are MySQL-only; on any other database only the tables are created.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import Base, engine
+from app.main import SERVICE_TABLES
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Kept out of Base.metadata: it belongs to this command, not to the models.
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("name", String(255), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def split_statements(sql: str) -> list[str]:
+    """Statements of a script split on ``;`` outside quotes, with ``--`` comments dropped."""
+    statements, current, quote, index = [], [], None, 0
+    while index < len(sql):
+        char = sql[index]
+        if quote:
+            # A doubled quote ('') closes and reopens the string, which leaves the state unchanged.
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif sql.startswith("--", index):
+            end = sql.find("\n", index)
+            index = len(sql) if end == -1 else end
+            continue
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+            index += 1
+            continue
+        current.append(char)
+        index += 1
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def create_tables(bind: Engine, retries: int = 5) -> None:
+    """Create the missing service tables, waiting for the database to come up."""
+    for attempt in range(retries):
+        try:
+            Base.metadata.create_all(bind=bind, tables=SERVICE_TABLES)
+            return
+        except OperationalError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(2)
+
+
+def apply_migrations(bind: Engine, directory: Path = MIGRATIONS_DIR) -> list[str]:
+    """Run the scripts of ``directory`` missing from ``schema_migrations``; returns their names."""
+    applied = []
+    with bind.connect() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        done = set(connection.execute(select(schema_migrations.c.name)).scalars())
+        connection.commit()
+        for path in sorted(directory.glob("*.sql")):
+            if path.name in done:
+                continue
+            for statement in split_statements(path.read_text(encoding="utf-8")):
+                # No parameters reach the driver, so "%" in DATE_FORMAT patterns is sent as is.
+                connection.exec_driver_sql(statement, execution_options={"no_parameters": True})
+            connection.execute(insert(schema_migrations).values(name=path.name, applied_at=datetime.utcnow()))
+            connection.commit()
+            applied.append(path.name)
+    return applied
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", type=Path, default=MIGRATIONS_DIR, help="Directory of the .sql scripts")
+    args = parser.parse_args(argv)
+
+    create_tables(engine)
+    if engine.dialect.name != "mysql":
+        print(f"Tables created; the scripts are MySQL-only and were skipped on '{engine.dialect.name}'.")
+        return 0
+    applied = apply_migrations(engine, args.dir)
+    print(f"Applied {len(applied)} migrations: {', '.join(applied) or '-'}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
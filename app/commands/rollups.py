@@ -0,0 +1,45 @@
+"""Rebuild or verify the expense_monthly_rollups table.
+
+    python -m app.commands.rollups rebuild [--user-id 7]
+    python -m app.commands.rollups check [--user-id 7]
+
+``rebuild`` recomputes the rollups from the raw rows (use it as the initial backfill
+after migrations/003). ``check`` compares both and exits with status 1 on any mismatch.
+"""
+import argparse
+import sys
+
+from app.core.database import SessionLocal, engine
+from app.models.expense_model import ExpenseMonthlyRollup
+from app.services import rollup_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("action", choices=["rebuild", "check"])
+    parser.add_argument("--user-id", type=int, default=None, help="Limit the operation to one user")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if args.action == "rebuild":
+            ExpenseMonthlyRollup.__table__.create(bind=engine, checkfirst=True)
+            rows = rollup_service.rebuild_rollups(db, args.user_id)
+            db.commit()
+            print(f"Rebuilt {rows} rollup rows.")
+            return 0
+
+        mismatches = rollup_service.find_rollup_mismatches(db, args.user_id)
+    for mismatch in mismatches:
+        print(
+            "user_id={user_id} year_month={year_month} category={category} status={status} "
+            "expected={expected} actual={actual}".format(**mismatch)
+        )
+    if mismatches:
+        print(f"{len(mismatches)} rollup rows differ from the raw expenses.", file=sys.stderr)
+        return 1
+    print("Rollups match the raw expenses.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
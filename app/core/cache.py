@@ -0,0 +1,311 @@
+"""Per-user versioned cache for the read endpoints.
+
+Every cache key embeds the owner's data version; a write bumps the version, which
+orphans all of that user's entries at once (they age out through LRU/TTL) without
+scanning keys.
+"""
+import base64
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Hashable, Optional
+
+from app.core.config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, REDIS_URL, WEB_CONCURRENCY
+from app.core.metrics import worker_id
+
+try:
+    import redis
+except ImportError:  # redis is only needed for CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger("expense_service.cache")
+
+_MISSING = object()
+
+
+class JsonCodec:
+    """Encodes cache entries as tagged JSON for backends shared between processes.
+
+    Only plain data round-trips: None, bools, numbers, strings, bytes, dates, Decimals,
+    lists, tuples and dicts with string keys, plus the NamedTuples and Pydantic models
+    passed to ``register``. Whatever is read back is rebuilt from those alone, so a value
+    written to Redis by someone else cannot run code in the workers the way pickle would.
+    """
+
+    def __init__(self):
+        self._types: dict[str, type] = {}
+
+    def register(self, *types: type) -> None:
+        for cls in types:
+            self._types[cls.__qualname__] = cls
+
+    def dumps(self, value) -> bytes:
+        return json.dumps(self._encode(value), separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(self, raw: bytes):
+        return self._decode(json.loads(raw))
+
+    def _registered(self, cls: type) -> str:
+        if self._types.get(cls.__qualname__) is not cls:
+            raise TypeError(f"{cls.__qualname__} is not registered for the cache codec")
+        return cls.__qualname__
+
+    def _encode(self, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, bytes):
+            return {"$bytes": base64.b64encode(value).decode()}
+        if isinstance(value, datetime):
+            return {"$datetime": value.isoformat()}
+        if isinstance(value, date):
+            return {"$date": value.isoformat()}
+        if isinstance(value, Decimal):
+            return {"$decimal": str(value)}
+        if isinstance(value, list):
+            return [self._encode(item) for item in value]
+        if isinstance(value, tuple):
+            items = [self._encode(item) for item in value]
+            if type(value) is tuple:
+                return {"$tuple": items}
+            return {"$tuple": items, "type": self._registered(type(value))}
+        if isinstance(value, dict):
+            if not all(isinstance(key, str) for key in value):
+                raise TypeError("Cached dicts must have string keys")
+            return {"$dict": {key: self._encode(item) for key, item in value.items()}}
+        dump = getattr(value, "model_dump", None) or getattr(value, "dict", None)
+        if callable(dump):
+            return {"$model": self._registered(type(value)), "value": self._encode(dump())}
+        raise TypeError(f"Object of type {type(value).__name__} cannot be cached")
+
+    def _decode(self, value):
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if "$bytes" in value:
+            return base64.b64decode(value["$bytes"])
+        if "$datetime" in value:
+            return datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+        if "$decimal" in value:
+            return Decimal(value["$decimal"])
+        if "$tuple" in value:
+            items = [self._decode(item) for item in value["$tuple"]]
+            return tuple(items) if "type" not in value else self._types[value["type"]](*items)
+        if "$dict" in value:
+            return {key: self._decode(item) for key, item in value["$dict"].items()}
+        if "$model" in value:
+            cls = self._types[value["$model"]]
+            validate = getattr(cls, "model_validate", None) or cls.parse_obj
+            return validate(self._decode(value["value"]))
+        raise ValueError(f"Unknown cache entry tag: {sorted(value)}")
+
+
+# Services register the NamedTuples and models they cache here.
+cache_codec = JsonCodec()
+
+
+class LocalCacheBackend:
+    """In-process LRU cache with a per-entry TTL."""
+
+    name = "local"
+    shared = False
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def version(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def bump_version(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisCacheBackend:
+    """Backend for any client exposing Redis' ``get``, ``set(ex=)``, ``incr``, ``expire`` and ``pipeline``.
+
+    Versions live in Redis too, so every worker sees a user's writes; expiry and
+    eviction are left to Redis (``maxmemory-policy allkeys-lru``). A version key expires
+    once the user has neither read nor written for ``version_ttl`` (longer than any
+    entry lives), so an entry can never outlive the version it was stored under.
+    Entries are stored through ``codec`` (JSON), never pickled; one that does not decode
+    counts as a miss.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, client, ttl_seconds: float, prefix: str = "expenses", codec: JsonCodec = cache_codec):
+        self.client = client
+        self.codec = codec
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.evictions = 0
+        self.entry_ttl = max(1, int(ttl_seconds))
+        self.version_ttl = max(2 * self.entry_ttl, 86400)
+
+    def get(self, key: str):
+        raw = self.client.get(f"{self.prefix}:{key}")
+        if raw is None:
+            return _MISSING
+        try:
+            return self.codec.loads(raw)
+        except (ValueError, TypeError, KeyError):
+            return _MISSING
+
+    def set(self, key: str, value) -> None:
+        self.client.set(f"{self.prefix}:{key}", self.codec.dumps(value), ex=self.entry_ttl)
+
+    def version(self, user_id: int) -> int:
+        key = f"{self.prefix}:version:{user_id}"
+        pipe = self.client.pipeline()
+        pipe.get(key)
+        pipe.expire(key, self.version_ttl)
+        raw, _ = pipe.execute()
+        return int(raw) if raw is not None else 0
+
+    def bump_version(self, user_id: int) -> None:
+        key = f"{self.prefix}:version:{user_id}"
+        pipe = self.client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, self.version_ttl)
+        pipe.execute()
+
+    def size(self) -> Optional[int]:
+        return None
+
+    def clear(self) -> None:
+        pass
+
+
+class NullCacheBackend:
+    """Disables caching (CACHE_BACKEND=none)."""
+
+    name = "none"
+    shared = False
+    evictions = 0
+
+    def get(self, key: str):
+        return _MISSING
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def version(self, user_id: int) -> int:
+        return 0
+
+    def bump_version(self, user_id: int) -> None:
+        pass
+
+    def size(self) -> int:
+        return 0
+
+    def clear(self) -> None:
+        pass
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self) -> bool:
+        """Whether every worker sees the same entries and versions (and so the same writes)."""
+        return self.backend.shared
+
+    def get_or_load(self, user_id: int, key: tuple[Hashable, ...], loader: Callable[[], Any], *, fill: bool = True):
+        """Return the cached value for ``key`` at the user's current version, loading it on a miss.
+
+        ``fill=False`` is for loaders that may return data older than that version (a
+        replica read): a hit is still served, but a miss is loaded without being stored.
+        """
+        # Read the version before loading: a write that lands mid-load bumps it, so the
+        # value stored below is never served again.
+        cache_key = f"{user_id}:{self.backend.version(user_id)}:{key!r}"
+        value = self.backend.get(cache_key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        if fill:
+            self.backend.set(cache_key, value)
+        return value
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Call after committing a write for ``user_id``."""
+        self.backend.bump_version(user_id)
+
+    def stats(self) -> dict:
+        """Counters of the worker that answers; with several workers each request may reach another one."""
+        return {
+            "backend": self.backend.name,
+            "worker": worker_id(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "entries": self.backend.size(),
+        }
+
+
+def _build_backend():
+    if CACHE_BACKEND == "none":
+        return NullCacheBackend()
+    if CACHE_BACKEND == "redis":
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package.")
+        return RedisCacheBackend(redis.Redis.from_url(REDIS_URL), CACHE_TTL_SECONDS)
+    if CACHE_BACKEND == "local":
+        if WEB_CONCURRENCY > 1:
+            logger.warning(
+                "CACHE_BACKEND=local with WEB_CONCURRENCY=%s: a worker serves stale reads until the TTL "
+                "after another worker's write; use redis or none.",
+                WEB_CONCURRENCY,
+            )
+        return LocalCacheBackend(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+    raise RuntimeError(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}' (expected local, redis or none).")
+
+
+response_cache = ResponseCache(_build_backend())
@@ -0,0 +1,62 @@
+"""Group commit: queue concurrent writes for a few milliseconds and store them together.
+
+Every ``submit`` waits until ``max_batch`` items are queued or the oldest one has waited
+``max_wait_ms``; the queued items are then handed to ``flush`` as one batch (one
+statement, one COMMIT) and each caller receives the result of its own item. A batch is
+flushed in the background while the next one fills up.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+Flush = Callable[[list], Awaitable[list]]
+
+
+class WriteCoalescer:
+    """``flush(items)`` returns one result per item, an exception instance for the items that failed."""
+
+    def __init__(self, flush: Flush, *, max_batch: int, max_wait_ms: float):
+        self.flush = flush
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self.flush([item for item, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():  # the caller went away; its item was still written
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def drain(self) -> None:
+        """Flush what is queued now and wait for every batch in flight."""
+        self._start_flush()
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
@@ -0,0 +1,150 @@
+"""Response compression negotiated from ``Accept-Encoding``: brotli or gzip.
+
+Brotli is offered only when the optional ``brotli`` package is installed. Bodies sent
+in one piece are compressed only from ``minimum_size`` bytes; streamed bodies always
+are, incrementally, with one compressor per response that is flushed after every chunk
+so the client can decode each one as it arrives. Responses that already carry a
+``Content-Encoding`` or whose media type is not in ``_COMPRESSIBLE_TYPES`` pass through
+untouched; the ``gzip=true`` export is one of the latter (``application/gzip``). Every
+compressed response adds its sizes before and after to the ``http_response_*_bytes_total``
+counters, per route and encoding.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.metrics import _route_template, http_response_body_bytes, http_response_encoded_bytes
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only gzip is offered without it
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip header and trailer
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The preferred encoding the client accepts (highest q, brotli on ties), or None for identity."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name.strip():
+            weights[name.strip()] = weight
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    candidates = [(weights.get(name, weights.get("*", 0.0)), name) for name in available]
+    weight, name = max(candidates, key=lambda candidate: candidate[0])
+    return name if weight > 0 else None
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "")
+    return media_type.startswith(_COMPRESSIBLE_TYPES) or media_type.split(";")[0].endswith("+json")
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware, so streaming responses are compressed chunk by chunk."""
+
+    def __init__(self, app, *, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+        sizes = [0, 0]  # body bytes before and after compression
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether compressing pays off.
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not _compressible(headers) or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+
+            # A streamed chunk is flushed so it reaches the client whole instead of waiting in the
+            # compressor's window; the producer batches its chunks so the flushes stay few.
+            data = compressor.compress(body) + (compressor.flush() if more_body else compressor.finish())
+            sizes[0] += len(body)
+            sizes[1] += len(data)
+            if start is not None:
+                if not more_body:
+                    MutableHeaders(raw=start["headers"])["Content-Length"] = str(len(data))
+                await send(start)
+                start = None
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+        if compressor is not None:
+            labels = (_route_template(scope), encoding)
+            http_response_body_bytes.inc(labels, sizes[0])
+            http_response_encoded_bytes.inc(labels, sizes[1])
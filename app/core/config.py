@@ -0,0 +1,122 @@
+import os
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return int(raw)
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return float(raw)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+# Serve requests through AsyncEngine/AsyncSession instead of the threadpool
+DB_ASYNC = _env_bool("DB_ASYNC", False)
+
+
+# Connection pools: primary (writes and pinned reads) and each read replica
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_RECYCLE_SECONDS = _env_int("DB_POOL_RECYCLE_SECONDS", 1800)
+REPLICA_POOL_SIZE = _env_int("REPLICA_POOL_SIZE", 10)
+REPLICA_MAX_OVERFLOW = _env_int("REPLICA_MAX_OVERFLOW", 20)
+# After a write, the same user's reads stay on the primary for this long (read-your-writes)
+READ_YOUR_WRITES_SECONDS = _env_float("READ_YOUR_WRITES_SECONDS", 5.0)
+# A replica that failed to hand out a connection is skipped for this long
+REPLICA_RETRY_SECONDS = _env_float("REPLICA_RETRY_SECONDS", 30.0)
+
+# Startup: create the service tables (local development; deployments apply migrations/ instead),
+# then open this many connections per pool before the worker reports ready
+DB_CREATE_SCHEMA = _env_bool("DB_CREATE_SCHEMA", False)
+DB_WARM_CONNECTIONS = _env_int("DB_WARM_CONNECTIONS", 2)
+# /health/ready answers 503 when the database does not reply to SELECT 1 within this long
+READINESS_TIMEOUT_SECONDS = _env_float("READINESS_TIMEOUT_SECONDS", 2.0)
+
+# Log every SQL statement (SQLAlchemy echo); verbose and synchronous, keep it off in production
+SQL_ECHO = _env_bool("SQL_ECHO", False)
+# Statements at or above this duration are written to the slow-query log
+SLOW_QUERY_THRESHOLD_MS = _env_float("SLOW_QUERY_THRESHOLD_MS", 200.0)
+# Request/SQL instrumentation and the /metrics endpoint
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+
+
+# Keyset pagination for GET /expenses/
+EXPENSES_PAGE_SIZE = _env_int("EXPENSES_PAGE_SIZE", 100)
+EXPENSES_MAX_PAGE_SIZE = _env_int("EXPENSES_MAX_PAGE_SIZE", 1000)
+# Rows fetched per round trip from the server-side cursor when streaming
+EXPENSES_STREAM_CHUNK_SIZE = _env_int("EXPENSES_STREAM_CHUNK_SIZE", 500)
+# Rows per multi-row INSERT in POST /expenses/bulk
+EXPENSES_BULK_BATCH_SIZE = _env_int("EXPENSES_BULK_BATCH_SIZE", 500)
+# Opt-in group commit for POST /expenses/: concurrent creates are queued up to this many rows
+# or this many milliseconds and written with one multi-row INSERT and one COMMIT
+WRITE_COALESCING = _env_bool("WRITE_COALESCING", False)
+WRITE_COALESCE_MAX_BATCH = _env_int("WRITE_COALESCE_MAX_BATCH", 100)
+WRITE_COALESCE_MAX_WAIT_MS = _env_float("WRITE_COALESCE_MAX_WAIT_MS", 5.0)
+# IDs accepted by POST /expenses/batch-get, PATCH /expenses/bulk and DELETE /expenses/bulk
+EXPENSES_BULK_MAX_IDS = _env_int("EXPENSES_BULK_MAX_IDS", 1000)
+# POST /expenses/summary/batch: most user IDs per request, and user IDs per GROUP BY query
+EXPENSES_SUMMARY_BATCH_MAX_USERS = _env_int("EXPENSES_SUMMARY_BATCH_MAX_USERS", 5000)
+EXPENSES_SUMMARY_BATCH_CHUNK_SIZE = _env_int("EXPENSES_SUMMARY_BATCH_CHUNK_SIZE", 500)
+# GET /expenses/changes: events per page, how old an event must be before it is served (so
+# transactions that took a lower seq have committed; keep it above the longest write transaction,
+# an import chunk or a bulk batch) and days kept (pruned by app.commands.archive)
+EXPENSES_CHANGES_PAGE_SIZE = _env_int("EXPENSES_CHANGES_PAGE_SIZE", 500)
+EXPENSES_CHANGES_SETTLE_SECONDS = _env_float("EXPENSES_CHANGES_SETTLE_SECONDS", 5.0)
+EXPENSES_CHANGES_RETENTION_DAYS = _env_int("EXPENSES_CHANGES_RETENTION_DAYS", 30)
+# POST /expenses/import: rows per committed chunk and row errors listed in the report
+EXPENSES_IMPORT_CHUNK_SIZE = _env_int("EXPENSES_IMPORT_CHUNK_SIZE", 1000)
+EXPENSES_IMPORT_MAX_ERRORS = _env_int("EXPENSES_IMPORT_MAX_ERRORS", 1000)
+# GET /expenses/summary/timeseries: most buckets a single series may span
+EXPENSES_TIMESERIES_MAX_BUCKETS = _env_int("EXPENSES_TIMESERIES_MAX_BUCKETS", 1000)
+
+# Response compression negotiated from Accept-Encoding (brotli when the package is installed,
+# else gzip) for bodies of at least COMPRESSION_MIN_BYTES
+COMPRESSION_ENABLED = _env_bool("COMPRESSION_ENABLED", True)
+COMPRESSION_MIN_BYTES = _env_int("COMPRESSION_MIN_BYTES", 1024)
+COMPRESSION_GZIP_LEVEL = _env_int("COMPRESSION_GZIP_LEVEL", 6)
+COMPRESSION_BROTLI_QUALITY = _env_int("COMPRESSION_BROTLI_QUALITY", 4)
+
+# Server worker processes; gunicorn.conf.py exports its count so every worker sees it
+WEB_CONCURRENCY = _env_int("WEB_CONCURRENCY", 1)
+
+# Per-user versioned response cache: local (per process), redis (shared between workers) or none.
+# Defaults to local with one worker and none with several: per-process versions go stale across workers.
+CACHE_BACKEND = (os.getenv("CACHE_BACKEND") or "").strip().lower() or ("local" if WEB_CONCURRENCY <= 1 else "none")
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 10_000)
+CACHE_TTL_SECONDS = _env_float("CACHE_TTL_SECONDS", 300.0)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Description rules for auto-categorization: JSON file replacing the built-in rules (optional),
+# re-read when its modification time changes, checked at most this often
+CATEGORY_RULES_PATH = os.getenv("CATEGORY_RULES_PATH", "").strip() or None
+CATEGORY_RULES_RELOAD_SECONDS = _env_float("CATEGORY_RULES_RELOAD_SECONDS", 5.0)
+
+# Installment/recurring expansion worker (python -m app.commands.expand, or in-process when enabled)
+EXPANSION_HORIZON_MONTHS = _env_int("EXPANSION_HORIZON_MONTHS", 3)
+EXPANSION_BATCH_USERS = _env_int("EXPANSION_BATCH_USERS", 100)
+EXPANSION_WORKERS = _env_int("EXPANSION_WORKERS", 4)
+EXPANSION_WORKER_ENABLED = _env_bool("EXPANSION_WORKER_ENABLED", False)
+EXPANSION_INTERVAL_SECONDS = _env_float("EXPANSION_INTERVAL_SECONDS", 3600.0)
+
+# Cold storage (python -m app.commands.archive): rows older than this many whole months move to
+# expenses_archive in batches; on MySQL the command also keeps monthly partitions this far ahead
+EXPENSES_ARCHIVE_AFTER_MONTHS = _env_int("EXPENSES_ARCHIVE_AFTER_MONTHS", 24)
+EXPENSES_ARCHIVE_BATCH_SIZE = _env_int("EXPENSES_ARCHIVE_BATCH_SIZE", 5000)
+EXPENSES_PARTITION_AHEAD_MONTHS = _env_int("EXPENSES_PARTITION_AHEAD_MONTHS", 12)
@@ -0,0 +1,90 @@
+"""Read-your-writes across workers: a last-write token kept by the client.
+
+A request that commits a write answers with the ``expenses_last_write`` cookie and the
+``X-Last-Write`` header, both holding the commit time (unix seconds). Clients send
+either one back (browsers return the cookie on their own); while it is younger than
+``READ_YOUR_WRITES_SECONDS`` the read goes to the primary, whichever worker or host
+serves it. The per-process ``recent_writes`` in ``app.core.database`` still covers
+clients that drop the token.
+"""
+import math
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from app.core.config import READ_YOUR_WRITES_SECONDS
+
+LAST_WRITE_COOKIE = "expenses_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+class _RequestWrites:
+    wrote = False
+
+
+# One holder per request. The threadpool and AsyncSession.run_sync run the service
+# functions in a copy of the request context that shares the holder, so a write
+# noted there is seen by the middleware.
+_request_writes: ContextVar[Optional[_RequestWrites]] = ContextVar("request_writes", default=None)
+
+
+def note_write() -> None:
+    """Flag the current request as having committed a write; a no-op outside a request."""
+    holder = _request_writes.get()
+    if holder is not None:
+        holder.wrote = True
+
+
+def _token_age(raw: Optional[str], now: float) -> Optional[float]:
+    try:
+        written_at = float(raw) if raw else None
+    except ValueError:
+        return None
+    return None if written_at is None or not math.isfinite(written_at) else now - written_at
+
+
+def wrote_recently(connection: HTTPConnection) -> bool:
+    """Whether the client's last-write token (header or cookie) is inside the read-your-writes window."""
+    now = time.time()
+    for raw in (connection.headers.get(LAST_WRITE_HEADER), connection.cookies.get(LAST_WRITE_COOKIE)):
+        age = _token_age(raw, now)
+        # Negative ages allow for clock skew between hosts, bounded so a forged token cannot pin forever.
+        if age is not None and -READ_YOUR_WRITES_SECONDS < age < READ_YOUR_WRITES_SECONDS:
+            return True
+    return False
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware that hands out the last-write token on responses to writes."""
+
+    def __init__(self, app, *, window_seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        holder = _RequestWrites()
+        token = _request_writes.set(holder)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and holder.wrote and message["status"] < 400:
+                written_at = f"{time.time():.3f}"
+                headers = MutableHeaders(scope=message)
+                headers[LAST_WRITE_HEADER] = written_at
+                headers.append(
+                    "Set-Cookie",
+                    f"{LAST_WRITE_COOKIE}={written_at}; Max-Age={math.ceil(self.window_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
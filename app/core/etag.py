@@ -0,0 +1,40 @@
+"""Weak ETags for conditional GETs.
+
+The tag is a short hash of a data fingerprint (row count and ``max(updated_at)``, or
+one row's ``updated_at``) plus the request parameters, so it is known before the
+body is queried or encoded and ``If-None-Match`` can answer 304 without either.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+# Clients may store the body but must revalidate it before every reuse.
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header (RFC 9110, 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(candidate) == _opaque(etag) for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers(etag))
+
+
+def headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
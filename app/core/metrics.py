@@ -0,0 +1,310 @@
+"""Request and SQL instrumentation exposed in the Prometheus text format.
+
+SQLAlchemy cursor events time every statement; ``MetricsMiddleware`` scopes a
+``RequestStats`` per request through a context variable (the threadpool and
+``run_sync`` copy the context, so statements issued by the service are attributed to
+the request that triggered them) and records handler time, DB time and statement
+count per route. Statements slower than ``SLOW_QUERY_THRESHOLD_MS`` are logged as one
+JSON object per line on the ``expense_service.slow_query`` logger.
+
+Every process keeps its own registry, and under gunicorn a scrape reaches whichever
+worker accepts it, so every series carries a ``worker`` label (the pid): sum by the
+other labels to see the whole instance.
+"""
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import SLOW_QUERY_THRESHOLD_MS
+
+slow_query_logger = logging.getLogger("expense_service.slow_query")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+_SLOW_STATEMENT_MAX_CHARS = 1000
+
+
+class RequestStats:
+    __slots__ = ("scope", "statements", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        return _route_template(self.scope)
+
+
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "expense_request_stats", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self, common: str = "") -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                bucket_labels = _join_labels(common, base, _format_labels(("le",), (le,)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_join_labels(common, base)} {total}")
+            lines.append(f"{self.name}_count{_join_labels(common, base)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, common: str = "") -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            lines.append(f"{self.name}{_join_labels(common, _format_labels(self.label_names, labels))} {value}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _join_labels(*parts: str) -> str:
+    joined = ",".join(part for part in parts if part)
+    return f"{{{joined}}}" if joined else ""
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling the request, including the response body.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL statements per request.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+http_request_db_statements = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request.",
+    ("method", "route"),
+    STATEMENT_BUCKETS,
+)
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds",
+    "Execution time of individual SQL statements.",
+    ("operation",),
+    LATENCY_BUCKETS,
+)
+db_slow_statements = Counter(
+    "db_slow_statements_total",
+    "Statements slower than SLOW_QUERY_THRESHOLD_MS.",
+    ("operation",),
+)
+db_pool_checkouts = Counter(
+    "db_pool_checkouts_total",
+    "Connections checked out from the pool.",
+    ("engine",),
+)
+
+http_response_body_bytes = Counter(
+    "http_response_body_bytes_total",
+    "Body bytes of compressed responses before compression.",
+    ("route", "encoding"),
+)
+http_response_encoded_bytes = Counter(
+    "http_response_encoded_bytes_total",
+    "Body bytes of compressed responses as sent.",
+    ("route", "encoding"),
+)
+
+_instrumented_engines: dict[str, Engine] = {}
+
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    return head[0].upper() if head else "UNKNOWN"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    operation = _operation(statement)
+    db_statement_duration.observe((operation,), elapsed)
+
+    stats = _current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        db_slow_statements.inc((operation,))
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query",
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "operation": operation,
+                    "route": stats.route if stats is not None else None,
+                    "executemany": executemany,
+                    "rowcount": getattr(cursor, "rowcount", None),
+                    "statement": " ".join(statement.split())[:_SLOW_STATEMENT_MAX_CHARS],
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+def _handle_error(exception_context):
+    # The statement never reached after_cursor_execute; drop its start time.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Attach the timing listeners to ``engine`` (pass ``async_engine.sync_engine`` for async engines)."""
+    if name in _instrumented_engines:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(engine, "checkout", lambda *_: db_pool_checkouts.inc((name,)))
+    _instrumented_engines[name] = engine
+
+
+def _pool_gauges(common: str) -> list[str]:
+    gauges = {
+        "db_pool_size": ("Configured pool size.", "size"),
+        "db_pool_checked_out": ("Connections currently checked out.", "checkedout"),
+        "db_pool_checked_in": ("Idle connections in the pool.", "checkedin"),
+        "db_pool_overflow": ("Connections open beyond pool_size (negative while the pool is filling).", "overflow"),
+    }
+    lines = []
+    for metric, (documentation, method) in gauges.items():
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} gauge"]
+        for name, engine in sorted(_instrumented_engines.items()):
+            reader = getattr(engine.pool, method, None)
+            if reader is not None:  # StaticPool/NullPool do not track sizes
+                lines.append(f"{metric}{_join_labels(common, _format_labels(('engine',), (name,)))} {reader()}")
+    return lines
+
+
+def worker_id() -> int:
+    """The label of this process; read on every call, since gunicorn forks the workers after the import."""
+    return os.getpid()
+
+
+def render_metrics() -> str:
+    common = _format_labels(("worker",), (worker_id(),))
+    lines = []
+    for metric in (
+        http_request_duration,
+        http_request_db_duration,
+        http_request_db_statements,
+        db_statement_duration,
+        db_slow_statements,
+        db_pool_checkouts,
+        http_response_body_bytes,
+        http_response_encoded_bytes,
+    ):
+        lines += metric.render(common)
+    lines += _pool_gauges(common)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streaming bodies are timed until their last chunk."""
+
+    def __init__(self, app, *, exclude_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            method = scope["method"]
+            route = stats.route
+            http_request_duration.observe((method, route, str(status_code)), elapsed)
+            http_request_db_duration.observe((method, route), stats.db_seconds)
+            http_request_db_statements.observe((method, route), stats.statements)
+
+
+def _route_template(scope) -> str:
+    # The router stores the matched route in the scope; unmatched paths share one label
+    # so scanners cannot blow up the series cardinality.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -0,0 +1,47 @@
+"""JSON encoding for the read paths that skip ORM hydration and Pydantic validation.
+
+The output matches what FastAPI produces for ``ExpenseResponse`` (Pydantic v2):
+Decimal as a string, enums as their value and naive datetimes in ISO format.
+"""
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def rows_to_dicts(rows, fields: tuple[str, ...]) -> list[dict]:
+    """Column tuples to plain dicts keyed by ``fields`` (same order as the SELECT list)."""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into a gzip file incrementally, one compressor for the whole stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip header and trailer
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
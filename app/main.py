@@ -1,19 +1,91 @@
+import asyncio
 import logging
 import os
-import time
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy.exc import OperationalError
+from starlette.concurrency import run_in_threadpool
 
-from app.core.database import Base, engine
-from app.models.expense_model import Expense
+from app.core import database
+from app.core.cache import response_cache
+from app.core.compression import CompressionMiddleware
+from app.core.consistency import LAST_WRITE_HEADER, ReadYourWritesMiddleware
+from app.core.config import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_ENABLED,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_BYTES,
+    DB_CREATE_SCHEMA,
+    DB_WARM_CONNECTIONS,
+    EXPANSION_INTERVAL_SECONDS,
+    EXPANSION_WORKER_ENABLED,
+    METRICS_ENABLED,
+    READINESS_TIMEOUT_SECONDS,
+)
+from app.core.database import Base, SessionLocal, engine, run_db, write_session
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.models.expense_model import User
 from app.routers import expense_router
+from app.services import expansion_service, expense_service
 
-
-app = FastAPI(title="Expense Service")
 logger = logging.getLogger("uvicorn.error")
 
+# Every table of the service; users belongs to the users service and is only referenced.
+SERVICE_TABLES = [table for table in Base.metadata.sorted_tables if table is not User.__table__]
+
+
+async def create_tables():
+    retries = 5
+    while retries:
+        try:
+            await run_in_threadpool(Base.metadata.create_all, bind=engine, tables=SERVICE_TABLES)
+            return
+        except OperationalError:
+            retries -= 1
+            await asyncio.sleep(2)
+    raise RuntimeError("Database unavailable, could not create expenses tables.")
+
+
+async def warm_up():
+    """Fill the pools and run the listing query once; a failure only delays the first requests."""
+    try:
+        await database.warm_pools(DB_WARM_CONNECTIONS)
+        async with write_session() as db:
+            await run_db(db, expense_service.warm_up)
+    except OperationalError as error:
+        logger.warning("Warm-up failed, pools will fill on demand: %s", error)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    if DB_CREATE_SCHEMA:
+        await create_tables()
+    await warm_up()
+    if EXPANSION_WORKER_ENABLED:
+        # Every process runs its own loop; passes are idempotent, so several workers only repeat work.
+        app.state.expansion_task = asyncio.create_task(
+            expansion_service.run_periodically(SessionLocal, EXPANSION_INTERVAL_SECONDS)
+        )
+    app.state.ready = True
+    yield
+    # Probes arriving while the coalescer drains see the worker as going away.
+    app.state.ready = False
+    if EXPANSION_WORKER_ENABLED:
+        # A pass already in the threadpool finishes first; waiting for it keeps it off disposed pools.
+        app.state.expansion_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await app.state.expansion_task
+    if expense_router.create_coalescer is not None:
+        await expense_router.create_coalescer.drain()
+    await database.dispose_engines()
+
+
+app = FastAPI(title="Expense Service", lifespan=lifespan)
+
 default_origins = [
     "http://localhost",
     "http://127.0.0.1",
@@ -48,22 +120,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", LAST_WRITE_HEADER],
 )
 logger.info("CORS origin regex: %s", r"https?://(localhost|127\.0\.0\.1)(:\d+)?$")
 
+app.add_middleware(ReadYourWritesMiddleware)
 
-@app.on_event("startup")
-def create_tables():
-    retries = 5
-    while retries:
-        try:
-            Base.metadata.create_all(bind=engine, tables=[Expense.__table__])
-            break
-        except OperationalError:
-            retries -= 1
-            time.sleep(2)
-    else:
-        raise RuntimeError("Database unavailable, could not create expenses tables.")
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_BYTES,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+    )
+
+if METRICS_ENABLED:
+    # Added last so it wraps CORS and times the whole request.
+    app.add_middleware(MetricsMiddleware, exclude_paths=("/metrics", "/health/live", "/health/ready"))
 
 
 app.include_router(expense_router.router)
@@ -72,3 +145,34 @@ app.include_router(expense_router.router)
 @app.get("/")
 def root():
     return {"message": "Expense Service is running"}
+
+
+@app.get("/health/live", include_in_schema=False)
+async def live():
+    """Liveness: the process answers; it never checks the database, so an outage does not restart workers."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def ready():
+    """Readiness: startup finished and the primary answers SELECT 1 in time."""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+    try:
+        await asyncio.wait_for(database.ping(), timeout=READINESS_TIMEOUT_SECONDS)
+    except (OperationalError, asyncio.TimeoutError) as error:
+        logger.warning("Readiness check failed: %r", error)
+        return JSONResponse({"status": "unavailable"}, status_code=503)
+    return {"status": "ready", "worker": os.getpid()}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
+
+if METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
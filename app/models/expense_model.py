@@ -1,8 +1,22 @@
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 import unicodedata
 
-from sqlalchemy import Boolean, Column, DateTime, Enum as SqlEnum, ForeignKey, Integer, Numeric, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Enum as SqlEnum,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects import mysql
 from app.core.database import Base
 
 
@@ -26,11 +40,9 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
 
 
-class Expense(Base):
-    __tablename__ = "expenses"
+class ExpenseColumns:
+    """Columns shared by ``expenses`` and ``expenses_archive`` (same names and types)."""
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     category = Column(
         SqlEnum(
             ExpenseCategory,
@@ -54,13 +66,138 @@ class Expense(Base):
     )
     transaction_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     is_recurring = Column(Boolean, default=False)
+    # Set on PLANNED rows generated from an installment/recurring expense: its id and the month offset.
+    # No foreign key: deleting the source must not cascade past the rollup bookkeeping.
+    parent_id = Column(Integer, nullable=True)
+    period_index = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Microseconds on MySQL too: two writes within the same second must still change the ETag.
+    updated_at = Column(
+        DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+
+class Expense(ExpenseColumns, Base):
+    # On MySQL, migration 006 range-partitions this table by month of transaction_date: the
+    # primary key becomes (id, transaction_date), the parent/period key gains transaction_date
+    # and the users foreign key is dropped (partitioned InnoDB tables cannot have one).
+    # A lookup by id alone cannot be pruned and probes the primary key of every partition;
+    # paths that know the date (the change feed, bulk writes after their locking read) add
+    # a transaction_date predicate so MySQL reads a single partition.
+    __tablename__ = "expenses"
+    __table_args__ = (
+        # Matches the keyset order of list_expenses and the date filters of the summaries.
+        Index("ix_expenses_user_date_id", "user_id", "transaction_date", "id"),
+        Index("ix_expenses_user_category_date", "user_id", "category", "transaction_date"),
+        # Index-only count(*) and max(updated_at) per user for the ETag fingerprint.
+        Index("ix_expenses_user_updated", "user_id", "updated_at"),
+        # One generated row per series and period: the expansion worker can re-run safely. A
+        # period's date is fixed by its source, so the partition column does not weaken the key.
+        UniqueConstraint("parent_id", "period_index", "transaction_date", name="uq_expenses_parent_period"),
+        # Series sources for the expansion worker (few rows are recurring or in installments).
+        Index("ix_expenses_recurring_user", "is_recurring", "user_id"),
+        Index("ix_expenses_installments_user", "installments", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     def __repr__(self) -> str:
         return f"<Expense id={self.id} user_id={self.user_id} amount={self.amount}>"
 
 
+class ExpenseArchive(ExpenseColumns, Base):
+    """Expenses moved out of ``expenses`` by ``python -m app.commands.archive``; read-only.
+
+    Rows keep their id and stay counted in the monthly rollups.
+    """
+
+    __tablename__ = "expenses_archive"
+    __table_args__ = (Index("ix_expenses_archive_user_date_id", "user_id", "transaction_date", "id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ExpenseArchive id={self.id} user_id={self.user_id} amount={self.amount}>"
+
+
+class ChangeOperation(str, Enum):
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class ExpenseChange(Base):
+    """Outbox of the change feed: one row per expense inserted, updated or deleted.
+
+    Written in the same transaction as the change; ``seq`` orders the feed.
+    ``transaction_date`` follows the expense's current date (NULL once it is deleted
+    before migration 008 backfilled it), so the feed joins ``expenses`` on the full
+    partitioned primary key.
+    """
+
+    __tablename__ = "expense_changes"
+    __table_args__ = (
+        # Feed of a single user, and retention pruning by date.
+        Index("ix_expense_changes_user_seq", "user_id", "seq"),
+        Index("ix_expense_changes_changed_at", "changed_at"),
+        # Events of an expense whose transaction_date changes are moved along with it.
+        Index("ix_expense_changes_expense", "expense_id"),
+    )
+
+    # BIGINT on MySQL; SQLite only auto-increments INTEGER PRIMARY KEY.
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    expense_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    transaction_date = Column(DateTime, nullable=True)
+    operation = Column(
+        SqlEnum(
+            ChangeOperation,
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        nullable=False,
+    )
+    changed_at = Column(DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ExpenseChange seq={self.seq} expense_id={self.expense_id} operation={self.operation}>"
+
+
+class ExpenseMonthlyRollup(Base):
+    """Per-month totals maintained in the same transaction as every write to ``expenses``."""
+
+    __tablename__ = "expense_monthly_rollups"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    year_month = Column(Integer, primary_key=True, autoincrement=False)  # YYYYMM
+    category = Column(
+        SqlEnum(
+            ExpenseCategory,
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        primary_key=True,
+    )
+    status = Column(
+        SqlEnum(
+            ExpenseStatus,
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        primary_key=True,
+    )
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ExpenseMonthlyRollup user_id={self.user_id} year_month={self.year_month} "
+            f"category={self.category} total_amount={self.total_amount}>"
+        )
+
+
 _CATEGORY_LABELS = {
     "servicios basicos": ExpenseCategory.SERVICE_BASIC,
     "servicios basicos/otros": ExpenseCategory.SERVICE_BASIC,
@@ -73,8 +210,12 @@ _CATEGORY_LABELS = {
 }
 
 
+@lru_cache(maxsize=8192)
 def normalize_label(value: str) -> str:
-    """Lowercase label stripping diacritics so front labels can be mapped easily."""
+    """Lowercase label stripping diacritics so front labels can be mapped easily.
+
+    Memoized: labels, CSV headers and merchant descriptions repeat heavily in a batch.
+    """
     normalized = unicodedata.normalize("NFKD", value)
     without_marks = "".join(char for char in normalized if not unicodedata.combining(char))
     return without_marks.lower().strip()
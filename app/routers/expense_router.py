@@ -1,82 +1,370 @@
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, status
+from anyio import from_thread
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.database import get_db
+from app.core import consistency, etag
+from app.core.coalescing import WriteCoalescer
+from app.core.config import (
+    EXPENSES_MAX_PAGE_SIZE,
+    WRITE_COALESCE_MAX_BATCH,
+    WRITE_COALESCE_MAX_WAIT_MS,
+    WRITE_COALESCING,
+)
+from app.core.database import (
+    DbSession,
+    SessionLocal,
+    get_db,
+    get_read_db,
+    open_read_session,
+    read_session,
+    run_db,
+    write_session,
+)
 from app.models.expense_model import ExpenseCategory
 from app.schemas.expense_schema import (
     ExpenseBatchCreate,
+    ExpenseBatchGet,
     ExpenseBatchResponse,
+    ExpenseBulkResult,
+    ExpenseBulkUpdate,
+    ExpenseChangeFeed,
+    ExpenseColumnarBatchCreate,
     ExpenseCreate,
+    ExpenseIdsRequest,
+    ExpenseImportReport,
     ExpenseResponse,
     ExpenseSummary,
+    ExpenseSummaryBatch,
+    ExpenseSummaryBatchRequest,
+    ExpenseTimeseries,
     ExpenseUpdate,
+    FileFormat,
+    TimeBucket,
+    TimeseriesDimension,
 )
-from app.services import expense_service
+from app.services import change_feed_service, expense_service, import_service
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+FIELDS_DESCRIPTION = "Campos de cada gasto separados por coma (por ejemplo description,amount); por defecto todos"
+
+
+def _close_after(lines, db: Session):
+    """Keep the streaming session open until the last line has been sent."""
+    try:
+        yield from lines
+    finally:
+        db.close()
+
+
+async def _flush_creates(rows: list[dict]) -> list:
+    async with write_session() as db:
+        return await run_db(db, expense_service.create_expenses_grouped, rows)
+
+
+# With WRITE_COALESCING, single creates are grouped into one INSERT/COMMIT per batch.
+create_coalescer = (
+    WriteCoalescer(_flush_creates, max_batch=WRITE_COALESCE_MAX_BATCH, max_wait_ms=WRITE_COALESCE_MAX_WAIT_MS)
+    if WRITE_COALESCING
+    else None
+)
+
 
 @router.post("/", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
-def create_expense(expense_in: ExpenseCreate, db: Session = Depends(get_db)):
-    return expense_service.create_expense(db, expense_in)
+async def create_expense(expense_in: ExpenseCreate, db: DbSession = Depends(get_db)):
+    if create_coalescer is not None:
+        # Validation errors stay with their own request; only valid rows are queued.
+        expense = await create_coalescer.submit(expense_service.new_expense_row(expense_in))
+        # The batch was committed from another request's context; hand this client its token too.
+        consistency.note_write()
+        return expense
+    return await run_db(db, expense_service.create_expense, expense_in)
 
 
 @router.post("/bulk", response_model=ExpenseBatchResponse, status_code=status.HTTP_201_CREATED)
-def create_expenses_bulk(payload: ExpenseBatchCreate, db: Session = Depends(get_db)):
-    return expense_service.create_expenses_batch(db, payload)
+async def create_expenses_bulk(
+    payload: ExpenseBatchCreate,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    db: DbSession = Depends(get_db),
+):
+    selected = expense_service.parse_fields(fields)
+    body = await run_db(db, expense_service.create_expenses_batch_json, payload, fields=selected)
+    return Response(content=body, media_type="application/json", status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk/columns", response_model=ExpenseBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_expenses_bulk_columns(
+    payload: ExpenseColumnarBatchCreate,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    db: DbSession = Depends(get_db),
+):
+    selected = expense_service.parse_fields(fields)
+    body = await run_db(db, expense_service.create_expenses_columnar_json, payload, fields=selected)
+    return Response(content=body, media_type="application/json", status_code=status.HTTP_201_CREATED)
+
+
+@router.patch("/bulk", response_model=ExpenseBulkResult)
+async def update_expenses_bulk(payload: ExpenseBulkUpdate, db: DbSession = Depends(get_db)):
+    return await run_db(db, expense_service.update_expenses_bulk, payload)
+
+
+@router.delete("/bulk", response_model=ExpenseBulkResult)
+async def delete_expenses_bulk(payload: ExpenseIdsRequest, db: DbSession = Depends(get_db)):
+    return await run_db(db, expense_service.delete_expenses_bulk, payload)
+
+
+@router.post("/batch-get", response_model=ExpenseBatchGet)
+async def batch_get_expenses(payload: ExpenseIdsRequest, request: Request):
+    # user_id comes in the body, so the read session is routed here rather than by get_read_db.
+    async with read_session(payload.user_id, primary=consistency.wrote_recently(request)) as db:
+        body = await run_db(db, expense_service.batch_get_expenses_json, payload)
+    return Response(content=body, media_type="application/json")
+
+
+def _blocking_body(request: Request):
+    """Pull the request body chunk by chunk from a worker thread, without buffering it."""
+    chunks = request.stream().__aiter__()
+    while True:
+        try:
+            yield from_thread.run(chunks.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+def _import_in_own_session(body, **options):
+    # The import reads the body from a worker thread, which run_sync cannot do, so it
+    # always uses a sync session on the primary, like the NDJSON stream.
+    with SessionLocal() as db:
+        return import_service.import_expenses(db, body, **options)
+
+
+@router.post(
+    "/import",
+    response_model=ExpenseImportReport,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_expenses(
+    request: Request,
+    user_id: int = Query(...),
+    format: Optional[FileFormat] = Query(default=None, description="Por defecto se deduce del Content-Type"),
+    category_label: Optional[str] = Query(default=None, description="Categoría de las filas que no traen una"),
+    transaction_date: Optional[date] = Query(default=None, description="Fecha de las filas que no traen una"),
+):
+    return await run_in_threadpool(
+        _import_in_own_session,
+        _blocking_body(request),
+        user_id=user_id,
+        fmt=format or import_service.format_from_content_type(request.headers.get("content-type")),
+        category_label=category_label,
+        transaction_date=transaction_date,
+    )
 
 
 @router.get("/", response_model=list[ExpenseResponse])
-def list_expenses(
+async def list_expenses(
+    request: Request,
     user_id: int = Query(...),
     category: Optional[ExpenseCategory] = Query(default=None),
     date_from: Optional[date] = Query(default=None),
     date_to: Optional[date] = Query(default=None),
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(default=None, ge=1, le=EXPENSES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None, description=f"Valor de {NEXT_CURSOR_HEADER} de la página anterior"),
+    stream: bool = Query(default=False, description="Devuelve todos los gastos como NDJSON en streaming"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(default=None),
+    db: DbSession = Depends(get_read_db),
 ):
-    return expense_service.list_expenses(
+    selected = expense_service.parse_fields(fields)
+    scope = ("list", category, date_from, date_to, limit, cursor, stream, selected)
+    tag = await run_db(db, expense_service.expenses_etag, user_id, scope)
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+
+    filters = {
+        "user_id": user_id,
+        "category": category,
+        "date_from": date_from,
+        "date_to": date_to,
+        "limit": limit,
+        "cursor": cursor,
+        "fields": selected,
+    }
+    if stream:
+        # The request-scoped session may be closed before the body is fully sent,
+        # so the stream owns a session of its own (its checkout may block on a replica).
+        primary = consistency.wrote_recently(request)
+        stream_db = await run_in_threadpool(open_read_session, user_id, primary=primary)
+        try:
+            lines = expense_service.stream_expenses_ndjson(stream_db, **filters)
+        except Exception:
+            stream_db.close()
+            raise
+        return StreamingResponse(
+            _close_after(lines, stream_db),
+            media_type="application/x-ndjson",
+            headers=etag.headers(tag),
+        )
+
+    # Pre-encoded body: returning a Response skips response_model validation, while
+    # response_model still documents the payload in OpenAPI.
+    page = await run_db(db, expense_service.list_expenses, **filters)
+    headers = etag.headers(tag)
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return Response(content=page.body, media_type="application/json", headers=headers)
+
+
+_EXPORT_MEDIA_TYPES = {FileFormat.CSV: "text/csv; charset=utf-8", FileFormat.NDJSON: "application/x-ndjson"}
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/csv": {}, "application/x-ndjson": {}, "application/gzip": {}}}},
+)
+async def export_expenses(
+    request: Request,
+    user_id: int = Query(...),
+    format: FileFormat = Query(default=FileFormat.CSV),
+    category: Optional[ExpenseCategory] = Query(default=None),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    compress: bool = Query(default=False, alias="gzip", description="Entrega el archivo comprimido (.gz)"),
+):
+    db = await run_in_threadpool(open_read_session, user_id, primary=consistency.wrote_recently(request))
+    try:
+        body = expense_service.export_expenses(
+            db,
+            fmt=format,
+            user_id=user_id,
+            category=category,
+            date_from=date_from,
+            date_to=date_to,
+            compress=compress,
+        )
+    except Exception:
+        db.close()
+        raise
+    filename = f"expenses-{user_id}.{format.value}" + (".gz" if compress else "")
+    return StreamingResponse(
+        _close_after(body, db),
+        media_type="application/gzip" if compress else _EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/summary/by-category", response_model=list[ExpenseSummary])
+async def summarize_by_category(
+    response: Response,
+    user_id: int = Query(...),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    if_none_match: Optional[str] = Header(default=None),
+    db: DbSession = Depends(get_read_db),
+):
+    tag = await run_db(db, expense_service.expenses_etag, user_id, ("summary", date_from, date_to))
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    response.headers.update(etag.headers(tag))
+    return await run_db(
         db,
+        expense_service.summarize_by_category,
         user_id=user_id,
-        category=category,
         date_from=date_from,
         date_to=date_to,
     )
 
 
-@router.get("/summary/by-category", response_model=list[ExpenseSummary])
-def summarize_by_category(
+@router.post("/summary/batch", response_model=ExpenseSummaryBatch)
+async def summarize_by_category_batch(payload: ExpenseSummaryBatchRequest, request: Request):
+    # Many users per request: no single user to route by, so only a fresh last-write token pins it.
+    async with read_session(None, primary=consistency.wrote_recently(request)) as db:
+        body = await run_db(db, expense_service.summarize_by_category_batch_json, payload)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/summary/timeseries", response_model=ExpenseTimeseries)
+async def summarize_timeseries(
+    response: Response,
     user_id: int = Query(...),
+    bucket: TimeBucket = Query(default=TimeBucket.MONTH),
+    group_by: list[TimeseriesDimension] = Query(
+        default=[],
+        description="Dimensiones adicionales; se puede repetir (group_by=category&group_by=status)",
+    ),
+    category: Optional[ExpenseCategory] = Query(default=None),
     date_from: Optional[date] = Query(default=None),
     date_to: Optional[date] = Query(default=None),
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(default=None),
+    db: DbSession = Depends(get_read_db),
 ):
-    return expense_service.summarize_by_category(
+    scope = ("timeseries", bucket, tuple(group_by), category, date_from, date_to)
+    tag = await run_db(db, expense_service.expenses_etag, user_id, scope)
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    response.headers.update(etag.headers(tag))
+    return await run_db(
         db,
+        expense_service.summarize_timeseries,
         user_id=user_id,
+        bucket=bucket,
+        group_by=group_by,
+        category=category,
         date_from=date_from,
         date_to=date_to,
     )
 
 
+@router.get("/changes", response_model=ExpenseChangeFeed)
+async def list_changes(
+    since: int = Query(default=0, ge=0, description="next_cursor de la consulta anterior; 0 desde el inicio"),
+    user_id: Optional[int] = Query(default=None, description="Solo los cambios de este usuario"),
+    limit: Optional[int] = Query(default=None, ge=1, le=EXPENSES_MAX_PAGE_SIZE),
+    # The primary: a lagging replica could show a higher seq before a lower one it has not replayed yet.
+    db: DbSession = Depends(get_db),
+):
+    body = await run_db(db, change_feed_service.list_changes_json, since=since, user_id=user_id, limit=limit)
+    return Response(content=body, media_type="application/json")
+
+
 @router.get("/{expense_id}", response_model=ExpenseResponse)
-def get_expense(expense_id: int, user_id: Optional[int] = Query(default=None), db: Session = Depends(get_db)):
-    expense = expense_service.get_expense(db, expense_id, user_id)
-    return ExpenseResponse.from_orm(expense)
+async def get_expense(
+    expense_id: int,
+    user_id: Optional[int] = Query(default=None),
+    if_none_match: Optional[str] = Header(default=None),
+    db: DbSession = Depends(get_read_db),
+):
+    tag = await run_db(db, expense_service.expense_etag, expense_id, user_id)
+    if etag.matches(if_none_match, tag):
+        return etag.not_modified(tag)
+    body = await run_db(db, expense_service.get_expense_json, expense_id, user_id)
+    return Response(content=body, media_type="application/json", headers=etag.headers(tag))
 
 
 @router.patch("/{expense_id}", response_model=ExpenseResponse)
-def update_expense(
+async def update_expense(
     expense_id: int,
     payload: ExpenseUpdate,
     user_id: Optional[int] = Query(default=None),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
 ):
-    return expense_service.update_expense(db, expense_id, payload, user_id)
+    return await run_db(db, expense_service.update_expense, expense_id, payload, user_id)
 
 
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_expense(expense_id: int, user_id: Optional[int] = Query(default=None), db: Session = Depends(get_db)):
-    expense_service.delete_expense(db, expense_id, user_id)
+async def delete_expense(expense_id: int, user_id: Optional[int] = Query(default=None), db: DbSession = Depends(get_db)):
+    await run_db(db, expense_service.delete_expense, expense_id, user_id)
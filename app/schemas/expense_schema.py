@@ -1,15 +1,17 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
+from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, condecimal, conint, constr
 
 try:
     from pydantic import ConfigDict
 except ImportError:  # Pydantic v1 fallback
     ConfigDict = None
 
-from app.models.expense_model import ExpenseCategory, ExpenseStatus
+from app.core.config import EXPENSES_BULK_MAX_IDS, EXPENSES_SUMMARY_BATCH_MAX_USERS
+from app.models.expense_model import ChangeOperation, ExpenseCategory, ExpenseStatus
 
 
 class EnumModel(BaseModel):
@@ -57,6 +59,8 @@ class ExpenseUpdate(EnumModel):
 class ExpenseResponse(ExpenseBase):
     id: int
     status: ExpenseStatus
+    parent_id: Optional[int] = Field(default=None, description="Gasto en cuotas o recurrente que generó este gasto")
+    period_index: Optional[int] = Field(default=None, description="Meses desde el gasto de origen")
     created_at: datetime
     updated_at: datetime
 
@@ -72,6 +76,19 @@ class ExpenseSummary(BaseModel):
     total_amount: Decimal
 
 
+class ExpenseSummaryBatchRequest(BaseModel):
+    user_ids: list[int] = Field(..., min_length=1, max_length=EXPENSES_SUMMARY_BATCH_MAX_USERS)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
+class ExpenseSummaryBatch(BaseModel):
+    totals: dict[int, dict[ExpenseCategory, Decimal]] = Field(
+        ...,
+        description="Total por categoría de cada usuario pedido; vacío si no tiene gastos en el rango",
+    )
+
+
 class ExpenseItemPayload(EnumModel):
     description: str = Field(..., alias="name", max_length=255)
     amount: Optional[Decimal] = Field(default=None, alias="total", gt=0)
@@ -81,7 +98,7 @@ class ExpenseItemPayload(EnumModel):
     payment_method: Optional[str] = Field(None, max_length=50)
 
 
-class ExpenseBatchCreate(EnumModel):
+class ExpenseBatchBase(EnumModel):
     user_id: int = Field(..., description="Identificador del propietario de los gastos")
     category: Optional[ExpenseCategory] = None
     category_label: Optional[str] = Field(
@@ -92,9 +109,128 @@ class ExpenseBatchCreate(EnumModel):
     status: ExpenseStatus = ExpenseStatus.POSTED
     transaction_date: datetime = Field(default_factory=datetime.utcnow)
     is_recurring: bool = False
+
+
+class ExpenseBatchCreate(ExpenseBatchBase):
     items: list[ExpenseItemPayload] = Field(..., min_length=1)
 
 
+class ExpenseItemColumns(EnumModel):
+    """The fields of ExpenseItemPayload as parallel arrays: item i is position i of every array."""
+
+    description: list[constr(max_length=255)] = Field(..., alias="name", min_length=1)
+    amount: Optional[list[Optional[condecimal(gt=0)]]] = Field(default=None, alias="total")
+    unit_amount: Optional[list[Optional[condecimal(gt=0)]]] = Field(default=None, alias="monto")
+    quantity: Optional[list[conint(ge=1)]] = Field(default=None, alias="cantidad")
+    installments: Optional[list[Optional[conint(gt=0)]]] = Field(default=None, alias="cuotas")
+    payment_method: Optional[list[Optional[constr(max_length=50)]]] = None
+
+
+class ExpenseColumnarBatchCreate(ExpenseBatchBase):
+    columns: ExpenseItemColumns = Field(..., description="Una lista por campo, todas del mismo largo")
+
+
 class ExpenseBatchResponse(EnumModel):
     created: list[ExpenseResponse]
     total_amount: Decimal = Field(..., description="Suma total de los gastos creados en la operación")
+
+
+class ExpenseIdsRequest(BaseModel):
+    user_id: int = Field(..., description="Dueño de los gastos; los IDs de otro usuario cuentan como no encontrados")
+    ids: list[int] = Field(..., min_length=1, max_length=EXPENSES_BULK_MAX_IDS)
+
+
+class ExpenseBulkUpdate(ExpenseIdsRequest):
+    changes: ExpenseUpdate = Field(..., description="Campos a modificar, iguales para todos los gastos")
+
+
+class BulkItemStatus(str, Enum):
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+
+
+class ExpenseBulkItem(EnumModel):
+    id: int
+    status: BulkItemStatus
+    expense: Optional[ExpenseResponse] = Field(default=None, description="Gasto ya modificado (solo en PATCH)")
+
+
+class ExpenseBulkResult(EnumModel):
+    matched: int = Field(..., description="Gastos modificados o eliminados")
+    results: list[ExpenseBulkItem] = Field(..., description="Un resultado por ID, en el orden recibido")
+
+
+class ExpenseBatchGet(BaseModel):
+    found: list[ExpenseResponse] = Field(..., description="Gastos encontrados, en el orden recibido")
+    missing: list[int] = Field(..., description="IDs inexistentes o de otro usuario")
+
+
+class ExpenseChangeEvent(EnumModel):
+    seq: int = Field(..., description="Posición en el feed, creciente en orden de commit")
+    operation: ChangeOperation
+    expense_id: int
+    user_id: int
+    changed_at: datetime
+    expense: Optional[ExpenseResponse] = Field(
+        default=None,
+        description="Estado actual del gasto; vacío si fue eliminado (en este evento o en uno posterior)",
+    )
+
+
+class ExpenseChangeFeed(BaseModel):
+    changes: list[ExpenseChangeEvent]
+    next_cursor: int = Field(..., description="Valor de 'since' para la próxima consulta")
+    has_more: bool = Field(..., description="Hay más cambios disponibles: consultar de nuevo sin esperar")
+
+
+class FileFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ExpenseImportError(BaseModel):
+    line: int = Field(..., description="Línea del archivo (la cabecera del CSV es la línea 1)")
+    detail: str
+
+
+class ExpenseImportReport(BaseModel):
+    imported: int = Field(..., description="Gastos guardados")
+    failed: int = Field(..., description="Filas rechazadas")
+    total_amount: Decimal = Field(..., description="Suma de los gastos guardados")
+    chunks: int = Field(..., description="Bloques confirmados (un commit por bloque)")
+    errors: list[ExpenseImportError] = Field(default_factory=list)
+    errors_truncated: bool = Field(
+        default=False,
+        description="Hay más filas rechazadas que las listadas en 'errors'",
+    )
+
+
+class TimeBucket(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class TimeseriesDimension(str, Enum):
+    CATEGORY = "category"
+    PAYMENT_METHOD = "payment_method"
+    STATUS = "status"
+
+
+class TimeseriesPoint(BaseModel):
+    bucket_start: date = Field(..., description="Primer día del intervalo (las semanas parten el lunes)")
+    total_amount: Decimal
+    count: int
+    average_amount: Optional[Decimal] = Field(default=None, description="Vacío si el intervalo no tiene gastos")
+
+
+class TimeseriesSeries(BaseModel):
+    key: dict[str, Optional[str]] = Field(..., description="Valor de cada dimensión de group_by")
+    points: list[TimeseriesPoint]
+
+
+class ExpenseTimeseries(BaseModel):
+    bucket: TimeBucket
+    group_by: list[TimeseriesDimension]
+    series: list[TimeseriesSeries]
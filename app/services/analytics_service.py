@@ -0,0 +1,172 @@
+"""Time-bucketed aggregates for dashboard charts.
+
+One GROUP BY over ``expenses`` per request: the bucket is a dialect-specific date
+expression (day, Monday-based week or month start), optionally combined with the
+category, payment method and status columns. Empty buckets are filled in Python so
+every series covers the whole range.
+"""
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from enum import Enum
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Date, cast, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.core.config import EXPENSES_TIMESERIES_MAX_BUCKETS
+from app.models.expense_model import Expense
+from app.schemas.expense_schema import (
+    ExpenseTimeseries,
+    TimeBucket,
+    TimeseriesDimension,
+    TimeseriesPoint,
+    TimeseriesSeries,
+)
+
+_AMOUNT_QUANTUM = Decimal("0.01")
+
+# Modifiers are inlined (not bound) so the SELECT and GROUP BY expressions are identical.
+_SQLITE_BUCKETS = {
+    TimeBucket.DAY: (),
+    TimeBucket.WEEK: ("'weekday 0'", "'-6 days'"),
+    TimeBucket.MONTH: ("'start of month'",),
+}
+
+
+def _bucket_expression(dialect: str, bucket: TimeBucket, column):
+    if dialect == "sqlite":
+        return func.date(column, *(literal_column(modifier) for modifier in _SQLITE_BUCKETS[bucket]))
+    if dialect == "mysql":
+        day = func.date(column)
+        if bucket == TimeBucket.WEEK:
+            return func.subdate(day, func.weekday(column))
+        if bucket == TimeBucket.MONTH:
+            return func.subdate(day, func.dayofmonth(column) - literal_column("1"))
+        return day
+    if dialect == "postgresql":
+        return cast(func.date_trunc(literal_column(f"'{bucket.value}'"), column), Date)
+    raise RuntimeError(f"Time buckets are not supported on '{dialect}'.")
+
+
+def bucket_start(value: date, bucket: TimeBucket) -> date:
+    if bucket == TimeBucket.WEEK:
+        return value - timedelta(days=value.weekday())
+    if bucket == TimeBucket.MONTH:
+        return value.replace(day=1)
+    return value
+
+
+def _next_bucket(value: date, bucket: TimeBucket) -> date:
+    if bucket == TimeBucket.DAY:
+        return value + timedelta(days=1)
+    if bucket == TimeBucket.WEEK:
+        return value + timedelta(days=7)
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _bucket_count(first: date, last: date, bucket: TimeBucket) -> int:
+    if bucket == TimeBucket.MONTH:
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days // (7 if bucket == TimeBucket.WEEK else 1) + 1
+
+
+def _check_bucket_count(first: date, last: date, bucket: TimeBucket) -> None:
+    if _bucket_count(first, last, bucket) > EXPENSES_TIMESERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"El rango abarca más de {EXPENSES_TIMESERIES_MAX_BUCKETS} intervalos; "
+                "acota las fechas o usa un intervalo mayor."
+            ),
+        )
+
+
+def _as_date(value) -> date:
+    # SQLite returns 'YYYY-MM-DD' strings, MySQL and PostgreSQL return dates.
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _key_value(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+def _point(start: date, total: Decimal, count: int) -> TimeseriesPoint:
+    average = (total / count).quantize(_AMOUNT_QUANTUM, rounding=ROUND_HALF_UP) if count else None
+    return TimeseriesPoint(bucket_start=start, total_amount=total, count=count, average_amount=average)
+
+
+def timeseries(
+    db: Session,
+    *,
+    bucket: TimeBucket,
+    group_by: list[TimeseriesDimension],
+    filters: list,
+    source=None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> ExpenseTimeseries:
+    """Sums, counts and averages per bucket (and per ``group_by`` combination) for ``filters``.
+
+    ``source`` is the table or subquery with the expense columns (``expenses`` by default).
+    """
+    group_by = list(dict.fromkeys(group_by))
+    columns = (Expense.__table__ if source is None else source).c
+    first = bucket_start(date_from, bucket) if date_from else None
+    last = bucket_start(date_to, bucket) if date_to else None
+    if first is None or last is None:
+        # An open end is bounded by the data: MIN/MAX come from the (user_id, transaction_date)
+        # index, so an oversized series is refused before the GROUP BY scans it.
+        low, high = db.execute(
+            select(func.min(columns.transaction_date), func.max(columns.transaction_date)).where(*filters)
+        ).one()
+        if low is None:
+            return ExpenseTimeseries(bucket=bucket, group_by=group_by, series=[])
+        first = first or bucket_start(_as_date(low), bucket)
+        last = last or bucket_start(_as_date(high), bucket)
+    if first > last:
+        return ExpenseTimeseries(bucket=bucket, group_by=group_by, series=[])
+    _check_bucket_count(first, last, bucket)
+
+    bucket_column = _bucket_expression(db.get_bind().dialect.name, bucket, columns.transaction_date).label("bucket")
+    dimensions = [columns[dimension.value] for dimension in group_by]
+    stmt = (
+        select(bucket_column, *dimensions, func.sum(columns.amount), func.count(columns.id))
+        .where(*filters)
+        .group_by(bucket_column, *dimensions)
+    )
+
+    series: dict[tuple, dict[date, tuple[Decimal, int]]] = {}
+    for row in db.execute(stmt):
+        start = _as_date(row[0])
+        key = tuple(_key_value(value) for value in row[1:1 + len(dimensions)])
+        total = Decimal(row[-2] or 0).quantize(_AMOUNT_QUANTUM, rounding=ROUND_HALF_UP)
+        series.setdefault(key, {})[start] = (total, row[-1])
+
+    if not group_by:
+        series.setdefault((), {})  # an ungrouped chart still gets its zero-filled line
+
+    starts = []
+    current = first
+    while current <= last:
+        starts.append(current)
+        current = _next_bucket(current, bucket)
+
+    zero = (Decimal("0.00"), 0)
+    return ExpenseTimeseries(
+        bucket=bucket,
+        group_by=group_by,
+        series=[
+            TimeseriesSeries(
+                key={dimension.value: value for dimension, value in zip(group_by, key)},
+                points=[_point(start, *points.get(start, zero)) for start in starts],
+            )
+            for key, points in sorted(series.items(), key=lambda item: tuple(value or "" for value in item[0]))
+        ],
+    )
@@ -0,0 +1,170 @@
+"""Move old expenses to ``expenses_archive`` and keep the MySQL monthly partitions in shape.
+
+Rows whose ``transaction_date`` is before the cutoff (the start of the month
+``EXPENSES_ARCHIVE_AFTER_MONTHS`` back) are copied to the archive and deleted from
+``expenses`` in batches, one transaction per batch, keeping their ids. The monthly
+rollups are left alone: archived rows stay counted, and the read paths add the
+archive only when the requested range reaches back to it. Installment and recurring
+sources stay in ``expenses`` whatever their age, since the expansion worker reads them.
+
+On a partitioned table (migration 006) the command also adds the partitions for the
+coming months and drops the old ones left empty by the archival.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    EXPENSES_ARCHIVE_AFTER_MONTHS,
+    EXPENSES_ARCHIVE_BATCH_SIZE,
+    EXPENSES_PARTITION_AHEAD_MONTHS,
+)
+from app.models.expense_model import Expense, ExpenseArchive
+from app.services.expansion_service import add_months
+from app.services.expense_service import _mark_written
+
+logger = logging.getLogger("expense_service.archive")
+
+_COLUMNS = tuple(column.name for column in ExpenseArchive.__table__.columns)
+# The negation of expansion_service._SOURCE_FILTER, written so NULL flags count as "not a source".
+_NOT_SOURCE = (Expense.is_recurring.isnot(True), func.coalesce(Expense.installments, 0) <= 1)
+
+
+class ArchiveReport(NamedTuple):
+    cutoff: datetime
+    moved: int
+    batches: int
+    users: int
+
+
+class PartitionReport(NamedTuple):
+    added: list[str]
+    dropped: list[str]
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def archive_cutoff(now: Optional[datetime] = None, months: Optional[int] = None) -> datetime:
+    """Start of the month ``months`` before ``now``: older rows are archived."""
+    months = EXPENSES_ARCHIVE_AFTER_MONTHS if months is None else months
+    return add_months(_month_start(now or datetime.utcnow()), -months)
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> tuple[int, set[int]]:
+    """Move up to ``batch_size`` rows older than ``cutoff``; returns how many and their users.
+
+    The caller commits.
+    """
+    old = (Expense.transaction_date < cutoff, *_NOT_SOURCE)
+    rows = db.execute(select(Expense.id, Expense.user_id).where(*old).limit(batch_size).with_for_update()).all()
+    if not rows:
+        return 0, set()
+    ids = [row.id for row in rows]
+    db.execute(
+        insert(ExpenseArchive).from_select(
+            _COLUMNS,
+            select(*(getattr(Expense, column) for column in _COLUMNS)).where(Expense.id.in_(ids), *old),
+        )
+    )
+    # The date bound lets MySQL prune the DELETE to the old partitions.
+    db.execute(delete(Expense).where(Expense.id.in_(ids), *old))
+    return len(ids), {row.user_id for row in rows}
+
+
+def archive_expenses(
+    session_factory: Callable[[], Session],
+    *,
+    cutoff: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+) -> ArchiveReport:
+    """Archive every row older than ``cutoff``, one committed batch at a time."""
+    cutoff = cutoff or archive_cutoff()
+    batch_size = batch_size or EXPENSES_ARCHIVE_BATCH_SIZE
+    moved = batches = 0
+    users: set[int] = set()
+    while True:
+        with session_factory() as db:
+            try:
+                count, batch_users = archive_batch(db, cutoff, batch_size)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Archive batch failed after %d rows; the next run resumes from there", moved)
+                raise
+        for user_id in batch_users:
+            _mark_written(user_id)
+        users |= batch_users
+        moved += count
+        batches += bool(count)
+        if count < batch_size:
+            return ArchiveReport(cutoff=cutoff, moved=moved, batches=batches, users=len(users))
+
+
+def _partition_bounds(db: Session) -> list[tuple[str, Optional[datetime]]]:
+    """(name, exclusive upper bound) of each partition of ``expenses`` in order; None is MAXVALUE."""
+    rows = db.execute(
+        text(
+            "SELECT partition_name, partition_description FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = 'expenses' AND partition_name IS NOT NULL "
+            "ORDER BY partition_ordinal_position"
+        )
+    ).all()
+    return [
+        (name, None if description == "MAXVALUE" else datetime.fromisoformat(description.strip("'")))
+        for name, description in rows
+    ]
+
+
+def _partition_definition(bound: datetime) -> str:
+    return f"PARTITION p{add_months(bound, -1):%Y%m} VALUES LESS THAN ('{bound:%Y-%m-%d}')"
+
+
+def maintain_partitions(
+    db: Session,
+    *,
+    cutoff: datetime,
+    now: Optional[datetime] = None,
+    ahead_months: Optional[int] = None,
+) -> PartitionReport:
+    """Split monthly partitions off ``pmax`` up to ``ahead_months`` ahead, drop empty ones below ``cutoff``.
+
+    A no-op unless ``expenses`` is a partitioned MySQL table. DDL commits on its own.
+    """
+    if db.get_bind().dialect.name != "mysql":
+        return PartitionReport(added=[], dropped=[])
+    partitions = _partition_bounds(db)
+    bounded = [(name, bound) for name, bound in partitions if bound is not None]
+    catch_all = next((name for name, bound in partitions if bound is None), None)
+    if not bounded or catch_all is None:
+        return PartitionReport(added=[], dropped=[])
+
+    ahead_months = EXPENSES_PARTITION_AHEAD_MONTHS if ahead_months is None else ahead_months
+    last_bound = add_months(_month_start(now or datetime.utcnow()), ahead_months + 1)
+    bounds = []
+    bound = add_months(bounded[-1][1], 1)
+    while bound <= last_bound:
+        bounds.append(bound)
+        bound = add_months(bound, 1)
+    if bounds:
+        definitions = [_partition_definition(bound) for bound in bounds]
+        db.execute(
+            text(
+                f"ALTER TABLE expenses REORGANIZE PARTITION `{catch_all}` INTO "
+                f"({', '.join(definitions)}, PARTITION `{catch_all}` VALUES LESS THAN (MAXVALUE))"
+            )
+        )
+
+    # Only partitions whose rows were all archived; installment and recurring sources keep theirs.
+    empty = [
+        name
+        for name, bound in bounded[:-1]
+        if bound <= cutoff and not db.execute(text(f"SELECT 1 FROM expenses PARTITION (`{name}`) LIMIT 1")).first()
+    ]
+    if empty:
+        db.execute(text(f"ALTER TABLE expenses DROP PARTITION {', '.join(f'`{name}`' for name in empty)}"))
+    return PartitionReport(added=[f"p{add_months(bound, -1):%Y%m}" for bound in bounds], dropped=empty)
@@ -0,0 +1,213 @@
+"""Infer an expense category from its description with keyword and prefix rules.
+
+Every pattern is compiled once into a single Aho-Corasick automaton, so a batch is
+categorized in one pass over each description whatever the number of rules. The
+rules are the built-in ``DEFAULT_RULES`` or, with ``CATEGORY_RULES_PATH``, a JSON
+file that replaces them and is recompiled when it changes on disk::
+
+    [
+      {"pattern": "Jumbo", "category": "supermarket"},
+      {"pattern": "Pago tarjeta", "category": "credit_card", "match": "prefix"}
+    ]
+
+``keyword`` rules (the default) match whole words anywhere in the description and
+``prefix`` rules match its beginning. When several rules match, the longest pattern
+wins, then the one listed first.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+
+from app.core.config import CATEGORY_RULES_PATH, CATEGORY_RULES_RELOAD_SECONDS
+from app.models.expense_model import ExpenseCategory, normalize_label
+
+logger = logging.getLogger("expense_service.categorization")
+
+KEYWORD = "keyword"
+PREFIX = "prefix"
+_MISSING = -1  # mtime marker of a rules file that could not be read
+
+
+class CategoryRule(NamedTuple):
+    pattern: str
+    category: ExpenseCategory
+    match: str = KEYWORD
+
+
+DEFAULT_RULES = (
+    *(
+        CategoryRule(pattern, ExpenseCategory.SUPERMARKET)
+        for pattern in (
+            "jumbo", "lider", "santa isabel", "unimarc", "tottus", "acuenta", "ekono", "alvi",
+            "mayorista 10", "supermercado", "minimarket",
+        )
+    ),
+    *(
+        CategoryRule(pattern, ExpenseCategory.SERVICE_BASIC)
+        for pattern in (
+            "enel", "aguas andinas", "essbio", "esval", "aguas del valle", "metrogas", "cge", "chilquinta",
+            "abastible", "lipigas", "gasco", "vtr", "movistar", "entel", "wom", "claro", "gtd",
+            "mundo pacifico", "cuenta de luz", "cuenta del agua", "internet", "gastos comunes",
+        )
+    ),
+    *(
+        CategoryRule(pattern, ExpenseCategory.CREDIT_CARD)
+        for pattern in ("tarjeta de credito", "tarjeta", "cmr", "visa", "mastercard", "american express")
+    ),
+    CategoryRule("pago tc", ExpenseCategory.CREDIT_CARD, PREFIX),
+    *(
+        CategoryRule(pattern, ExpenseCategory.BANK_DEBTS)
+        for pattern in (
+            "credito de consumo", "credito hipotecario", "credito automotriz", "dividendo",
+            "linea de credito", "cuota credito", "avance en efectivo", "prestamo",
+        )
+    ),
+)
+
+
+@lru_cache(maxsize=8192)
+def _searchable(text: str) -> str:
+    """Normalized description with runs of whitespace collapsed, as the patterns are."""
+    return " ".join(normalize_label(text).split())
+
+
+class _Automaton:
+    """Aho-Corasick trie over the normalized patterns of ``rules``."""
+
+    def __init__(self, rules: Iterable[CategoryRule]):
+        self.rules = [rule._replace(pattern=_searchable(rule.pattern)) for rule in rules]
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail = [0]
+        self.output: list[tuple[int, ...]] = [()]
+        for index, rule in enumerate(self.rules):
+            node = 0
+            for char in rule.pattern:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                    self.goto[node][char] = child
+                node = child
+            self.output[node] += (index,)
+
+        # Breadth-first so every failure link points to an already finished, shallower node.
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.output[child] += self.output[self.fail[child]]
+        # Merchant descriptions repeat a lot; memoize per rule set so a reload starts clean.
+        self.categorize = lru_cache(maxsize=8192)(self._categorize)
+
+    def _categorize(self, description: str) -> Optional[ExpenseCategory]:
+        return self.match(_searchable(description))
+
+    def match(self, text: str) -> Optional[ExpenseCategory]:
+        goto, fail, output, rules = self.goto, self.fail, self.output, self.rules
+        best: Optional[tuple[int, int]] = None  # (pattern length, -rule index)
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in output[node]:
+                rule = rules[index]
+                start = end - len(rule.pattern)
+                if rule.match == PREFIX:
+                    if start:
+                        continue
+                elif (start and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                    continue
+                candidate = (len(rule.pattern), -index)
+                if best is None or candidate > best:
+                    best = candidate
+        return None if best is None else rules[-best[1]].category
+
+
+def load_rules_file(path: str) -> list[CategoryRule]:
+    """Parse a rules file; raises ValueError (or OSError) when it cannot be used."""
+    with open(path, encoding="utf-8") as handle:
+        raw = json.load(handle)
+    if not isinstance(raw, list):
+        raise ValueError("the rules file must contain a JSON list")
+    rules = []
+    for position, item in enumerate(raw, start=1):
+        try:
+            rule = CategoryRule(
+                str(item["pattern"]),
+                ExpenseCategory(item["category"]),
+                item.get("match", KEYWORD),
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            raise ValueError(f"invalid rule #{position}: {item!r}") from exc
+        if rule.match not in (KEYWORD, PREFIX) or not _searchable(rule.pattern):
+            raise ValueError(f"invalid rule #{position}: {item!r}")
+        rules.append(rule)
+    return rules
+
+
+class CategoryRules:
+    """Compiled rule set; with ``path`` it follows the file, keeping the last valid rules on errors."""
+
+    def __init__(self, path: Optional[str] = None, reload_seconds: float = 5.0):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._automaton = _Automaton(DEFAULT_RULES)
+        self._mtime: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self, force: bool = False) -> None:
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_seconds:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as error:
+                if self._mtime != _MISSING:
+                    logger.warning("Category rules file unavailable, keeping current rules: %s", error)
+                    self._mtime = _MISSING
+                return
+            if mtime == self._mtime and not force:
+                return
+            self._mtime = mtime
+            try:
+                rules = load_rules_file(self.path)
+            except (OSError, ValueError) as error:
+                logger.warning("Ignoring category rules file %s: %s", self.path, error)
+                return
+            self._automaton = _Automaton(rules)
+            logger.info("Loaded %d category rules from %s", len(rules), self.path)
+
+    def reload(self) -> int:
+        """Re-read the rules file (or recompile the built-in rules) now; returns the number of active rules."""
+        if self.path:
+            self._refresh(force=True)
+        else:
+            self._automaton = _Automaton(DEFAULT_RULES)
+        return len(self._automaton.rules)
+
+    def categorize(self, descriptions: Iterable[Optional[str]]) -> list[Optional[ExpenseCategory]]:
+        """Category of each description, or None when no rule matches it."""
+        self._refresh()
+        automaton = self._automaton  # one rule set for the whole batch, even if a reload lands mid-way
+        return [automaton.categorize(text) if text else None for text in descriptions]
+
+
+category_rules = CategoryRules(CATEGORY_RULES_PATH, CATEGORY_RULES_RELOAD_SECONDS)
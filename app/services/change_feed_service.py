@@ -0,0 +1,141 @@
+"""Change feed for downstream sync: an outbox of expense inserts, updates and deletes.
+
+Every write path records its changes with ``record_changes`` inside its own
+transaction, so a committed change always has its event and a rolled back one never
+does. ``GET /expenses/changes`` returns the events after a cursor in ``seq`` order,
+each with the current state of the expense. ``seq`` is taken at INSERT time, not at
+COMMIT, so a slow transaction can make a lower ``seq`` visible after a higher one;
+events younger than ``EXPENSES_CHANGES_SETTLE_SECONDS`` are held back to give it time.
+``changed_at`` and the age check both use the database clock, so app hosts with skewed
+clocks cannot shorten the window, and the feed is read from the primary, so replica lag
+cannot hide a committed event behind a later cursor.
+Moving rows to expenses_archive is not a change and records nothing.
+
+Events store the expense's ``transaction_date``, so the current state is looked up by
+``(id, transaction_date)``: the whole primary key of the partitioned ``expenses`` table,
+which lets MySQL read one partition per event instead of probing all of them.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import DateTime, and_, delete, func, insert, literal_column, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+from app.core import serialization
+from app.core.config import (
+    EXPENSES_ARCHIVE_BATCH_SIZE,
+    EXPENSES_CHANGES_PAGE_SIZE,
+    EXPENSES_CHANGES_RETENTION_DAYS,
+    EXPENSES_CHANGES_SETTLE_SECONDS,
+)
+from app.models.expense_model import ChangeOperation, Expense, ExpenseArchive, ExpenseChange
+from app.schemas.expense_schema import ExpenseResponse
+
+_EVENT_FIELDS = ("seq", "operation", "expense_id", "user_id", "changed_at")
+_EVENT_COLUMNS = tuple(getattr(ExpenseChange, field) for field in _EVENT_FIELDS)
+_EXPENSE_FIELDS = tuple(getattr(ExpenseResponse, "model_fields", None) or ExpenseResponse.__fields__)
+# The expense as it is now, live or archived; every column is NULL once it was deleted.
+_EXPENSE_COLUMNS = tuple(
+    func.coalesce(getattr(Expense, field), getattr(ExpenseArchive, field)).label(f"expense_{field}")
+    for field in _EXPENSE_FIELDS
+)
+
+
+def _database_utc_now(db: Session):
+    """The database's current UTC time with microseconds, as a SQL expression."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return func.utc_timestamp(6)
+    if dialect == "sqlite":
+        # Same text format SQLAlchemy stores: six fractional digits (%f gives SS.SSS).
+        return func.strftime(literal_column("'%Y-%m-%d %H:%M:%f000'"), literal_column("'now'"))
+    return func.current_timestamp()
+
+
+def record_changes(
+    db: Session, operation: ChangeOperation, changes: Iterable[tuple[int, int, datetime]]
+) -> None:
+    """Add one event per (expense_id, user_id, transaction_date); run it in the transaction that made the change."""
+    rows = [
+        {"expense_id": expense_id, "user_id": user_id, "transaction_date": transaction_date, "operation": operation}
+        for expense_id, user_id, transaction_date in changes
+    ]
+    if rows:
+        db.execute(insert(ExpenseChange.__table__).values(changed_at=_database_utc_now(db)), rows)
+
+
+def move_changes(db: Session, expense_ids: list[int], transaction_date: datetime) -> None:
+    """Point the earlier events of ``expense_ids`` at their new ``transaction_date``; same transaction as the UPDATE."""
+    if expense_ids:
+        db.execute(
+            update(ExpenseChange)
+            .where(ExpenseChange.expense_id.in_(expense_ids))
+            .values(transaction_date=transaction_date)
+        )
+
+
+def list_changes_json(
+    db: Session,
+    *,
+    since: int = 0,
+    user_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> bytes:
+    """Events after ``since`` (all users or one) encoded as ExpenseChangeFeed."""
+    limit = limit or EXPENSES_CHANGES_PAGE_SIZE
+    filters = [ExpenseChange.seq > since]
+    if user_id is not None:
+        filters.append(ExpenseChange.user_id == user_id)
+    database_now = type_coerce(_database_utc_now(db), DateTime).label("database_now")
+    rows = db.execute(
+        select(*_EVENT_COLUMNS, *_EXPENSE_COLUMNS, database_now)
+        .outerjoin(
+            Expense,
+            and_(Expense.id == ExpenseChange.expense_id, Expense.transaction_date == ExpenseChange.transaction_date),
+        )
+        .outerjoin(ExpenseArchive, ExpenseArchive.id == ExpenseChange.expense_id)
+        .where(*filters)
+        .order_by(ExpenseChange.seq)
+        .limit(limit + 1)
+    ).all()
+
+    settle = timedelta(seconds=EXPENSES_CHANGES_SETTLE_SECONDS)
+    changes = []
+    for row in rows[:limit]:
+        # Stop at the first unsettled event: later ones may still gain a lower seq.
+        if row.changed_at > row.database_now - settle:
+            break
+        event = dict(zip(_EVENT_FIELDS, row[:len(_EVENT_FIELDS)]))
+        expense = dict(zip(_EXPENSE_FIELDS, row[len(_EVENT_FIELDS):-1]))
+        event["expense"] = expense if expense["id"] is not None else None
+        changes.append(event)
+    return serialization.dumps(
+        {
+            "changes": changes,
+            "next_cursor": changes[-1]["seq"] if changes else since,
+            "has_more": len(changes) == limit and len(rows) > limit,
+        }
+    )
+
+
+def prune_changes(
+    session_factory: Callable[[], Session],
+    *,
+    before: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Delete the events older than ``before`` (the retention window), one committed batch at a time."""
+    before = before or datetime.utcnow() - timedelta(days=EXPENSES_CHANGES_RETENTION_DAYS)
+    batch_size = batch_size or EXPENSES_ARCHIVE_BATCH_SIZE
+    pruned = 0
+    while True:
+        with session_factory() as db:
+            seqs = db.execute(
+                select(ExpenseChange.seq).where(ExpenseChange.changed_at < before).limit(batch_size)
+            ).scalars().all()
+            if seqs:
+                db.execute(delete(ExpenseChange).where(ExpenseChange.seq.in_(seqs)))
+                db.commit()
+        pruned += len(seqs)
+        if len(seqs) < batch_size:
+            return pruned
@@ -0,0 +1,233 @@
+"""Expand installment and recurring expenses into PLANNED rows ahead of time.
+
+A source is an expense with ``installments`` > 1 (the stored amount is one installment;
+the series ends at the last one) or ``is_recurring`` (a monthly repeat with no end).
+Each period becomes a row with ``parent_id`` and ``period_index`` (months after the
+source) and neither flag, for dates up to ``EXPANSION_HORIZON_MONTHS`` ahead. The first expansion of a source starts at the first period not in the past;
+later runs continue after the last generated period.
+
+Runs off the request path: ``python -m app.commands.expand`` or the optional in-process
+task (``EXPANSION_WORKER_ENABLED``). Users are processed in batches, several batches in
+parallel, each batch in its own transaction. Inserts skip periods that already exist
+(unique key ``uq_expenses_parent_period``), so a crashed or concurrent run is resumed
+by simply running again.
+"""
+import asyncio
+import calendar
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import func, or_, select, union
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import EXPANSION_BATCH_USERS, EXPANSION_HORIZON_MONTHS, EXPANSION_WORKERS
+from app.models.expense_model import ChangeOperation, Expense, ExpenseStatus
+from app.services import change_feed_service, rollup_service
+from app.services.expense_service import _chunks, _mark_written
+
+logger = logging.getLogger("expense_service.expansion")
+
+# Generated rows carry neither flag, so they never match (and never hide behind parent_id IS NULL,
+# which matches almost every row and would steer the planner away from the two narrow indexes).
+_SOURCE_FILTER = or_(Expense.is_recurring.is_(True), Expense.installments > 1)
+_SOURCE_COLUMNS = (
+    Expense.id,
+    Expense.user_id,
+    Expense.category,
+    Expense.description,
+    Expense.amount,
+    Expense.quantity,
+    Expense.installments,
+    Expense.payment_method,
+    Expense.transaction_date,
+)
+# Sources per statement (bounds the IN lists of the period lookup).
+_SOURCE_CHUNK = 500
+
+
+class ExpansionReport(NamedTuple):
+    users: int
+    batches: int
+    failed_batches: int
+    inserted: int
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Same day ``months`` later, clamped to the end of shorter months (Jan 31 + 1 -> Feb 28/29)."""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def _pending_periods(source, last_period: Optional[int], now: datetime, horizon_end: datetime) -> Iterator[int]:
+    start = source.transaction_date
+    if last_period is None:
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        period = max(1, (today.year - start.year) * 12 + today.month - start.month)
+        if add_months(start, period) < today:
+            period += 1
+    else:
+        period = last_period + 1
+    final = source.installments - 1 if source.installments and source.installments > 1 else None
+    while (final is None or period <= final) and add_months(start, period) <= horizon_end:
+        yield period
+        period += 1
+
+
+def _insert_missing(db: Session, rows: list[dict]) -> list[dict]:
+    """Insert ``rows`` skipping (parent_id, period_index) pairs that already exist.
+
+    Returns the inserted rows with their new ``id``.
+    """
+    table = Expense.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        for row in rows:
+            for key in ("transaction_date", "created_at"):
+                row[key] = row[key].replace(microsecond=0)
+        stmt = mysql.insert(table)
+        # No-op on duplicates. The sources are locked FOR UPDATE, so no concurrent run
+        # inserts these periods and every row here is new.
+        db.execute(stmt.on_duplicate_key_update(period_index=stmt.inserted.period_index), rows)
+        ids = {
+            (parent_id, period_index): expense_id
+            for expense_id, parent_id, period_index in db.execute(
+                select(Expense.id, Expense.parent_id, Expense.period_index).where(
+                    Expense.parent_id.in_({row["parent_id"] for row in rows})
+                )
+            )
+        }
+        return [{**row, "id": ids[row["parent_id"], row["period_index"]]} for row in rows]
+    if dialect not in ("sqlite", "postgresql"):
+        raise RuntimeError(f"Expense expansion is not supported on '{dialect}'.")
+    stmt = (
+        (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table)
+        .on_conflict_do_nothing(index_elements=["parent_id", "period_index", "transaction_date"])
+        .returning(table.c.id, table.c.parent_id, table.c.period_index)
+    )
+    ids = {(parent_id, period_index): expense_id for expense_id, parent_id, period_index in db.execute(stmt, rows)}
+    return [
+        {**row, "id": ids[row["parent_id"], row["period_index"]]}
+        for row in rows
+        if (row["parent_id"], row["period_index"]) in ids
+    ]
+
+
+def expand_users(
+    db: Session,
+    user_ids: list[int],
+    *,
+    now: Optional[datetime] = None,
+    horizon_months: Optional[int] = None,
+) -> list[dict]:
+    """Generate the pending periods of every source of ``user_ids``; the caller commits.
+
+    Returns the inserted rows; their rollup deltas and change events are already recorded.
+    """
+    now = now or datetime.utcnow()
+    horizon_end = add_months(now, EXPANSION_HORIZON_MONTHS if horizon_months is None else horizon_months)
+    sources = db.execute(
+        select(*_SOURCE_COLUMNS)
+        .where(_SOURCE_FILTER, Expense.user_id.in_(user_ids))
+        .order_by(Expense.id)
+        .with_for_update()
+    ).all()
+
+    inserted: list[dict] = []
+    for chunk in _chunks(sources, _SOURCE_CHUNK):
+        last_periods = dict(
+            db.execute(
+                select(Expense.parent_id, func.max(Expense.period_index))
+                .where(Expense.parent_id.in_([source.id for source in chunk]))
+                .group_by(Expense.parent_id)
+            ).all()
+        )
+        rows = [
+            {
+                "user_id": source.user_id,
+                "category": source.category,
+                "description": source.description,
+                "amount": source.amount,
+                "quantity": source.quantity,
+                "installments": None,
+                "payment_method": source.payment_method,
+                "status": ExpenseStatus.PLANNED,
+                "transaction_date": add_months(source.transaction_date, period),
+                "is_recurring": False,
+                "parent_id": source.id,
+                "period_index": period,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for source in chunk
+            for period in _pending_periods(source, last_periods.get(source.id), now, horizon_end)
+        ]
+        if rows:
+            inserted.extend(_insert_missing(db, rows))
+    if inserted:
+        rollup_service.apply_deltas(db, rollup_service.collect_deltas(inserted))
+        changes = ((row["id"], row["user_id"], row["transaction_date"]) for row in inserted)
+        change_feed_service.record_changes(db, ChangeOperation.INSERT, changes)
+    return inserted
+
+
+def source_user_ids(db: Session) -> list[int]:
+    # One branch per flag so each is answered from its (flag, user_id) index.
+    stmt = union(
+        select(Expense.user_id).where(Expense.is_recurring.is_(True)),
+        select(Expense.user_id).where(Expense.installments > 1),
+    )
+    return sorted(db.execute(stmt).scalars())
+
+
+def _expand_batch(session_factory: Callable[[], Session], user_ids: list[int], now: datetime, horizon_months) -> int:
+    with session_factory() as db:
+        try:
+            inserted = expand_users(db, user_ids, now=now, horizon_months=horizon_months)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Expansion failed for users %s..%s; the next run retries them", user_ids[0], user_ids[-1])
+            raise
+    for user_id in {row["user_id"] for row in inserted}:
+        _mark_written(user_id)
+    return len(inserted)
+
+
+def expand_all(
+    session_factory: Callable[[], Session],
+    *,
+    now: Optional[datetime] = None,
+    horizon_months: Optional[int] = None,
+    batch_users: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> ExpansionReport:
+    """One pass over every user with sources, ``workers`` batches of ``batch_users`` at a time."""
+    now = now or datetime.utcnow()
+    with session_factory() as db:
+        user_ids = source_user_ids(db)
+    batches = list(_chunks(user_ids, batch_users or EXPANSION_BATCH_USERS))
+    inserted = failed = 0
+    with ThreadPoolExecutor(max_workers=workers or EXPANSION_WORKERS) as pool:
+        futures = [pool.submit(_expand_batch, session_factory, batch, now, horizon_months) for batch in batches]
+        for future in futures:
+            try:
+                inserted += future.result()
+            except Exception:
+                failed += 1
+    return ExpansionReport(users=len(user_ids), batches=len(batches), failed_batches=failed, inserted=inserted)
+
+
+async def run_periodically(session_factory: Callable[[], Session], interval_seconds: float) -> None:
+    """In-process worker: one ``expand_all`` pass every ``interval_seconds``, in a worker thread."""
+    while True:
+        try:
+            report = await run_in_threadpool(expand_all, session_factory)
+            logger.info("Expansion pass: %s", report._asdict())
+        except Exception:
+            logger.exception("Expansion pass failed")
+        await asyncio.sleep(interval_seconds)
@@ -1,20 +1,77 @@
+import base64
+import binascii
+import csv
+import io
+import json
 from datetime import date, datetime
-from decimal import Decimal, InvalidOperation
-from typing import Iterable, Optional
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from enum import Enum
+from typing import Iterator, NamedTuple, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_, func
+from sqlalchemy import and_, delete, func, insert, or_, select, union_all, update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.models.expense_model import Expense, ExpenseCategory, ExpenseStatus, map_category_label
+from app.core import consistency, etag, serialization
+from app.core.cache import cache_codec, response_cache
+from app.core.config import (
+    EXPENSES_BULK_BATCH_SIZE,
+    EXPENSES_MAX_PAGE_SIZE,
+    EXPENSES_PAGE_SIZE,
+    EXPENSES_STREAM_CHUNK_SIZE,
+    EXPENSES_SUMMARY_BATCH_CHUNK_SIZE,
+)
+from app.core.database import is_replica_session, recent_writes
+from app.models.expense_model import (
+    ChangeOperation,
+    Expense,
+    ExpenseArchive,
+    ExpenseCategory,
+    ExpenseStatus,
+    map_category_label,
+)
 from app.schemas.expense_schema import (
+    BulkItemStatus,
     ExpenseBatchCreate,
     ExpenseBatchResponse,
+    ExpenseBulkItem,
+    ExpenseBulkResult,
+    ExpenseBulkUpdate,
+    ExpenseColumnarBatchCreate,
     ExpenseCreate,
+    ExpenseIdsRequest,
     ExpenseResponse,
     ExpenseSummary,
+    ExpenseSummaryBatchRequest,
+    ExpenseTimeseries,
     ExpenseUpdate,
+    FileFormat,
+    TimeBucket,
+    TimeseriesDimension,
 )
+from app.services import analytics_service, change_feed_service, rollup_service
+from app.services.categorization_service import category_rules
+
+_AMOUNT_QUANTUM = Decimal("0.01")
+_EXPORT_FLUSH_BYTES = 64 * 1024
+
+# Read paths select these columns as tuples and encode them directly, in ExpenseResponse field order.
+_RESPONSE_FIELDS = tuple(getattr(ExpenseResponse, "model_fields", None) or ExpenseResponse.__fields__)
+_RESPONSE_COLUMNS = tuple(getattr(Expense, field) for field in _RESPONSE_FIELDS)
+_ARCHIVE_RESPONSE_COLUMNS = tuple(getattr(ExpenseArchive, field) for field in _RESPONSE_FIELDS)
+# Always selected by the list queries (even when ``fields`` leaves them out): the keyset order.
+_KEYSET_FIELDS = ("id", "transaction_date")
+# Columns whose change moves an expense between monthly rollup keys (or changes its amount).
+_ROLLUP_FIELDS = frozenset(rollup_service._DELTA_FIELDS) - {"user_id"}
+
+
+class EncodedPage(NamedTuple):
+    body: bytes
+    next_cursor: Optional[str]
+
+
+cache_codec.register(EncodedPage, ExpenseSummary, ExpenseTimeseries)
 
 
 def _model_dump(instance, **kwargs):
@@ -113,106 +170,870 @@ def _prepare_category_and_status(data, *, category_label: Optional[str] = None):
     return data
 
 
+def _fields_set(payload) -> set:
+    fields_set = getattr(payload, "model_fields_set", None)
+    return set(fields_set if fields_set is not None else payload.__fields_set__)
+
+
+def _auto_categorize(rows: list[dict]) -> None:
+    """Fill ``category`` of the rows that came without one from their description (OTHERS if no rule matches)."""
+    pending = [row for row in rows if row["category"] is None]
+    if not pending:
+        return
+    for row, category in zip(pending, category_rules.categorize(row.get("description") for row in pending)):
+        row["category"] = category or ExpenseCategory.OTHERS
+
+
 def _expense_to_response(expense: Expense) -> ExpenseResponse:
     return ExpenseResponse.from_orm(expense)
 
 
+def _record_inserts(db: Session, ids: list[int], rows: list[dict]) -> None:
+    changes = zip(ids, (row["user_id"] for row in rows), (row["transaction_date"] for row in rows))
+    change_feed_service.record_changes(db, ChangeOperation.INSERT, changes)
+
+
+def _mark_written(user_id: int) -> None:
+    """After a commit: drop the user's cached reads and pin their next reads to the primary.
+
+    Inside a request this also hands the client a last-write token, which pins the reads
+    served by other workers too.
+    """
+    response_cache.invalidate_user(user_id)
+    recent_writes.mark(user_id)
+    consistency.note_write()
+
+
+def parse_fields(raw: Optional[str]) -> Optional[tuple[str, ...]]:
+    """``fields=a,b`` as ExpenseResponse fields in response order; None means every field."""
+    if raw is None:
+        return None
+    requested = {field.strip() for field in raw.split(",") if field.strip()}
+    if not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debes indicar al menos un campo en 'fields'.",
+        )
+    unknown = sorted(requested.difference(_RESPONSE_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconocidos en 'fields': {', '.join(unknown)}. Válidos: {', '.join(_RESPONSE_FIELDS)}.",
+        )
+    fields = tuple(field for field in _RESPONSE_FIELDS if field in requested)
+    return None if fields == _RESPONSE_FIELDS else fields
+
+
+def _selected_fields(fields: tuple[str, ...]) -> tuple[str, ...]:
+    """The columns a list query selects for ``fields``: those plus the keyset columns."""
+    return tuple(field for field in _RESPONSE_FIELDS if field in fields or field in _KEYSET_FIELDS)
+
+
+def _row_dicts(rows, fields: tuple[str, ...]) -> list[dict]:
+    if fields == _RESPONSE_FIELDS:
+        return serialization.rows_to_dicts(rows, fields)
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def new_expense_row(payload: ExpenseCreate) -> dict:
+    """Validated column values of a single create; raises HTTPException on bad input."""
+    data = _model_dump(payload)
+    uncategorized = "category" not in _fields_set(payload) and not data.get("category_label")
+    data = _prepare_common_fields(data)
+    if uncategorized:
+        data["category"] = None
+        _auto_categorize([data])
+    return data
+
+
 def create_expense(db: Session, payload: ExpenseCreate) -> ExpenseResponse:
-    data = _prepare_common_fields(_model_dump(payload))
+    data = new_expense_row(payload)
+    _whole_seconds_on_mysql(db, [data])
     expense = Expense(**data)
     db.add(expense)
+    db.flush()
+    rollup_service.apply_deltas(db, rollup_service.collect_deltas([expense]))
+    change_feed_service.record_changes(
+        db, ChangeOperation.INSERT, [(expense.id, expense.user_id, expense.transaction_date)]
+    )
     db.commit()
+    _mark_written(data["user_id"])
     db.refresh(expense)
     return _expense_to_response(expense)
 
 
-def create_expenses_batch(db: Session, payload: ExpenseBatchCreate) -> ExpenseBatchResponse:
-    payload_data = _model_dump(payload)
-    items = payload_data.pop("items", [])
-    if not items:
+def _row_amount(amount: Optional[Decimal], unit_amount: Optional[Decimal], quantity: int) -> Decimal:
+    """Amount rule of _prepare_amount_and_quantity for values already validated by the schema."""
+    if amount is None:
+        if unit_amount is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Debe especificar el monto del gasto.")
+        amount = unit_amount * quantity
+    return amount.quantize(_AMOUNT_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+def _chunks(rows: list, size: int) -> Iterator[list]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _supports_multirow_returning(db: Session) -> bool:
+    return bool(db.get_bind().dialect.insert_executemany_returning)
+
+
+def _whole_seconds_on_mysql(db: Session, rows: list[dict]) -> None:
+    """Truncate the DATETIME columns of ``rows`` to whole seconds on MySQL.
+
+    The server would round them instead; truncating here keeps responses and change events
+    equal to the stored row. updated_at is DATETIME(6) and keeps its microseconds.
+    """
+    if db.get_bind().dialect.name == "mysql":
+        for row in rows:
+            for key in ("transaction_date", "created_at"):
+                if row.get(key) is not None:
+                    row[key] = row[key].replace(microsecond=0)
+
+
+def _insert_expense_rows(db: Session, rows: list[dict], batch_size: Optional[int] = None) -> list[int]:
+    """Insert fully populated rows in chunks and return the generated IDs in input order.
+
+    Every chunk is one multi-row INSERT: dialects with RETURNING hand back the IDs, MySQL
+    derives them from LAST_INSERT_ID(). Other dialects fall back to a unit-of-work flush,
+    which still skips the per-row refresh.
+    """
+    batch_size = batch_size or EXPENSES_BULK_BATCH_SIZE
+    mysql = db.get_bind().dialect.name == "mysql"
+    _whole_seconds_on_mysql(db, rows)
+
+    ids: list[int] = []
+    if _supports_multirow_returning(db):
+        table = Expense.__table__
+        # sort_by_parameter_order makes SQLAlchemy hand the IDs back in parameter order (using
+        # a sentinel where the backend gives no ordering guarantee), so they line up with the chunk.
+        stmt = (
+            insert(table)
+            .returning(table.c.id, sort_by_parameter_order=True)
+            .execution_options(insertmanyvalues_page_size=batch_size)
+        )
+        for chunk in _chunks(rows, batch_size):
+            ids.extend(db.execute(stmt, chunk).scalars().all())
+        return ids
+
+    if mysql:
+        table = Expense.__table__
+        for chunk in _chunks(rows, batch_size):
+            # LAST_INSERT_ID() is the ID of the first row of a multi-row INSERT. With
+            # innodb_autoinc_lock_mode 1 or 2 (the defaults) a single statement with a
+            # known row count reserves consecutive values, so with auto_increment_increment=1
+            # the chunk got first_id .. first_id + rowcount - 1 in VALUES order.
+            result = db.execute(insert(table).values(chunk))
+            ids.extend(range(result.lastrowid, result.lastrowid + result.rowcount))
+        return ids
+
+    for chunk in _chunks(rows, batch_size):
+        expenses = [Expense(**row) for row in chunk]
+        db.add_all(expenses)
+        db.flush()
+        ids.extend(expense.id for expense in expenses)
+    return ids
+
+
+def _batch_base_row(payload, items_field: str) -> dict:
+    """Columns shared by every item of a bulk create."""
+    base_data = _prepare_category_and_status(_model_dump(payload, exclude={items_field}))
+    # Without a batch-wide category each item is categorized from its description.
+    categorized = payload.category is not None or bool(payload.category_label)
+    now = datetime.utcnow()
+    return {
+        "user_id": base_data["user_id"],
+        "category": base_data["category"] if categorized else None,
+        "status": base_data.get("status") or ExpenseStatus.POSTED,
+        "transaction_date": base_data.get("transaction_date") or now,
+        "is_recurring": bool(base_data.get("is_recurring")),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _store_batch(db: Session, rows: list[dict], batch_size: Optional[int]) -> list[int]:
+    _auto_categorize(rows)
+    ids = _insert_expense_rows(db, rows, batch_size)
+    rollup_service.apply_deltas(db, rollup_service.collect_deltas(rows))
+    _record_inserts(db, ids, rows)
+    db.commit()
+    _mark_written(rows[0]["user_id"])
+    return ids
+
+
+def _batch_rows(payload: ExpenseBatchCreate) -> list[dict]:
+    if not payload.items:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Debes enviar al menos un gasto en 'items'.",
         )
-    base_data = _prepare_category_and_status(payload_data)
-    created: list[Expense] = []
-    total_amount = Decimal("0")
-
-    for item in items:
-        item_data = _model_dump(item)
-        expense_data = {
-            **base_data,
-            "description": item_data.get("description"),
-            "amount": item_data.get("amount"),
-            "unit_amount": item_data.get("unit_amount"),
-            "quantity": item_data.get("quantity"),
-            "installments": item_data.get("installments"),
-            "payment_method": item_data.get("payment_method"),
+    base_row = _batch_base_row(payload, "items")
+    return [
+        {
+            **base_row,
+            "description": item.description,
+            "amount": _row_amount(item.amount, item.unit_amount, item.quantity),
+            "quantity": item.quantity,
+            "installments": item.installments,
+            "payment_method": item.payment_method,
         }
-        _prepare_amount_and_quantity(expense_data)
-        expense = Expense(**expense_data)
-        db.add(expense)
-        created.append(expense)
+        for item in payload.items
+    ]
 
-    db.commit()
-    for expense in created:
-        db.refresh(expense)
-        total_amount += Decimal(expense.amount)
 
-    responses = [_expense_to_response(expense) for expense in created]
+def _batch_response_json(ids: list[int], rows: list[dict], fields: Optional[tuple[str, ...]]) -> bytes:
+    """ExpenseBatchResponse encoded straight from the stored rows, narrowed to ``fields``."""
+    fields = fields or _RESPONSE_FIELDS
+    created = []
+    for expense_id, row in zip(ids, rows):
+        row["id"] = expense_id
+        created.append({field: row.get(field) for field in fields})
+    total_amount = sum((row["amount"] for row in rows), Decimal("0"))
+    return serialization.dumps({"created": created, "total_amount": total_amount})
+
+
+def create_expenses_batch(
+    db: Session,
+    payload: ExpenseBatchCreate,
+    *,
+    batch_size: Optional[int] = None,
+) -> ExpenseBatchResponse:
+    rows = _batch_rows(payload)
+    ids = _store_batch(db, rows, batch_size)
+
+    responses = [ExpenseResponse(id=expense_id, **row) for expense_id, row in zip(ids, rows)]
+    total_amount = sum((row["amount"] for row in rows), Decimal("0"))
     return ExpenseBatchResponse(created=responses, total_amount=total_amount)
 
 
+def create_expenses_batch_json(
+    db: Session,
+    payload: ExpenseBatchCreate,
+    *,
+    fields: Optional[tuple[str, ...]] = None,
+    batch_size: Optional[int] = None,
+) -> bytes:
+    """``create_expenses_batch`` encoded as JSON without a model per item, narrowed to ``fields``."""
+    rows = _batch_rows(payload)
+    return _batch_response_json(_store_batch(db, rows, batch_size), rows, fields)
+
+
+def create_expenses_columnar_json(
+    db: Session,
+    payload: ExpenseColumnarBatchCreate,
+    *,
+    fields: Optional[tuple[str, ...]] = None,
+    batch_size: Optional[int] = None,
+) -> bytes:
+    """``create_expenses_batch`` for items sent as parallel arrays, checked column by column.
+
+    Neither side builds a model per item: the rows go from the columns to the INSERT, and
+    the response is encoded as ExpenseBatchResponse straight from them.
+    """
+    columns = payload.columns
+    size = len(columns.description)
+    for alias, values in (
+        ("total", columns.amount),
+        ("monto", columns.unit_amount),
+        ("cantidad", columns.quantity),
+        ("cuotas", columns.installments),
+        ("payment_method", columns.payment_method),
+    ):
+        if values is not None and len(values) != size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La columna '{alias}' tiene {len(values)} valores y 'name' tiene {size}.",
+            )
+    missing = [None] * size
+    amounts = columns.amount or missing
+    unit_amounts = columns.unit_amount or missing
+    quantities = columns.quantity or [1] * size
+    for index, (amount, unit_amount) in enumerate(zip(amounts, unit_amounts)):
+        if amount is None and unit_amount is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Debe especificar el monto del gasto (ítem {index}).",
+            )
+
+    base_row = _batch_base_row(payload, "columns")
+    rows = [
+        {
+            **base_row,
+            "description": description,
+            "amount": (amount if amount is not None else unit_amount * quantity).quantize(
+                _AMOUNT_QUANTUM, rounding=ROUND_HALF_UP
+            ),
+            "quantity": quantity,
+            "installments": installments,
+            "payment_method": payment_method,
+        }
+        for description, amount, unit_amount, quantity, installments, payment_method in zip(
+            columns.description,
+            amounts,
+            unit_amounts,
+            quantities,
+            columns.installments or missing,
+            columns.payment_method or missing,
+        )
+    ]
+    return _batch_response_json(_store_batch(db, rows, batch_size), rows, fields)
+
+
+def create_expenses_grouped(db: Session, rows: list[dict]) -> list:
+    """Store single creates queued by the write coalescer with one INSERT and one COMMIT.
+
+    ``rows`` come from ``new_expense_row``. Returns an ExpenseResponse per row, or the
+    exception of a row that could not be stored: when the grouped transaction fails,
+    every row is retried in a transaction of its own so only the bad ones fail.
+    """
+    now = datetime.utcnow()
+    for row in rows:
+        row["amount"] = row["amount"].quantize(_AMOUNT_QUANTUM, rounding=ROUND_HALF_UP)
+        row["created_at"] = row["updated_at"] = now
+    try:
+        ids = _insert_expense_rows(db, rows)
+        rollup_service.apply_deltas(db, rollup_service.collect_deltas(rows))
+        _record_inserts(db, ids, rows)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        if len(rows) == 1:
+            raise
+        return [_create_expense_row(db, row) for row in rows]
+    for user_id in {row["user_id"] for row in rows}:
+        _mark_written(user_id)
+    return [ExpenseResponse(id=expense_id, **row) for expense_id, row in zip(ids, rows)]
+
+
+def _create_expense_row(db: Session, row: dict):
+    try:
+        [expense_id] = _insert_expense_rows(db, [row])
+        rollup_service.apply_deltas(db, rollup_service.collect_deltas([row]))
+        _record_inserts(db, [expense_id], [row])
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        return exc
+    _mark_written(row["user_id"])
+    return ExpenseResponse(id=expense_id, **row)
+
+
 def get_expense(db: Session, expense_id: int, user_id: Optional[int] = None) -> Expense:
     query = db.query(Expense).filter(Expense.id == expense_id)
     if user_id is not None:
         query = query.filter(Expense.user_id == user_id)
     expense = query.first()
     if not expense:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
+        raise _write_not_found(db, expense_id, user_id)
     return expense
 
 
-def list_expenses(
-    db: Session,
+def _cached(db: Session, user_id: int, key: tuple, load):
+    """``response_cache.get_or_load`` that stores only what ``load`` read from the primary.
+
+    A replica may not have replayed the write that bumped the user's version yet; storing
+    its rows under that version would serve them to every reader, the writer included.
+    """
+    return response_cache.get_or_load(user_id, key, load, fill=not is_replica_session(db))
+
+
+def _find_by_id(db: Session, columns: tuple, expense_id: int, user_id: Optional[int]):
+    """First row of ``columns`` (all from expenses or all from expenses_archive) for ``expense_id``."""
+    model = columns[0].class_
+    query = db.query(*columns).filter(model.id == expense_id)
+    if user_id is not None:
+        query = query.filter(model.user_id == user_id)
+    return query.first()
+
+
+def get_expense_json(db: Session, expense_id: int, user_id: Optional[int] = None) -> bytes:
+    """One expense encoded as JSON; cached per owner when ``user_id`` scopes the lookup."""
+
+    def load() -> bytes:
+        row = _find_by_id(db, _RESPONSE_COLUMNS, expense_id, user_id)
+        if row is None:
+            row = _find_by_id(db, _ARCHIVE_RESPONSE_COLUMNS, expense_id, user_id)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
+        return serialization.dumps(dict(zip(_RESPONSE_FIELDS, row)))
+
+    if user_id is None:
+        return load()
+    return _cached(db, user_id, ("get", expense_id), load)
+
+
+def _user_fingerprint(db: Session, user_id: int) -> tuple[int, Optional[datetime]]:
+    """Row count and latest ``updated_at`` of the user's expenses, read from ix_expenses_user_updated.
+
+    Every write sets ``updated_at`` and a delete lowers the count, so any change to the
+    user's rows changes the pair. Cached only in a shared backend: a per-process copy
+    would keep answering 304 after another worker's write.
+    """
+
+    def load() -> tuple[int, Optional[datetime]]:
+        count, latest = db.query(func.count(), func.max(Expense.updated_at)).filter(Expense.user_id == user_id).one()
+        return count, latest
+
+    if not response_cache.shared:
+        return load()
+    return _cached(db, user_id, ("fingerprint",), load)
+
+
+def expenses_etag(db: Session, user_id: int, scope: tuple) -> str:
+    """Weak ETag of a read over the user's expenses; ``scope`` names the endpoint and its parameters."""
+    return etag.weak_etag(*_user_fingerprint(db, user_id), *scope)
+
+
+def expense_etag(db: Session, expense_id: int, user_id: Optional[int] = None) -> str:
+    """Weak ETag of one expense from its ``updated_at``; 404 when it does not exist."""
+
+    def load() -> datetime:
+        row = _find_by_id(db, (Expense.updated_at,), expense_id, user_id)
+        if row is None:
+            row = _find_by_id(db, (ExpenseArchive.updated_at,), expense_id, user_id)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
+        return row.updated_at
+
+    if user_id is None or not response_cache.shared:
+        updated_at = load()
+    else:
+        updated_at = _cached(db, user_id, ("updated_at", expense_id), load)
+    return etag.weak_etag("get", expense_id, updated_at)
+
+
+def _encode_cursor(row) -> str:
+    raw = json.dumps([row.transaction_date.isoformat(), row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        raw_date, expense_id = json.loads(raw)
+        return datetime.fromisoformat(raw_date), int(expense_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.") from exc
+
+
+def _expense_filters(
     *,
     user_id: int,
     category: Optional[ExpenseCategory] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
-) -> Iterable[ExpenseResponse]:
-    query = db.query(Expense).filter(Expense.user_id == user_id)
+    model=Expense,
+) -> list:
+    # Plain comparisons on transaction_date, so MySQL prunes the monthly partitions.
+    filters = [model.user_id == user_id]
     if category:
-        query = query.filter(Expense.category == category)
+        filters.append(model.category == category)
     if date_from:
-        query = query.filter(Expense.transaction_date >= datetime.combine(date_from, datetime.min.time()))
+        filters.append(model.transaction_date >= datetime.combine(date_from, datetime.min.time()))
     if date_to:
-        query = query.filter(Expense.transaction_date <= datetime.combine(date_to, datetime.max.time()))
-    expenses = query.order_by(Expense.transaction_date.desc()).all()
-    return [_expense_to_response(expense) for expense in expenses]
+        filters.append(model.transaction_date <= datetime.combine(date_to, datetime.max.time()))
+    return filters
 
 
-def update_expense(db: Session, expense_id: int, payload: ExpenseUpdate, user_id: Optional[int] = None) -> ExpenseResponse:
-    expense = get_expense(db, expense_id, user_id)
-    updates = _model_dump(payload, exclude_unset=True)
-    category_label = updates.pop("category_label", None)
-    category_value = updates.pop("category", None)
+def _archive_horizon(db: Session, user_id: int) -> Optional[datetime]:
+    """Newest transaction_date among the user's archived expenses; None when nothing is archived."""
+
+    def load() -> Optional[datetime]:
+        return (
+            db.query(func.max(ExpenseArchive.transaction_date)).filter(ExpenseArchive.user_id == user_id).scalar()
+        )
+
+    return _cached(db, user_id, ("archive-horizon",), load)
+
+
+def _reaches_archive(db: Session, user_id: int, date_from: Optional[date]) -> bool:
+    """Whether a read starting at ``date_from`` (None: the beginning) must include expenses_archive."""
+    horizon = _archive_horizon(db, user_id)
+    return horizon is not None and (date_from is None or datetime.combine(date_from, datetime.min.time()) <= horizon)
+
+
+def _union_with_archive(fields: tuple[str, ...], criteria: dict, extra_filters=lambda model: ()):
+    """``fields`` of the rows matching ``criteria`` in expenses and in expenses_archive, as one subquery."""
+    return union_all(
+        *(
+            select(*(getattr(model, field) for field in fields)).where(
+                *_expense_filters(model=model, **criteria), *extra_filters(model)
+            )
+            for model in (Expense, ExpenseArchive)
+        )
+    ).subquery("all_expenses")
+
+
+def _after_cursor(model, cursor_key: Optional[tuple[datetime, int]]) -> list:
+    if cursor_key is None:
+        return []
+    cursor_date, cursor_id = cursor_key
+    return [
+        or_(
+            model.transaction_date < cursor_date,
+            and_(model.transaction_date == cursor_date, model.id < cursor_id),
+        )
+    ]
+
+
+def _keyset_query(
+    db: Session,
+    criteria: dict,
+    cursor: Optional[str],
+    *,
+    limit: Optional[int] = None,
+    archive: bool = False,
+    fields: tuple[str, ...] = _RESPONSE_FIELDS,
+):
+    """Newest-first column query over (transaction_date, id) resuming after ``cursor``.
+
+    With ``archive`` the rows of expenses_archive are merged in; each table then
+    contributes at most ``limit`` rows read in index order before the final sort.
+    Only ``fields`` and the keyset columns are selected.
+    """
+    cursor_key = _decode_cursor(cursor) if cursor else None
+    fields = _selected_fields(fields)
+    if not archive:
+        query = (
+            db.query(*(getattr(Expense, field) for field in fields))
+            .filter(*_expense_filters(**criteria), *_after_cursor(Expense, cursor_key))
+            .order_by(Expense.transaction_date.desc(), Expense.id.desc())
+        )
+        return query.limit(limit) if limit else query
+
+    if limit:
+        branches = [
+            select(
+                select(*(getattr(model, field) for field in fields))
+                .where(*_expense_filters(model=model, **criteria), *_after_cursor(model, cursor_key))
+                .order_by(model.transaction_date.desc(), model.id.desc())
+                .limit(limit)
+                .subquery()
+            )
+            for model in (Expense, ExpenseArchive)
+        ]
+        rows = union_all(*branches).subquery("all_expenses")
+    else:
+        rows = _union_with_archive(fields, criteria, lambda model: _after_cursor(model, cursor_key))
+    query = db.query(rows).order_by(rows.c.transaction_date.desc(), rows.c.id.desc())
+    return query.limit(limit) if limit else query
+
+
+def list_expenses(
+    db: Session,
+    *,
+    user_id: int,
+    category: Optional[ExpenseCategory] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[tuple[str, ...]] = None,
+) -> EncodedPage:
+    """One page encoded as a JSON array (narrowed to ``fields``), plus the cursor of the next page."""
+    limit = min(limit or EXPENSES_PAGE_SIZE, EXPENSES_MAX_PAGE_SIZE)
+    fields = fields or _RESPONSE_FIELDS
+    criteria = {"user_id": user_id, "category": category, "date_from": date_from, "date_to": date_to}
+
+    def load() -> EncodedPage:
+        # One extra row tells us whether another page exists without a COUNT(*).
+        archive = _reaches_archive(db, user_id, date_from)
+        rows = _keyset_query(db, criteria, cursor, limit=limit + 1, archive=archive, fields=fields).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1])
+        return EncodedPage(serialization.dumps(_row_dicts(rows, fields)), next_cursor)
+
+    return _cached(db, user_id, ("list", category, date_from, date_to, limit, cursor, fields), load)
+
+
+def warm_up(db: Session) -> None:
+    """Run the first-page listing query once, uncached, for a user that cannot exist.
+
+    Compiles the hottest statement into the engine's cache and touches the expenses
+    index before a new worker takes traffic.
+    """
+    _keyset_query(db, {"user_id": 0}, None, limit=EXPENSES_PAGE_SIZE + 1).all()
+
+
+def stream_expenses_ndjson(
+    db: Session,
+    *,
+    user_id: int,
+    category: Optional[ExpenseCategory] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[tuple[str, ...]] = None,
+) -> Iterator[bytes]:
+    """Build the query eagerly (so a bad cursor fails before streaming) and return NDJSON chunks.
+
+    Lines are batched up to ``_EXPORT_FLUSH_BYTES`` per chunk, so the compression middleware
+    flushes once per batch rather than once per row.
+    """
+    fields = fields or _RESPONSE_FIELDS
+    criteria = {"user_id": user_id, "category": category, "date_from": date_from, "date_to": date_to}
+    archive = _reaches_archive(db, user_id, date_from)
+    query = _keyset_query(db, criteria, cursor, limit=limit, archive=archive, fields=fields)
+    return _buffered(_ndjson_lines(query.yield_per(EXPENSES_STREAM_CHUNK_SIZE), fields))
+
+
+def _ndjson_lines(rows, fields: tuple[str, ...] = _RESPONSE_FIELDS) -> Iterator[bytes]:
+    if fields == _RESPONSE_FIELDS:
+        for row in rows:
+            yield serialization.dumps(dict(zip(fields, row))) + b"\n"
+        return
+    for row in rows:
+        yield serialization.dumps({field: getattr(row, field) for field in fields}) + b"\n"
+
+
+def export_expenses(
+    db: Session,
+    *,
+    fmt: FileFormat,
+    user_id: int,
+    category: Optional[ExpenseCategory] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """Whole filtered history as CSV or NDJSON chunks read through a server-side cursor.
+
+    Rows are encoded as they arrive and flushed every ``_EXPORT_FLUSH_BYTES``, so memory
+    stays flat and the first chunk leaves after the first batch of rows.
+    """
+    criteria = {"user_id": user_id, "category": category, "date_from": date_from, "date_to": date_to}
+    archive = _reaches_archive(db, user_id, date_from)
+    rows = _keyset_query(db, criteria, None, archive=archive).yield_per(EXPENSES_STREAM_CHUNK_SIZE)
+    chunks = _csv_chunks(rows) if fmt == FileFormat.CSV else _buffered(_ndjson_lines(rows))
+    return serialization.gzip_stream(chunks) if compress else chunks
+
+
+def _buffered(lines: Iterator[bytes]) -> Iterator[bytes]:
+    buffer: list[bytes] = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= _EXPORT_FLUSH_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(rows) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(_RESPONSE_FIELDS)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= _EXPORT_FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _id_filters(ids: list[int], user_id: Optional[int]) -> list:
+    filters = [Expense.id.in_(ids)]
+    if user_id is not None:
+        filters.append(Expense.user_id == user_id)
+    return filters
+
+
+def _dialect_returning(db: Session, operation: str) -> bool:
+    """Whether UPDATE/DELETE ... RETURNING is available (SQLite 3.35+, PostgreSQL, MariaDB for DELETE)."""
+    return bool(getattr(db.get_bind().dialect, f"{operation}_returning", False))
+
+
+def _update_values(db: Session, payload: ExpenseUpdate) -> dict:
+    """Column values of a PATCH payload; empty when the payload changes nothing."""
+    values = _model_dump(payload, exclude_unset=True)
+    category_label = values.pop("category_label", None)
+    category_value = values.pop("category", None)
     if category_value is not None or category_label:
-        setattr(expense, "category", _resolve_category(category_value, category_label))
+        values["category"] = _resolve_category(category_value, category_label)
+    if "status" in values:
+        values["status"] = _ensure_enum(values["status"], ExpenseStatus)
+    if values.get("amount") is not None:
+        values["amount"] = values["amount"].quantize(_AMOUNT_QUANTUM, rounding=ROUND_HALF_UP)
+    if not values:
+        return values
+
+    values["updated_at"] = datetime.utcnow()
+    if db.get_bind().dialect.name == "mysql" and values.get("transaction_date") is not None:
+        values["transaction_date"] = values["transaction_date"].replace(microsecond=0)
+    return values
+
+
+def _update_rows(db: Session, ids: list[int], values: dict, user_id: Optional[int]) -> list[dict]:
+    """Apply the same ``values`` to every matching expense with one UPDATE; return the new rows.
+
+    Without RETURNING, or when rollup keys change and the previous values are needed for
+    the negative deltas, the rows are read (and locked) first and the new values derived
+    from the constant SET clause, so the response never needs a second read.
+    """
+    table = Expense.__table__
+    filters = _id_filters(ids, user_id)
+    moves_rollups = bool(_ROLLUP_FIELDS & values.keys())
+    if not moves_rollups and _dialect_returning(db, "update"):
+        stmt = update(table).where(*filters).values(values).returning(*_RESPONSE_COLUMNS)
+        new_rows = serialization.rows_to_dicts(db.execute(stmt).all(), _RESPONSE_FIELDS)
+    else:
+        old_rows = serialization.rows_to_dicts(
+            db.execute(select(*_RESPONSE_COLUMNS).where(*filters).with_for_update()).all(),
+            _RESPONSE_FIELDS,
+        )
+        if not old_rows:
+            return []
+        # The dates are known now: bounding them lets MySQL prune partitions for the UPDATE.
+        db.execute(
+            update(table)
+            .where(
+                table.c.id.in_([row["id"] for row in old_rows]),
+                table.c.transaction_date.in_(sorted({row["transaction_date"] for row in old_rows})),
+            )
+            .values(values)
+        )
+        new_rows = [{**row, **values} for row in old_rows]
+        if moves_rollups:
+            deltas = rollup_service.collect_deltas(old_rows, sign=-1)
+            rollup_service.apply_deltas(db, rollup_service.collect_deltas(new_rows, deltas=deltas))
+    if "transaction_date" in values:
+        change_feed_service.move_changes(db, [row["id"] for row in new_rows], values["transaction_date"])
+    changes = ((row["id"], row["user_id"], row["transaction_date"]) for row in new_rows)
+    change_feed_service.record_changes(db, ChangeOperation.UPDATE, changes)
+    return new_rows
+
+
+def _delete_rows(db: Session, ids: list[int], user_id: Optional[int]) -> list:
+    """Delete every matching expense with one DELETE and return (id, rollup fields) of each."""
+    table = Expense.__table__
+    filters = _id_filters(ids, user_id)
+    columns = [Expense.id, *(getattr(Expense, field) for field in rollup_service._DELTA_FIELDS)]
+    if _dialect_returning(db, "delete"):
+        rows = db.execute(delete(table).where(*filters).returning(*columns)).all()
+    else:
+        rows = db.execute(select(*columns).where(*filters).with_for_update()).all()
+        if rows:
+            db.execute(
+                delete(table).where(
+                    table.c.id.in_([row.id for row in rows]),
+                    table.c.transaction_date.in_(sorted({row.transaction_date for row in rows})),
+                )
+            )
+    if rows:
+        rollup_service.apply_deltas(db, rollup_service.collect_deltas(rows, sign=-1))
+        changes = ((row.id, row.user_id, row.transaction_date) for row in rows)
+        change_feed_service.record_changes(db, ChangeOperation.DELETE, changes)
+    return rows
+
+
+def _write_not_found(db: Session, expense_id: int, user_id: Optional[int]) -> HTTPException:
+    """404 for a write that matched no row in expenses.
 
-    for field, value in updates.items():
-        if field == "status":
-            value = _ensure_enum(value, ExpenseStatus)
-        setattr(expense, field, value)
+    Archived expenses are read-only: every write path (single, bulk, import, expansion)
+    targets ``expenses`` only, and the rollup deltas, change events and the cached
+    archive horizon of the reads are all kept from there. They get the same 404 as an
+    unknown id, with a detail that says why.
+    """
+    if _find_by_id(db, (ExpenseArchive.id,), expense_id, user_id) is not None:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense is archived and read-only")
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
+
+
+def update_expense(db: Session, expense_id: int, payload: ExpenseUpdate, user_id: Optional[int] = None) -> ExpenseResponse:
+    values = _update_values(db, payload)
+    if not values:
+        return _expense_to_response(get_expense(db, expense_id, user_id))
+    rows = _update_rows(db, [expense_id], values, user_id)
+    if not rows:
+        raise _write_not_found(db, expense_id, user_id)
     db.commit()
-    db.refresh(expense)
-    return _expense_to_response(expense)
+    _mark_written(rows[0]["user_id"])
+    return ExpenseResponse(**rows[0])
 
 
 def delete_expense(db: Session, expense_id: int, user_id: Optional[int] = None) -> None:
-    expense = get_expense(db, expense_id, user_id)
-    db.delete(expense)
+    rows = _delete_rows(db, [expense_id], user_id)
+    if not rows:
+        raise _write_not_found(db, expense_id, user_id)
+    db.commit()
+    _mark_written(rows[0].user_id)
+
+
+def batch_get_expenses_json(db: Session, payload: ExpenseIdsRequest) -> bytes:
+    """The requested expenses of ``payload.user_id`` in one query, encoded as ExpenseBatchGet."""
+    ids = list(dict.fromkeys(payload.ids))
+
+    def load() -> bytes:
+        rows = db.query(*_RESPONSE_COLUMNS).filter(*_id_filters(ids, payload.user_id)).all()
+        by_id = {row.id: row for row in rows}
+        if len(by_id) < len(ids):
+            unseen = [expense_id for expense_id in ids if expense_id not in by_id]
+            archived = db.query(*_ARCHIVE_RESPONSE_COLUMNS).filter(
+                ExpenseArchive.id.in_(unseen), ExpenseArchive.user_id == payload.user_id
+            )
+            by_id.update((row.id, row) for row in archived)
+        found = [by_id[expense_id] for expense_id in ids if expense_id in by_id]
+        missing = [expense_id for expense_id in ids if expense_id not in by_id]
+        return serialization.dumps({"found": serialization.rows_to_dicts(found, _RESPONSE_FIELDS), "missing": missing})
+
+    return _cached(db, payload.user_id, ("batch-get", tuple(ids)), load)
+
+
+def _bulk_result(ids: list[int], done: dict, done_status: BulkItemStatus) -> ExpenseBulkResult:
+    return ExpenseBulkResult(
+        matched=len(done),
+        results=[
+            ExpenseBulkItem(id=expense_id, status=done_status, expense=done[expense_id])
+            if expense_id in done
+            else ExpenseBulkItem(id=expense_id, status=BulkItemStatus.NOT_FOUND)
+            for expense_id in ids
+        ],
+    )
+
+
+def update_expenses_bulk(db: Session, payload: ExpenseBulkUpdate) -> ExpenseBulkResult:
+    ids = list(dict.fromkeys(payload.ids))
+    values = _update_values(db, payload.changes)
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debes indicar al menos un campo a modificar en 'changes'.",
+        )
+    rows = _update_rows(db, ids, values, payload.user_id)
     db.commit()
+    if rows:
+        _mark_written(payload.user_id)
+    return _bulk_result(ids, {row["id"]: ExpenseResponse(**row) for row in rows}, BulkItemStatus.UPDATED)
+
+
+def delete_expenses_bulk(db: Session, payload: ExpenseIdsRequest) -> ExpenseBulkResult:
+    ids = list(dict.fromkeys(payload.ids))
+    rows = _delete_rows(db, ids, payload.user_id)
+    db.commit()
+    if rows:
+        _mark_written(payload.user_id)
+    return _bulk_result(ids, {row.id: None for row in rows}, BulkItemStatus.DELETED)
 
 
 def summarize_by_category(
@@ -222,20 +1043,76 @@ def summarize_by_category(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
 ) -> list[ExpenseSummary]:
-    filters = [Expense.user_id == user_id]
-    if date_from:
-        filters.append(Expense.transaction_date >= datetime.combine(date_from, datetime.min.time()))
-    if date_to:
-        filters.append(Expense.transaction_date <= datetime.combine(date_to, datetime.max.time()))
+    def load() -> list[ExpenseSummary]:
+        totals = rollup_service.summarize_by_category(
+            db,
+            user_id=user_id,
+            date_from=date_from,
+            date_to=date_to,
+            include_archive=_reaches_archive(db, user_id, date_from),
+        )
+        return [ExpenseSummary(category=category, total_amount=total) for category, total in totals]
+
+    return _cached(db, user_id, ("summary", date_from, date_to), load)
+
+
+def summarize_by_category_batch_json(
+    db: Session,
+    payload: ExpenseSummaryBatchRequest,
+    *,
+    chunk_size: Optional[int] = None,
+) -> bytes:
+    """Category totals of many users (for the gateway), one GROUP BY query per chunk of IDs.
 
-    result = (
-        db.query(Expense.category.label("category"), func.sum(Expense.amount).label("total_amount"))
-        .filter(and_(*filters))
-        .group_by(Expense.category)
-        .all()
+    Encoded as ExpenseSummaryBatch: ``{"totals": {"<user_id>": {"<category>": "<total>"}}}``,
+    every requested user present. Not cached: the response cache is versioned per user.
+    """
+    user_ids = list(dict.fromkeys(payload.user_ids))
+    totals: dict[int, dict[ExpenseCategory, Decimal]] = {}
+    for chunk in _chunks(user_ids, chunk_size or EXPENSES_SUMMARY_BATCH_CHUNK_SIZE):
+        totals.update(
+            rollup_service.summarize_by_category_users(
+                db, chunk, date_from=payload.date_from, date_to=payload.date_to
+            )
+        )
+    return serialization.dumps(
+        {
+            "totals": {
+                str(user_id): {category.value: total for category, total in totals.get(user_id, {}).items()}
+                for user_id in user_ids
+            }
+        }
     )
 
-    return [
-        ExpenseSummary(category=row.category, total_amount=row.total_amount or 0)
-        for row in result
-    ]
+
+def summarize_timeseries(
+    db: Session,
+    *,
+    user_id: int,
+    bucket: TimeBucket,
+    group_by: Optional[list[TimeseriesDimension]] = None,
+    category: Optional[ExpenseCategory] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> ExpenseTimeseries:
+    group_by = group_by or []
+
+    def load() -> ExpenseTimeseries:
+        criteria = {"user_id": user_id, "category": category, "date_from": date_from, "date_to": date_to}
+        if _reaches_archive(db, user_id, date_from):
+            fields = ("transaction_date", "amount", "id", *(dimension.value for dimension in group_by))
+            source, filters = _union_with_archive(fields, criteria), []
+        else:
+            source, filters = Expense.__table__, _expense_filters(**criteria)
+        return analytics_service.timeseries(
+            db,
+            bucket=bucket,
+            group_by=group_by,
+            filters=filters,
+            source=source,
+            date_from=date_from,
+            date_to=date_to,
+        )
+
+    key = ("timeseries", bucket, tuple(group_by), category, date_from, date_to)
+    return _cached(db, user_id, key, load)
@@ -0,0 +1,349 @@
+"""Streaming import of bank statements (CSV or NDJSON) into expenses.
+
+The body is consumed line by line and rows are inserted in chunks of
+``EXPENSES_IMPORT_CHUNK_SIZE``, each committed on its own, so memory stays bounded
+by one chunk whatever the file size. Invalid rows are reported and skipped; a chunk
+the database rejects is split until the offending rows are found.
+"""
+import codecs
+import csv
+import json
+import re
+from datetime import date, datetime, time, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Iterator, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import EXPENSES_IMPORT_CHUNK_SIZE, EXPENSES_IMPORT_MAX_ERRORS
+from app.models.expense_model import ExpenseStatus, normalize_label
+from app.schemas.expense_schema import ExpenseImportError, ExpenseImportReport, FileFormat
+from app.services import rollup_service
+from app.services.expense_service import (
+    _AMOUNT_QUANTUM,
+    _auto_categorize,
+    _insert_expense_rows,
+    _mark_written,
+    _prepare_amount_and_quantity,
+    _prepare_category_and_status,
+    _record_inserts,
+)
+
+# Normalized column name (see normalize_label) -> expense field. Includes the
+# aliases of ExpenseItemPayload and usual Spanish bank statement headers.
+_COLUMN_ALIASES = {
+    "description": "description",
+    "descripcion": "description",
+    "name": "description",
+    "nombre": "description",
+    "detalle": "description",
+    "glosa": "description",
+    "amount": "amount",
+    "total": "amount",
+    "cargo": "amount",
+    "monto": "unit_amount",
+    "unit_amount": "unit_amount",
+    "quantity": "quantity",
+    "cantidad": "quantity",
+    "installments": "installments",
+    "cuotas": "installments",
+    "payment_method": "payment_method",
+    "medio de pago": "payment_method",
+    "medio_pago": "payment_method",
+    "transaction_date": "transaction_date",
+    "fecha": "transaction_date",
+    "date": "transaction_date",
+    "category": "category",
+    "category_label": "category_label",
+    "categoria": "category_label",
+    "status": "status",
+    "estado": "status",
+    "is_recurring": "is_recurring",
+    "recurrente": "is_recurring",
+}
+
+_MAX_LENGTHS = {"description": 255, "payment_method": 50}
+_TEXT_FIELDS = ("category", "category_label", "status")
+# expenses.amount is NUMERIC(12, 2) and quantity/installments are INTEGER: values past
+# these bounds would fail the whole chunk (or be truncated by a permissive server).
+_MAX_AMOUNT = Decimal("1e10")
+_MAX_INTEGER = 2**31 - 1
+_TRUE_VALUES = {"1", "true", "si", "yes", "x"}
+_THOUSANDS_ONLY = re.compile(r"^-?\d{1,3}(\.\d{3})+$")
+_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d/%m/%Y %H:%M", "%d-%m-%Y %H:%M")
+# A line longer than this is cut so a file without newlines cannot be buffered whole.
+_MAX_LINE_CHARS = 1 << 20
+_CSV_DELIMITERS = ",;\t|"
+
+
+class RowError(ValueError):
+    pass
+
+
+def format_from_content_type(content_type: Optional[str]) -> FileFormat:
+    if content_type and ("ndjson" in content_type or "jsonl" in content_type or "json" in content_type):
+        return FileFormat.NDJSON
+    return FileFormat.CSV
+
+
+def iter_text_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode a byte stream (UTF-8, optional BOM) into lines that keep their line endings.
+
+    Only "\n" ends a line: str.splitlines would also split on "\r", U+2028, "\x0c" and
+    the like inside quoted CSV fields and JSON strings, and on a "\r\n" cut between two
+    chunks. A "\r" stays with the rest of its line, so "\r\n" files come out whole.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+        if len(pending) > _MAX_LINE_CHARS:
+            yield pending
+            pending = ""
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _iter_csv_records(lines: Iterator[str]) -> Iterator[tuple[int, object]]:
+    header = next(lines, None)
+    if header is None:
+        return
+    delimiter = max(_CSV_DELIMITERS, key=header.count)
+    reader = csv.reader(_prepend(header, lines), delimiter=delimiter)
+    columns = [_COLUMN_ALIASES.get(normalize_label(name)) for name in next(reader)]
+    if not any(columns):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La cabecera del CSV no tiene columnas reconocidas.",
+        )
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            # The reader resumes on the next line, so one malformed row does not end the import.
+            yield reader.line_num, RowError(f"CSV inválido: {exc}")
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        record = {field: value for field, value in zip(columns, values) if field and value.strip()}
+        yield reader.line_num, record
+
+
+def _iter_ndjson_records(lines: Iterator[str]) -> Iterator[tuple[int, object]]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError:
+            yield line_number, RowError("JSON inválido.")
+            continue
+        if not isinstance(raw, dict):
+            yield line_number, RowError("Cada línea debe ser un objeto JSON.")
+            continue
+        record = {}
+        for key, value in raw.items():
+            field = _COLUMN_ALIASES.get(normalize_label(str(key)))
+            if field and value is not None and value != "":
+                record[field] = value
+        yield line_number, record
+
+
+def _prepend(first, rest: Iterator) -> Iterator:
+    yield first
+    yield from rest
+
+
+def _parse_decimal(value) -> Decimal:
+    if isinstance(value, (int, float, Decimal)):
+        value = str(value)
+    text = str(value).replace("$", "").replace(" ", "").strip()
+    if "," in text:
+        # Chilean format: 12.345,67
+        text = text.replace(".", "").replace(",", ".")
+    elif _THOUSANDS_ONLY.match(text):
+        # 12.345 is twelve thousand in CLP statements, not a decimal
+        text = text.replace(".", "")
+    number = Decimal(text)
+    if not number.is_finite():
+        raise ValueError(text)
+    return number
+
+
+def _parse_date(value) -> datetime:
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        for fmt in _DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+        raise RowError(f"Fecha inválida: '{text}'.") from None
+    # Stored naive in UTC: an explicit offset is converted, not dropped.
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.replace(tzinfo=None)
+
+
+def _build_row(record: dict, defaults: dict) -> dict:
+    data = {**defaults, **record}
+    # NDJSON values keep their JSON type; only text is accepted where a label is expected.
+    for field in _TEXT_FIELDS:
+        if data.get(field) is not None and not isinstance(data[field], str):
+            raise RowError(f"'{field}' debe ser texto.")
+    try:
+        for key in ("amount", "unit_amount"):
+            if data.get(key) is not None:
+                data[key] = _parse_decimal(data[key])
+        if data.get("installments") is not None:
+            data["installments"] = int(data["installments"])
+    except (ArithmeticError, ValueError, TypeError):
+        raise RowError("Monto o cuotas inválidos.") from None
+    if isinstance(data.get("transaction_date"), str):
+        data["transaction_date"] = _parse_date(data["transaction_date"])
+    elif data.get("transaction_date") is not None and not isinstance(data["transaction_date"], datetime):
+        raise RowError(f"Fecha inválida: '{data['transaction_date']}'.")
+    if isinstance(data.get("is_recurring"), str):
+        data["is_recurring"] = normalize_label(data["is_recurring"]) in _TRUE_VALUES
+
+    uncategorized = data.get("category") is None and not data.get("category_label")
+    try:
+        _prepare_category_and_status(data)
+        _prepare_amount_and_quantity(data)
+    except HTTPException as exc:
+        raise RowError(exc.detail) from None
+    if uncategorized:
+        data["category"] = None  # filled from the description for the whole chunk at once
+
+    if data["amount"] is None or data["amount"] <= 0:
+        raise RowError("El monto debe ser mayor a 0.")
+    if data["amount"] >= _MAX_AMOUNT:
+        raise RowError("El monto supera el máximo permitido (10 dígitos enteros).")
+    if data.get("installments") is not None and data["installments"] < 1:
+        raise RowError("Las cuotas deben ser mayores a 0.")
+    for field in ("quantity", "installments"):
+        if data.get(field) is not None and data[field] > _MAX_INTEGER:
+            raise RowError(f"'{field}' supera el máximo permitido.")
+    for field, max_length in _MAX_LENGTHS.items():
+        if data.get(field) is not None:
+            data[field] = str(data[field])
+            if len(data[field]) > max_length:
+                raise RowError(f"'{field}' supera los {max_length} caracteres.")
+
+    return {
+        "user_id": data["user_id"],
+        "category": data["category"],
+        "description": data.get("description"),
+        "amount": data["amount"].quantize(_AMOUNT_QUANTUM, rounding=ROUND_HALF_UP),
+        "quantity": data["quantity"],
+        "installments": data.get("installments"),
+        "payment_method": data.get("payment_method"),
+        "status": data.get("status") or ExpenseStatus.POSTED,
+        "transaction_date": data.get("transaction_date") or datetime.utcnow(),
+        "is_recurring": bool(data.get("is_recurring")),
+    }
+
+
+class _ImportState:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.total_amount = Decimal("0")
+        self.chunks = 0
+        self.errors: list[ExpenseImportError] = []
+
+    def reject(self, line: int, detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < EXPENSES_IMPORT_MAX_ERRORS:
+            self.errors.append(ExpenseImportError(line=line, detail=detail))
+
+    def report(self) -> ExpenseImportReport:
+        return ExpenseImportReport(
+            imported=self.imported,
+            failed=self.failed,
+            total_amount=self.total_amount,
+            chunks=self.chunks,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+
+def _commit_chunk(db: Session, user_id: int, chunk: list[tuple[int, dict]], state: _ImportState) -> None:
+    """Insert and commit ``chunk``; when the database rejects it, retry each half on its own.
+
+    Bisecting isolates the failing rows in O(bad rows * log(chunk)) statements, so one
+    bad row costs its own line instead of the whole chunk.
+    """
+    now = datetime.utcnow()
+    rows = [{**row, "created_at": now, "updated_at": now} for _, row in chunk]
+    _auto_categorize(rows)
+    try:
+        ids = _insert_expense_rows(db, rows)
+        rollup_service.apply_deltas(db, rollup_service.collect_deltas(rows))
+        _record_inserts(db, ids, rows)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        if len(chunk) == 1:
+            state.reject(chunk[0][0], "La base de datos rechazó esta fila.")
+            return
+        middle = len(chunk) // 2
+        _commit_chunk(db, user_id, chunk[:middle], state)
+        _commit_chunk(db, user_id, chunk[middle:], state)
+        return
+    _mark_written(user_id)
+    state.imported += len(rows)
+    state.total_amount += sum((row["amount"] for row in rows), Decimal("0"))
+    state.chunks += 1
+
+
+def import_expenses(
+    db: Session,
+    body: Iterable[bytes],
+    *,
+    user_id: int,
+    fmt: FileFormat,
+    category_label: Optional[str] = None,
+    transaction_date: Optional[date] = None,
+    chunk_size: Optional[int] = None,
+) -> ExpenseImportReport:
+    """Parse ``body`` and insert its rows for ``user_id``, committing every ``chunk_size`` rows.
+
+    ``category_label`` and ``transaction_date`` apply to rows that do not carry their own.
+    """
+    chunk_size = chunk_size or EXPENSES_IMPORT_CHUNK_SIZE
+    defaults = {"user_id": user_id}
+    if category_label:
+        defaults["category_label"] = category_label
+    if transaction_date is not None:
+        defaults["transaction_date"] = datetime.combine(transaction_date, time.min)
+
+    lines = iter_text_lines(body)
+    records = _iter_csv_records(lines) if fmt == FileFormat.CSV else _iter_ndjson_records(lines)
+    state = _ImportState()
+    chunk: list[tuple[int, dict]] = []
+    for line, record in records:
+        if isinstance(record, RowError):
+            state.reject(line, str(record))
+            continue
+        try:
+            chunk.append((line, _build_row(record, defaults)))
+        except RowError as exc:
+            state.reject(line, str(exc))
+            continue
+        if len(chunk) >= chunk_size:
+            _commit_chunk(db, user_id, chunk, state)
+            chunk = []
+    if chunk:
+        _commit_chunk(db, user_id, chunk, state)
+    return state.report()
@@ -0,0 +1,293 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, delete, extract, func, insert, or_, select, union_all
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.expense_model import Expense, ExpenseArchive, ExpenseCategory, ExpenseMonthlyRollup, ExpenseStatus
+
+_AMOUNT_QUANTUM = Decimal("0.01")
+
+_DELTA_FIELDS = ("user_id", "transaction_date", "category", "status", "amount")
+
+RollupKey = tuple[int, int, ExpenseCategory, ExpenseStatus]
+RollupDeltas = dict[RollupKey, tuple[Decimal, int]]
+
+
+def year_month(value: date) -> int:
+    return value.year * 100 + value.month
+
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _month_end(value: date) -> date:
+    next_month = (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def collect_deltas(rows: Iterable, sign: int = 1, deltas: Optional[RollupDeltas] = None) -> RollupDeltas:
+    """Accumulate (amount, count) changes per rollup key for Expense objects or row dicts."""
+    deltas = {} if deltas is None else deltas
+    for row in rows:
+        values = row if isinstance(row, dict) else {field: getattr(row, field) for field in _DELTA_FIELDS}
+        key = (
+            values["user_id"],
+            year_month(values["transaction_date"]),
+            ExpenseCategory(values["category"]),
+            ExpenseStatus(values["status"]),
+        )
+        amount = Decimal(values["amount"]).quantize(_AMOUNT_QUANTUM, rounding=ROUND_HALF_UP)
+        total, count = deltas.get(key, (Decimal("0"), 0))
+        deltas[key] = (total + sign * amount, count + sign)
+    return deltas
+
+
+def _upsert_statement(db: Session):
+    table = ExpenseMonthlyRollup.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            total_amount=table.c.total_amount + stmt.inserted.total_amount,
+            expense_count=table.c.expense_count + stmt.inserted.expense_count,
+        )
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table)
+        return stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={
+                "total_amount": table.c.total_amount + stmt.excluded.total_amount,
+                "expense_count": table.c.expense_count + stmt.excluded.expense_count,
+            },
+        )
+    raise RuntimeError(f"Monthly rollups are not supported on '{dialect}'.")
+
+
+def apply_deltas(db: Session, deltas: RollupDeltas) -> None:
+    """Add ``deltas`` to the rollup table; must run inside the transaction that changed the rows."""
+    rows = [
+        {
+            "user_id": user_id,
+            "year_month": month,
+            "category": category,
+            "status": expense_status,
+            "total_amount": total,
+            "expense_count": count,
+        }
+        for (user_id, month, category, expense_status), (total, count) in deltas.items()
+        if total or count
+    ]
+    if rows:
+        db.execute(_upsert_statement(db), rows)
+
+
+def _split_range(
+    date_from: Optional[date],
+    date_to: Optional[date],
+) -> tuple[list[tuple[date, date]], Optional[tuple[Optional[int], Optional[int]]]]:
+    """Split a date range into partial edge months (raw scan) and whole months (rollups).
+
+    A reversed range (``date_from`` after ``date_to``) matches nothing and splits into nothing.
+    """
+    if date_from and date_to and date_from > date_to:
+        return [], None
+    raw_ranges: list[tuple[date, date]] = []
+    first_day, last_day = date_from, date_to
+    if date_from and date_from.day != 1:
+        edge_end = _month_end(date_from)
+        if date_to and date_to <= edge_end:
+            return [(date_from, date_to)], None
+        raw_ranges.append((date_from, edge_end))
+        first_day = edge_end + timedelta(days=1)
+    if date_to and date_to != _month_end(date_to):
+        edge_start = _month_start(date_to)
+        raw_ranges.append((edge_start, date_to))
+        last_day = edge_start - timedelta(days=1)
+    if first_day and last_day and first_day > last_day:
+        return raw_ranges, None
+    return raw_ranges, (
+        year_month(first_day) if first_day else None,
+        year_month(last_day) if last_day else None,
+    )
+
+
+def summarize_by_category(
+    db: Session,
+    *,
+    user_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    include_archive: bool = False,
+) -> list[tuple[ExpenseCategory, Decimal]]:
+    """Category totals reading whole months from the rollups and raw rows only for edge months.
+
+    The rollups count archived expenses too; ``include_archive`` adds expenses_archive to
+    the edge-month scans.
+    """
+    raw_ranges, months = _split_range(date_from, date_to)
+    totals: dict[ExpenseCategory, Decimal] = defaultdict(Decimal)
+    models = (Expense, ExpenseArchive) if include_archive else (Expense,)
+
+    for (start, end), model in ((edge, model) for edge in raw_ranges for model in models):
+        rows = (
+            db.query(model.category, func.sum(model.amount))
+            .filter(
+                model.user_id == user_id,
+                model.transaction_date >= datetime.combine(start, datetime.min.time()),
+                model.transaction_date <= datetime.combine(end, datetime.max.time()),
+            )
+            .group_by(model.category)
+            .all()
+        )
+        for category, total in rows:
+            totals[category] += Decimal(total or 0)
+
+    if months is not None:
+        first_month, last_month = months
+        filters = [ExpenseMonthlyRollup.user_id == user_id]
+        if first_month:
+            filters.append(ExpenseMonthlyRollup.year_month >= first_month)
+        if last_month:
+            filters.append(ExpenseMonthlyRollup.year_month <= last_month)
+        rows = (
+            db.query(ExpenseMonthlyRollup.category, func.sum(ExpenseMonthlyRollup.total_amount))
+            .filter(and_(*filters))
+            .group_by(ExpenseMonthlyRollup.category)
+            .having(func.sum(ExpenseMonthlyRollup.expense_count) > 0)
+            .all()
+        )
+        for category, total in rows:
+            totals[category] += Decimal(total or 0)
+
+    return sorted(totals.items(), key=lambda item: list(ExpenseCategory).index(item[0]))
+
+
+def summarize_by_category_users(
+    db: Session,
+    user_ids: list[int],
+    *,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> dict[int, dict[ExpenseCategory, Decimal]]:
+    """``summarize_by_category`` for several users in one ``GROUP BY user_id, category`` query.
+
+    Rollup rows for the whole months and raw rows for the edge months (expenses_archive
+    included) are combined with UNION ALL and summed together. Users without expenses
+    in the range are left out.
+    """
+    raw_ranges, months = _split_range(date_from, date_to)
+    branches = []
+    for model in (Expense, ExpenseArchive) if raw_ranges else ():
+        in_edges = or_(
+            *(
+                and_(
+                    model.transaction_date >= datetime.combine(start, datetime.min.time()),
+                    model.transaction_date <= datetime.combine(end, datetime.max.time()),
+                )
+                for start, end in raw_ranges
+            )
+        )
+        branches.append(
+            select(model.user_id, model.category, model.amount.label("amount")).where(
+                model.user_id.in_(user_ids), in_edges
+            )
+        )
+    if months is not None:
+        first_month, last_month = months
+        rollup = ExpenseMonthlyRollup
+        filters = [rollup.user_id.in_(user_ids), rollup.expense_count > 0]
+        if first_month:
+            filters.append(rollup.year_month >= first_month)
+        if last_month:
+            filters.append(rollup.year_month <= last_month)
+        branches.append(select(rollup.user_id, rollup.category, rollup.total_amount.label("amount")).where(*filters))
+
+    if not branches:
+        return {}
+    rows = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery("summary_rows")
+    order = {category: index for index, category in enumerate(ExpenseCategory)}
+    totals: dict[int, dict[ExpenseCategory, Decimal]] = {}
+    for user_id, category, total in db.execute(
+        select(rows.c.user_id, rows.c.category, func.sum(rows.c.amount)).group_by(rows.c.user_id, rows.c.category)
+    ):
+        totals.setdefault(user_id, {})[ExpenseCategory(category)] = Decimal(total or 0)
+    return {
+        user_id: dict(sorted(categories.items(), key=lambda item: order[item[0]]))
+        for user_id, categories in totals.items()
+    }
+
+
+def _raw_rollup_select(user_id: Optional[int] = None):
+    """Rollup rows recomputed from expenses and expenses_archive (archived rows stay counted)."""
+    branches = []
+    for model in (Expense, ExpenseArchive):
+        branch = select(model.user_id, model.transaction_date, model.category, model.status, model.amount)
+        branches.append(branch if user_id is None else branch.where(model.user_id == user_id))
+    rows = union_all(*branches).subquery("all_expenses")
+    month = extract("year", rows.c.transaction_date) * 100 + extract("month", rows.c.transaction_date)
+    return select(
+        rows.c.user_id,
+        month.label("year_month"),
+        rows.c.category,
+        rows.c.status,
+        func.sum(rows.c.amount).label("total_amount"),
+        func.count().label("expense_count"),
+    ).group_by(rows.c.user_id, month, rows.c.category, rows.c.status)
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute the rollups (all users or one) from the raw rows; the caller commits."""
+    table = ExpenseMonthlyRollup.__table__
+    clear = delete(table)
+    if user_id is not None:
+        clear = clear.where(table.c.user_id == user_id)
+    db.execute(clear)
+    result = db.execute(
+        insert(table).from_select(
+            ["user_id", "year_month", "category", "status", "total_amount", "expense_count"],
+            _raw_rollup_select(user_id),
+        )
+    )
+    return result.rowcount
+
+
+def find_rollup_mismatches(db: Session, user_id: Optional[int] = None) -> list[dict]:
+    """Compare the rollups against the raw rows and return every key where they disagree."""
+    expected = {
+        (row.user_id, int(row.year_month), ExpenseCategory(row.category), ExpenseStatus(row.status)): (
+            Decimal(row.total_amount).quantize(_AMOUNT_QUANTUM),
+            row.expense_count,
+        )
+        for row in db.execute(_raw_rollup_select(user_id))
+    }
+    query = db.query(ExpenseMonthlyRollup)
+    if user_id is not None:
+        query = query.filter(ExpenseMonthlyRollup.user_id == user_id)
+    actual = {
+        (rollup.user_id, rollup.year_month, rollup.category, rollup.status): (
+            Decimal(rollup.total_amount).quantize(_AMOUNT_QUANTUM),
+            rollup.expense_count,
+        )
+        for rollup in query
+        if rollup.expense_count or rollup.total_amount
+    }
+    mismatches = []
+    keys = sorted(expected.keys() | actual.keys(), key=lambda key: (key[0], key[1], key[2].value, key[3].value))
+    for key in keys:
+        if expected.get(key) != actual.get(key):
+            mismatches.append(
+                {
+                    "user_id": key[0],
+                    "year_month": key[1],
+                    "category": key[2].value,
+                    "status": key[3].value,
+                    "expected": expected.get(key, (Decimal("0"), 0)),
+                    "actual": actual.get(key, (Decimal("0"), 0)),
+                }
+            )
+    return mismatches
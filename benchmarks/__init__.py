@@ -0,0 +1 @@
+"""Performance checks and benchmarks for the expense service (run with ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,120 @@
+"""Load test comparing the threadpool (DB_ASYNC=0) and AsyncSession (DB_ASYNC=1) modes.
+
+    python -m benchmarks.async_vs_sync [--requests 2000] [--concurrency 200]
+
+DB_ASYNC is read at import time, so each mode runs in its own subprocess against the
+same database: a temporary SQLite file, or whatever ``DATABASE_URL`` points to.
+Requests are driven in-process through ``httpx.ASGITransport``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.stats import latency_summary
+
+
+async def _drive(app, total: int, concurrency: int, users: int) -> dict:
+    import httpx
+
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    rng = random.Random(42)
+    paths = [
+        ("/expenses/", {"user_id": rng.randint(1, users), "limit": 50})
+        if index % 2
+        else ("/expenses/summary/by-category", {"user_id": rng.randint(1, users)})
+        for index in range(total)
+    ]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def one(path: str, params: dict) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, params=params)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(path, params) for path, params in paths))
+        elapsed = time.perf_counter() - started
+
+    return {"concurrency": concurrency, **latency_summary(latencies, elapsed)}
+
+
+def _worker(args) -> None:
+    from app.core import database
+    from app.main import app
+    from app.schemas.expense_schema import ExpenseBatchCreate
+    from app.services import expense_service
+
+    database.engine.echo = False
+    if database.async_engine is not None:
+        database.async_engine.echo = False
+
+    if args.seed:
+        database.Base.metadata.create_all(bind=database.engine)
+        with database.SessionLocal() as db:
+            for user_id in range(1, args.users + 1):
+                items = [{"name": f"gasto {index}", "monto": 1000 + index} for index in range(args.rows_per_user)]
+                expense_service.create_expenses_batch(db, ExpenseBatchCreate(user_id=user_id, items=items))
+
+    result = asyncio.run(_drive(app, args.requests, args.concurrency, args.users))
+    result["mode"] = "async" if database.async_engine is not None else "sync"
+    print(json.dumps(result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows-per-user", type=int, default=200)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args)
+        return
+
+    env = dict(os.environ)
+    env.setdefault("CACHE_BACKEND", "none")
+    tmpdir = None
+    if "DATABASE_URL" not in env:
+        tmpdir = tempfile.TemporaryDirectory()
+        env["DATABASE_URL"] = f"sqlite:///{tmpdir.name}/bench.db"
+
+    forwarded = [
+        f"--requests={args.requests}",
+        f"--concurrency={args.concurrency}",
+        f"--users={args.users}",
+        f"--rows-per-user={args.rows_per_user}",
+    ]
+    results = []
+    for index, mode in enumerate(("0", "1")):
+        command = [sys.executable, "-m", "benchmarks.async_vs_sync", "--worker", *forwarded]
+        if index == 0:
+            command.append("--seed")
+        output = subprocess.run(
+            command, env={**env, "DB_ASYNC": mode}, check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for result in results:
+        print(
+            f"{result['mode']:<6} rps={result['throughput_rps']:<8} p50={result['p50_ms']}ms "
+            f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms"
+        )
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
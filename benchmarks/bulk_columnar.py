@@ -0,0 +1,87 @@
+"""Row-wise (``POST /expenses/bulk``) vs columnar (``POST /expenses/bulk/columns``) bulk creates.
+
+    python -m benchmarks.bulk_columnar [--sizes 1000 10000 100000]
+
+Each run decodes the same items as JSON and validates them like FastAPI does
+(``json.loads`` + model validation), then stores them through the service on an
+in-memory SQLite database and encodes the response. Reports validation time, total
+time and items/s.
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import sqlite_session_factory
+from benchmarks.seed import DESCRIPTIONS
+from app.schemas.expense_schema import ExpenseBatchCreate, ExpenseColumnarBatchCreate
+from app.services import expense_service
+
+
+def _items(size: int) -> list[dict]:
+    rng = random.Random(42)
+    merchants = [merchant for names in DESCRIPTIONS.values() for merchant in names]
+    return [
+        {
+            "name": rng.choice(merchants),
+            "monto": f"{rng.randint(500, 90000)}.{rng.randint(0, 99):02d}",
+            "cantidad": 1 + index % 3,
+            "cuotas": rng.choice([None, None, 3, 6]),
+        }
+        for index in range(size)
+    ]
+
+
+def _bodies(size: int) -> dict[str, bytes]:
+    items = _items(size)
+    columns = {key: [item[key] for item in items] for key in items[0]}
+    return {
+        "rows": json.dumps({"user_id": 1, "items": items}).encode(),
+        "columns": json.dumps({"user_id": 1, "columns": columns}).encode(),
+    }
+
+
+def _validate(model, data):
+    validate = getattr(model, "model_validate", None) or model.parse_obj
+    return validate(data)
+
+
+def _rows(db, payload) -> bytes:
+    response = expense_service.create_expenses_batch(db, payload)
+    dump = getattr(response, "model_dump_json", None) or response.json
+    return dump().encode()
+
+
+def _run(label: str, model, create, body: bytes, size: int) -> None:
+    _, session_factory = sqlite_session_factory()
+    started = time.perf_counter()
+    payload = _validate(model, json.loads(body))
+    validated = time.perf_counter()
+    with session_factory() as db:
+        create(db, payload)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<8} items={size:<7} validate_ms={(validated - started) * 1000:9.1f} "
+        f"total_ms={elapsed * 1000:9.1f} items/s={size / elapsed:10,.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bodies = _bodies(size)
+        _run("rows", ExpenseBatchCreate, _rows, bodies["rows"], size)
+        _run(
+            "columns",
+            ExpenseColumnarBatchCreate,
+            expense_service.create_expenses_columnar_json,
+            bodies["columns"],
+            size,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Round trips and wall time of POST /expenses/bulk, per-row refresh vs set-based insert.
+
+    python -m benchmarks.bulk_insert [--sizes 100 2000] [--batch-size 500]
+"""
+import argparse
+import time
+from unittest import mock
+from decimal import Decimal
+
+from benchmarks.common import StatementCounter, sqlite_session_factory
+from app.models.expense_model import Expense
+from app.schemas.expense_schema import ExpenseBatchCreate
+from app.services import expense_service
+
+
+def _payload(size: int) -> ExpenseBatchCreate:
+    return ExpenseBatchCreate(
+        user_id=1,
+        category_label="Supermercado",
+        items=[
+            {"name": f"item {index}", "monto": Decimal("990.50"), "cantidad": 1 + index % 3}
+            for index in range(size)
+        ],
+    )
+
+
+def _per_row_refresh(db, payload: ExpenseBatchCreate) -> None:
+    """The previous implementation: one add per item, then one refresh SELECT per row."""
+    payload_data = expense_service._model_dump(payload)
+    items = payload_data.pop("items")
+    base_data = expense_service._prepare_category_and_status(payload_data)
+    created = []
+    for item in items:
+        expense_data = {**base_data, **expense_service._model_dump(item)}
+        expense_service._prepare_amount_and_quantity(expense_data)
+        expense = Expense(**expense_data)
+        db.add(expense)
+        created.append(expense)
+    db.commit()
+    for expense in created:
+        db.refresh(expense)
+    [expense_service._expense_to_response(expense) for expense in created]
+
+
+def _run(label: str, size: int, call, *, returning: bool = True) -> None:
+    engine, session_factory = sqlite_session_factory()
+    payload = _payload(size)
+    with session_factory() as db, StatementCounter(engine) as counter:
+        started = time.perf_counter()
+        with mock.patch.object(expense_service, "_supports_multirow_returning", return_value=returning):
+            call(db, payload)
+        elapsed = time.perf_counter() - started
+    print(f"{label:<30} items={size:<6} round_trips={counter.count:<6} elapsed_ms={elapsed * 1000:9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 2000])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    def set_based(db, payload):
+        expense_service.create_expenses_batch(db, payload, batch_size=args.batch_size)
+
+    for size in args.sizes:
+        _run("per-row refresh (before)", size, _per_row_refresh)
+        _run("multi-row RETURNING", size, set_based)
+        _run("flush fallback (no RETURNING)", size, set_based, returning=False)
+
+
+if __name__ == "__main__":
+    main()
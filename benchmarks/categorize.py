@@ -0,0 +1,85 @@
+"""Throughput of description auto-categorization over a batch of synthetic descriptions.
+
+    python -m benchmarks.categorize [--rows 100000]
+
+Compares the compiled automaton (``categorization_service.category_rules``) with the
+straightforward alternative of normalizing every description from scratch and testing
+each rule with a regular expression, and checks that both assign the same categories.
+"""
+import argparse
+import random
+import re
+import time
+import unicodedata
+
+from app.models.expense_model import normalize_label
+from app.services import categorization_service
+from app.services.categorization_service import DEFAULT_RULES, PREFIX, category_rules
+from benchmarks.seed import DESCRIPTIONS
+
+_NOISE = ["", " 1234", " Santiago", " Providencia", " COMPRA", " Sucursal 12", " boleta 998877", " web"]
+_PREFIXES = ["", "", "", "COMPRA ", "PAC ", "Pago "]
+
+
+def _descriptions(rows: int, rng: random.Random) -> list[str]:
+    merchants = [merchant for names in DESCRIPTIONS.values() for merchant in names]
+    return [f"{rng.choice(_PREFIXES)}{rng.choice(merchants)}{rng.choice(_NOISE)}" for _ in range(rows)]
+
+
+def _uncached_normalize(value: str) -> str:
+    normalized = unicodedata.normalize("NFKD", value)
+    text = "".join(char for char in normalized if not unicodedata.combining(char)).lower().strip()
+    return " ".join(text.split())
+
+
+def _regex_rules():
+    compiled = []
+    for index, rule in enumerate(DEFAULT_RULES):
+        pattern = re.escape(_uncached_normalize(rule.pattern))
+        regex = re.compile(f"^{pattern}" if rule.match == PREFIX else rf"(?<!\w){pattern}(?!\w)")
+        compiled.append((len(pattern), -index, regex, rule.category))
+    return compiled
+
+
+def _naive(descriptions: list[str]) -> list:
+    rules = _regex_rules()
+    categories = []
+    for description in descriptions:
+        text = _uncached_normalize(description)
+        best = max((rule for rule in rules if rule[2].search(text)), key=lambda rule: rule[:2], default=None)
+        categories.append(best[3] if best else None)
+    return categories
+
+
+def _measure(label: str, fn, descriptions: list[str]):
+    started = time.perf_counter()
+    result = fn(descriptions)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {len(descriptions) / elapsed:12,.0f} rows/s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    descriptions = _descriptions(args.rows, random.Random(args.seed))
+    expected = _measure(f"regex per rule ({len(DEFAULT_RULES)} rules)", _naive, descriptions)
+
+    normalize_label.cache_clear()
+    categorization_service._searchable.cache_clear()
+    category_rules.reload()  # fresh automaton, empty memo
+    cold = _measure("automaton (cold caches)", category_rules.categorize, descriptions)
+    _measure("automaton (warm caches)", category_rules.categorize, descriptions)
+    unique = [f"{text} #{number}" for number, text in enumerate(descriptions)]
+    _measure("automaton, unique texts", category_rules.categorize, unique)
+
+    mismatches = sum(left != right for left, right in zip(expected, cold))
+    matched = sum(category is not None for category in cold)
+    print(f"matched {matched}/{len(descriptions)} descriptions, {mismatches} differ from the regex baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+# Measure the database path, not the response cache.
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.database import Base  # noqa: E402
+
+
+def sqlite_session_factory():
+    """In-memory SQLite database with the service schema, shared by every session."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False)
+
+
+class StatementCounter:
+    """Count DB round trips (one per execute/executemany) issued on ``engine``."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
@@ -0,0 +1,79 @@
+"""Time to first byte, total time and peak memory of GET /expenses/export.
+
+    python -m benchmarks.export [--rows 200000] [--format csv|ndjson] [--gzip]
+
+Seeds ``--rows`` synthetic expenses for one user in a temporary SQLite file and drains
+the export iterator at service level, next to the previous way of pulling a full
+history (every row hydrated and validated through ExpenseResponse before encoding).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Iterator
+
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir.name}/export.db")
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+from app.core import database, serialization  # noqa: E402
+from app.main import app  # noqa: E402,F401  (registers every model)
+from app.models.expense_model import Expense  # noqa: E402
+from app.schemas.expense_schema import ExpenseResponse, FileFormat  # noqa: E402
+from app.services import expense_service  # noqa: E402
+from benchmarks.seed import generate_rows  # noqa: E402
+
+
+def _materialized(db) -> Iterator[bytes]:
+    expenses = db.query(Expense).filter(Expense.user_id == 1).order_by(Expense.transaction_date.desc()).all()
+    items = [ExpenseResponse.from_orm(expense) for expense in expenses]
+    yield serialization.dumps([item.model_dump() if hasattr(item, "model_dump") else item.dict() for item in items])
+
+
+def _measure(label: str, make_chunks) -> None:
+    with database.SessionLocal() as db:
+        tracemalloc.start()
+        started = time.perf_counter()
+        first_byte = None
+        total = 0
+        for chunk in make_chunks(db):
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            total += len(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(
+        f"{label:<22} ttfb_ms={first_byte * 1000:8.1f} total_s={elapsed:6.2f} "
+        f"bytes={total:<11} peak_mib={peak / 2**20:7.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--format", choices=[fmt.value for fmt in FileFormat], default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    database.engine.echo = False
+    database.Base.metadata.create_all(bind=database.engine)
+    rng = random.Random(42)
+    with database.SessionLocal() as db:
+        for start in range(0, args.rows, 50_000):
+            expense_service._insert_expense_rows(db, generate_rows(1, min(50_000, args.rows - start), rng))
+            db.commit()
+
+    fmt = FileFormat(args.format)
+    _measure("materialized (before)", _materialized)
+    _measure(
+        f"export {fmt.value}{' + gzip' if args.gzip else ''}",
+        lambda db: expense_service.export_expenses(db, fmt=fmt, user_id=1, compress=args.gzip),
+    )
+    _tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Single ``POST /expenses/`` under concurrency, with and without write coalescing.
+
+    python -m benchmarks.group_commit [--requests 3000] [--concurrency 200] [--max-batch 100] [--max-wait-ms 5]
+
+WRITE_COALESCING is read at import time, so each mode runs in its own subprocess against
+the same database: a temporary SQLite file, or whatever ``DATABASE_URL`` points to (on
+MySQL, user IDs 1..--users must exist in ``users``). ``DB_ASYNC`` is passed through.
+Reports requests/s, COMMITs/s, rows per COMMIT and p50/p95/p99 latency per mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.stats import latency_summary
+
+
+async def _drive(app, total: int, concurrency: int, users: int) -> dict:
+    import httpx
+
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    rng = random.Random(42)
+    bodies = [
+        {"user_id": rng.randint(1, users), "description": f"Compra {index}", "amount": str(rng.randint(1000, 90000))}
+        for index in range(total)
+    ]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def one(body: dict) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/expenses/", json=body)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(body) for body in bodies))
+        elapsed = time.perf_counter() - started
+
+    return {"concurrency": concurrency, "elapsed": elapsed, **latency_summary(latencies, elapsed)}
+
+
+def _worker(args) -> None:
+    from sqlalchemy import event
+
+    from app.core import database
+    from app.main import app
+
+    database.engine.echo = False
+    engines = [database.engine]
+    if database.async_engine is not None:
+        database.async_engine.echo = False
+        engines.append(database.async_engine.sync_engine)
+    if args.create_tables:
+        database.Base.metadata.create_all(bind=database.engine)
+
+    commits = [0]
+
+    def count_commit(conn) -> None:
+        commits[0] += 1
+
+    for engine in engines:
+        event.listen(engine, "commit", count_commit)
+
+    result = asyncio.run(_drive(app, args.requests, args.concurrency, args.users))
+    elapsed = result.pop("elapsed")
+    result.update(
+        mode="coalesced" if os.environ.get("WRITE_COALESCING") == "1" else "direct",
+        commits=commits[0],
+        commits_per_s=round(commits[0] / elapsed, 1),
+        rows_per_commit=round(args.requests / max(commits[0], 1), 1),
+    )
+    print(json.dumps(result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--create-tables", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args)
+        return
+
+    env = dict(os.environ)
+    env.setdefault("CACHE_BACKEND", "none")
+    env.setdefault("METRICS_ENABLED", "0")
+    env["WRITE_COALESCE_MAX_BATCH"] = str(args.max_batch)
+    env["WRITE_COALESCE_MAX_WAIT_MS"] = str(args.max_wait_ms)
+    tmpdir = None
+    if "DATABASE_URL" not in env:
+        tmpdir = tempfile.TemporaryDirectory()
+        env["DATABASE_URL"] = f"sqlite:///{tmpdir.name}/bench.db"
+
+    forwarded = [f"--requests={args.requests}", f"--concurrency={args.concurrency}", f"--users={args.users}"]
+    results = []
+    for index, mode in enumerate(("0", "1")):
+        command = [sys.executable, "-m", "benchmarks.group_commit", "--worker", *forwarded]
+        if index == 0:
+            command.append("--create-tables")
+        output = subprocess.run(
+            command, env={**env, "WRITE_COALESCING": mode}, check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for result in results:
+        print(
+            f"{result['mode']:<10} rps={result['throughput_rps']:<8} commits/s={result['commits_per_s']:<8} "
+            f"rows/commit={result['rows_per_commit']:<6} p50={result['p50_ms']}ms "
+            f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms"
+        )
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Reproducible load suite: seed synthetic data, drive every endpoint in-process, write JSON results.
+
+    python -m benchmarks.load [--users 20] [--rows-per-user 500] [--requests 300] [--concurrency 20]
+
+Without ``DATABASE_URL`` the run uses a fresh SQLite file; point it to MySQL to measure
+there (user IDs 1..--users must exist in ``users`` because of the foreign key, and
+``--no-seed`` reuses data loaded with ``python -m benchmarks.seed``). Every scenario
+reports throughput, p50/p95/p99 latency and SQL statements per request; results
+are written to ``benchmarks/results/load-<timestamp>.json`` so runs can be compared.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='expenses-bench-')}/bench.db"
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import httpx  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+
+from app.core import database  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.expense_model import Expense  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+from benchmarks.stats import latency_summary  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Statement counter of the request being served; threadpool and run_sync copy the context.
+_statements: contextvars.ContextVar = contextvars.ContextVar("bench_statements", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class Scenario:
+    def __init__(self, name: str, method: str, build, *, ok_status: int = 200):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.ok_status = ok_status
+
+
+def _date_range(rng: random.Random) -> dict:
+    end = date.today() - timedelta(days=rng.randint(0, 120))
+    return {"date_from": (end - timedelta(days=rng.randint(20, 400))).isoformat(), "date_to": end.isoformat()}
+
+
+def _scenarios(ids_by_user: dict[int, list[int]], users: int) -> list[Scenario]:
+    deletable = [(user_id, ids.pop()) for user_id, ids in ids_by_user.items() for _ in range(min(len(ids) // 4, 50))]
+
+    def any_expense(rng):
+        user_id = rng.randint(1, users)
+        return user_id, rng.choice(ids_by_user[user_id])
+
+    def get_one(rng):
+        user_id, expense_id = any_expense(rng)
+        return f"/expenses/{expense_id}", {"user_id": user_id}, None
+
+    def patch_one(rng):
+        user_id, expense_id = any_expense(rng)
+        return f"/expenses/{expense_id}", {"user_id": user_id}, {"amount": str(rng.randint(1000, 90000))}
+
+    def delete_one(rng):
+        user_id, expense_id = deletable.pop() if deletable else any_expense(rng)
+        return f"/expenses/{expense_id}", {"user_id": user_id}, None
+
+    def batch_get(rng):
+        user_id = rng.randint(1, users)
+        return "/expenses/batch-get", None, {"user_id": user_id, "ids": rng.sample(ids_by_user[user_id], 50)}
+
+    def patch_bulk(rng):
+        user_id = rng.randint(1, users)
+        body = {"user_id": user_id, "ids": rng.sample(ids_by_user[user_id], 50), "changes": {"payment_method": "debit"}}
+        return "/expenses/bulk", None, body
+
+    def create_one(rng):
+        body = {
+            "user_id": rng.randint(1, users),
+            "amount": str(rng.randint(1000, 90000)),
+            "category_label": "Supermercado",
+        }
+        return "/expenses/", None, body
+
+    def create_bulk(rng):
+        items = [
+            {"name": f"Ítem {index}", "monto": rng.randint(500, 20000), "cantidad": rng.randint(1, 3)}
+            for index in range(50)
+        ]
+        return "/expenses/bulk", None, {"user_id": rng.randint(1, users), "category": "supermarket", "items": items}
+
+    def user(rng, **params):
+        return {"user_id": rng.randint(1, users), **params}
+
+    return [
+        Scenario("list_page", "GET", lambda rng: ("/expenses/", user(rng, limit=100), None)),
+        Scenario(
+            "list_filtered",
+            "GET",
+            lambda rng: ("/expenses/", user(rng, category="supermarket", **_date_range(rng)), None),
+        ),
+        Scenario("list_stream", "GET", lambda rng: ("/expenses/", user(rng, stream="true"), None)),
+        Scenario("get", "GET", get_one),
+        Scenario("batch_get_50", "POST", batch_get),
+        Scenario("summary_all", "GET", lambda rng: ("/expenses/summary/by-category", user(rng), None)),
+        Scenario(
+            "summary_range",
+            "GET",
+            lambda rng: ("/expenses/summary/by-category", user(rng, **_date_range(rng)), None),
+        ),
+        Scenario(
+            "timeseries",
+            "GET",
+            lambda rng: ("/expenses/summary/timeseries", user(rng, bucket="week", group_by="category"), None),
+        ),
+        Scenario("create", "POST", create_one, ok_status=201),
+        Scenario("bulk_50", "POST", create_bulk, ok_status=201),
+        Scenario("patch", "PATCH", patch_one),
+        Scenario("patch_bulk_50", "PATCH", patch_bulk),
+        Scenario("delete", "DELETE", delete_one, ok_status=204),
+    ]
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict:
+    rng = random.Random(f"{seed}-{scenario.name}")
+    calls = [scenario.build(rng) for _ in range(requests)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    statements: list[int] = []
+    errors = 0
+
+    async def one(path, params, body):
+        nonlocal errors
+        async with semaphore:
+            counter = [0]
+            token = _statements.set(counter)
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, path, params=params, json=body)
+            finally:
+                _statements.reset(token)
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter[0])
+            if response.status_code != scenario.ok_status:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*call) for call in calls))
+    elapsed = time.perf_counter() - started
+    return {
+        **latency_summary(latencies, elapsed),
+        "errors": errors,
+        "sql_statements_per_request": round(sum(statements) / len(statements), 2),
+    }
+
+
+async def _drive(args, ids_by_user) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for scenario in _scenarios(ids_by_user, args.users):
+            if args.only and scenario.name not in args.only:
+                continue
+            results[scenario.name] = await _run_scenario(client, scenario, args.requests, args.concurrency, args.seed)
+            print(f"{scenario.name:<14} {json.dumps(results[scenario.name])}")
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows-per-user", type=int, default=500)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already in DATABASE_URL")
+    parser.add_argument("--only", nargs="*", help="Run only these scenarios")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    engines = [database.engine] + ([database.async_engine.sync_engine] if database.async_engine is not None else [])
+    for engine in engines:
+        engine.echo = False
+        event.listen(engine, "before_cursor_execute", _count_statement)
+
+    if not args.no_seed:
+        database.Base.metadata.create_all(bind=database.engine)
+        seed(
+            database.SessionLocal,
+            users=args.users,
+            rows_per_user=args.rows_per_user,
+            years=args.years,
+            seed_value=args.seed,
+        )
+
+    with database.SessionLocal() as db:
+        ids_by_user: dict[int, list[int]] = {}
+        for expense_id, user_id in db.execute(
+            select(Expense.id, Expense.user_id).where(Expense.user_id <= args.users)
+        ):
+            ids_by_user.setdefault(user_id, []).append(expense_id)
+
+    results = asyncio.run(_drive(args, ids_by_user))
+
+    report = {
+        "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "database": database.engine.dialect.name,
+        "db_async": database.async_engine is not None,
+        "parameters": {
+            key: getattr(args, key) for key in ("users", "rows_per_user", "years", "requests", "concurrency", "seed")
+        },
+        "scenarios": results,
+    }
+    output = args.output or RESULTS_DIR / f"load-{datetime.utcnow():%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
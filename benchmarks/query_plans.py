@@ -0,0 +1,180 @@
+"""Query-plan regression check.
+
+Runs every read query (and the UPDATE/DELETE of the bulk endpoints) issued by
+``expense_service`` against an in-memory SQLite database, asks SQLite for its ``EXPLAIN QUERY PLAN`` and exits with status 1 if
+any of them scans a whole service table instead of searching an index.
+
+It also counts the statements that look ``expenses`` up by id without a
+``transaction_date`` predicate: on MySQL, where migration 006 partitions the table by
+month and the primary key is ``(id, transaction_date)``, each of them probes every
+partition. They are reported, not failed: a client asking for an expense by id cannot
+supply its date.
+
+    python -m benchmarks.query_plans
+
+``tests/test_query_plans.py`` runs the same check as part of the test suite.
+"""
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+# Measure the database path, not the response cache.
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.database import Base  # noqa: E402
+from app.models.expense_model import Expense, ExpenseCategory  # noqa: E402
+from app.schemas.expense_schema import (  # noqa: E402
+    ExpenseBulkUpdate,
+    ExpenseIdsRequest,
+    ExpenseSummaryBatchRequest,
+    ExpenseUpdate,
+    FileFormat,
+    TimeBucket,
+    TimeseriesDimension,
+)
+from app.services import change_feed_service, expansion_service, expense_service, rollup_service  # noqa: E402
+
+
+def _seed(session) -> None:
+    start = datetime(2023, 1, 1)
+    categories = list(ExpenseCategory)
+    session.add_all(
+        Expense(
+            user_id=1 + index % 5,
+            category=categories[index % len(categories)],
+            description=f"gasto {index}",
+            amount=Decimal("1000") + index,
+            transaction_date=start + timedelta(days=index % 400),
+        )
+        for index in range(500)
+    )
+    session.flush()
+    rollup_service.rebuild_rollups(session)
+    session.commit()
+
+
+def _service_calls(session):
+    """Yield (label, callable) pairs covering every query shape of the service."""
+    first_page = expense_service.list_expenses(session, user_id=1, limit=10)
+    yield "list_expenses", lambda: expense_service.list_expenses(session, user_id=1, limit=10)
+    yield "list_expenses cursor", lambda: expense_service.list_expenses(
+        session, user_id=1, limit=10, cursor=first_page.next_cursor
+    )
+    yield "list_expenses category+range", lambda: expense_service.list_expenses(
+        session,
+        user_id=1,
+        category=ExpenseCategory.SUPERMARKET,
+        date_from=date(2023, 2, 1),
+        date_to=date(2023, 6, 30),
+    )
+    yield "list_expenses range", lambda: expense_service.list_expenses(
+        session, user_id=1, date_from=date(2023, 2, 1), date_to=date(2023, 6, 30)
+    )
+    yield "stream_expenses_ndjson", lambda: list(expense_service.stream_expenses_ndjson(session, user_id=1))
+    yield "summarize_by_category", lambda: expense_service.summarize_by_category(session, user_id=1)
+    yield "summarize_by_category range", lambda: expense_service.summarize_by_category(
+        session, user_id=1, date_from=date(2023, 2, 10), date_to=date(2023, 6, 20)
+    )
+    summary_batch = ExpenseSummaryBatchRequest(
+        user_ids=[1, 2, 3], date_from=date(2023, 2, 10), date_to=date(2023, 6, 20)
+    )
+    yield "summarize_by_category_batch_json", lambda: expense_service.summarize_by_category_batch_json(
+        session, summary_batch
+    )
+    yield "list_changes_json", lambda: change_feed_service.list_changes_json(session, since=3)
+    yield "list_changes_json user", lambda: change_feed_service.list_changes_json(session, since=3, user_id=1)
+    yield "get_expense", lambda: expense_service.get_expense(session, 1, 1)
+    yield "export_expenses", lambda: list(expense_service.export_expenses(session, fmt=FileFormat.CSV, user_id=1))
+    yield "summarize_timeseries", lambda: expense_service.summarize_timeseries(
+        session, user_id=1, bucket=TimeBucket.WEEK, group_by=[TimeseriesDimension.CATEGORY]
+    )
+    yield "summarize_timeseries range", lambda: expense_service.summarize_timeseries(
+        session, user_id=1, bucket=TimeBucket.DAY, date_from=date(2023, 2, 10), date_to=date(2023, 6, 20)
+    )
+    yield "expenses_etag", lambda: expense_service.expenses_etag(session, 1, ("list",))
+    yield "expense_etag", lambda: expense_service.expense_etag(session, 1, 1)
+    ids = ExpenseIdsRequest(user_id=1, ids=[1, 6, 11, 2])
+    yield "batch_get_expenses_json", lambda: expense_service.batch_get_expenses_json(session, ids)
+    # Writes last so they do not change what the reads above see.
+    yield "update_expenses_bulk", lambda: expense_service.update_expenses_bulk(
+        session, ExpenseBulkUpdate(user_id=1, ids=ids.ids, changes=ExpenseUpdate(description="editado"))
+    )
+    yield "update_expenses_bulk rollup fields", lambda: expense_service.update_expenses_bulk(
+        session, ExpenseBulkUpdate(user_id=1, ids=ids.ids, changes=ExpenseUpdate(amount=Decimal("10")))
+    )
+    yield "delete_expenses_bulk", lambda: expense_service.delete_expenses_bulk(session, ids)
+    yield "expansion source_user_ids", lambda: expansion_service.source_user_ids(session)
+    yield "expansion expand_users", lambda: expansion_service.expand_users(session, [1, 2])
+
+
+_ID_LOOKUP = re.compile(r"\bexpenses\.id (=|IN)")
+
+
+class PlanResult(NamedTuple):
+    label: str
+    details: list[str]
+    full_scan: bool
+    # Looks expenses up by id alone: every partition is probed on MySQL.
+    all_partitions: bool
+
+
+def check_plans() -> list[PlanResult]:
+    """The plan of every statement issued by ``_service_calls`` on a freshly seeded database."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    _seed(session)
+
+    captured: list[tuple[str, object]] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    scans = [["SCAN", table] for table in Base.metadata.tables]
+    results = []
+    for label, call in _service_calls(session):
+        captured.clear()
+        call()
+        statements = list(captured)
+        for statement, parameters in statements:
+            with engine.connect() as conn:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            details = [row[-1] for row in plan]
+            full_scan = any(detail.split(" ")[:2] in scans for detail in details)
+            # Predicates only: the select list names transaction_date on most reads.
+            predicates = statement.split("FROM", 1)[-1]
+            all_partitions = bool(_ID_LOOKUP.search(predicates)) and "expenses.transaction_date" not in predicates
+            results.append(PlanResult(label, details, full_scan, all_partitions))
+    session.close()
+    engine.dispose()
+    return results
+
+
+def main() -> int:
+    results = check_plans()
+    for result in results:
+        partitions = " (all partitions on MySQL)" if result.all_partitions else ""
+        print(
+            f"[{'FULL SCAN' if result.full_scan else 'ok'}] {result.label}{partitions}: {' | '.join(result.details)}"
+        )
+    probes = sorted({result.label for result in results if result.all_partitions})
+    print(f"{len(probes)} call(s) look expenses up by id alone: {', '.join(probes) or '-'}")
+    failures = sum(result.full_scan for result in results)
+    if failures:
+        print(f"{failures} query(ies) fall back to a full table scan", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
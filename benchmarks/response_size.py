@@ -0,0 +1,87 @@
+"""Bytes per response with and without ``fields=`` and response compression.
+
+    python -m benchmarks.response_size [--rows-per-user 1000] [--limit 100] [--requests 50]
+
+Seeds one user on a fresh SQLite file and drives the app in-process: a page of
+``GET /expenses/``, the whole history with ``stream=true`` and a 100-item
+``POST /expenses/bulk``, each with every field and with the mobile fieldset, sent as
+identity, gzip and brotli (when the ``brotli`` package is installed). Reports bytes per
+request as sent, the saving against the uncompressed full response and the mean time
+per request.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='expenses-bench-')}/bench.db"
+os.environ.setdefault("CACHE_BACKEND", "none")
+os.environ.setdefault("METRICS_ENABLED", "0")
+
+import httpx  # noqa: E402
+
+from app.core import compression, database  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+
+MOBILE_FIELDS = "description,amount,category,transaction_date"
+
+
+def _encodings() -> list[str]:
+    return ["identity", "gzip"] + (["br"] if compression.brotli is not None else [])
+
+
+def _scenarios(limit: int) -> dict:
+    items = [{"name": f"Compra {index}", "monto": str(1000 + index)} for index in range(100)]
+    return {
+        f"list limit={limit}": ("GET", "/expenses/", {"user_id": 1, "limit": limit}, None),
+        "stream": ("GET", "/expenses/", {"user_id": 1, "stream": "true"}, None),
+        "bulk 100": ("POST", "/expenses/bulk", {}, {"user_id": 1, "items": items}),
+    }
+
+
+async def _measure(client, method, path, params, body, encoding, requests) -> tuple[float, float]:
+    # Content-Length is absent on streamed bodies: count the raw bytes received instead.
+    sizes, started = [], time.perf_counter()
+    for _ in range(requests):
+        request = client.build_request(method, path, params=params, json=body, headers={"Accept-Encoding": encoding})
+        response = await client.send(request, stream=True)
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        response.raise_for_status()
+        sizes.append(len(raw))
+    elapsed = time.perf_counter() - started
+    return sum(sizes) / len(sizes), elapsed / requests * 1000
+
+
+async def _run(args) -> None:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name, (method, path, params, body) in _scenarios(args.limit).items():
+            baseline = None
+            for fields in (None, MOBILE_FIELDS):
+                query = {**params, **({"fields": fields} if fields else {})}
+                for encoding in _encodings():
+                    size, ms = await _measure(client, method, path, query, body, encoding, args.requests)
+                    baseline = baseline or size
+                    print(
+                        f"{name:<16} fields={'mobile' if fields else 'all':<7} {encoding:<9} "
+                        f"bytes/req={size:10,.0f} saved={1 - size / baseline:6.1%} ms/req={ms:7.2f}"
+                    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows-per-user", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    database.Base.metadata.create_all(bind=database.engine)
+    seed(database.SessionLocal, users=1, rows_per_user=args.rows_per_user)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Synthetic expense generator used by the load suite.
+
+    python -m benchmarks.seed --users 50 --rows-per-user 2000 [--years 3] [--seed 42]
+
+Seeds the database pointed to by ``DATABASE_URL`` (creating the tables if needed) with
+realistic data: weighted categories, log-normal CLP amounts per category, merchant-like
+descriptions and transaction dates skewed towards recent months. On MySQL the user IDs
+1..--users must already exist in ``users`` because of the foreign key.
+"""
+import argparse
+import math
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.models.expense_model import ExpenseCategory, ExpenseStatus
+
+CATEGORY_WEIGHTS = {
+    ExpenseCategory.SUPERMARKET: 0.35,
+    ExpenseCategory.SERVICE_BASIC: 0.20,
+    ExpenseCategory.CREDIT_CARD: 0.20,
+    ExpenseCategory.BANK_DEBTS: 0.10,
+    ExpenseCategory.OTHERS: 0.15,
+}
+
+# Median amount in CLP; amounts follow a log-normal around it.
+AMOUNT_MEDIANS = {
+    ExpenseCategory.SUPERMARKET: 45_000,
+    ExpenseCategory.SERVICE_BASIC: 30_000,
+    ExpenseCategory.CREDIT_CARD: 120_000,
+    ExpenseCategory.BANK_DEBTS: 250_000,
+    ExpenseCategory.OTHERS: 20_000,
+}
+
+DESCRIPTIONS = {
+    ExpenseCategory.SUPERMARKET: ["Jumbo", "Lider", "Unimarc", "Santa Isabel", "Tottus", "Acuenta"],
+    ExpenseCategory.SERVICE_BASIC: ["Enel", "Aguas Andinas", "Metrogas", "Movistar Hogar", "VTR", "Entel"],
+    ExpenseCategory.CREDIT_CARD: ["Pago tarjeta Visa", "Pago tarjeta Mastercard", "CMR Falabella", "Tarjeta Ripley"],
+    ExpenseCategory.BANK_DEBTS: [
+        "Crédito de consumo",
+        "Dividendo hipotecario",
+        "Línea de crédito",
+        "Crédito automotriz",
+    ],
+    ExpenseCategory.OTHERS: ["Farmacia Cruz Verde", "Copec", "Restaurante", "Cine", "Uber", "Mercado Libre"],
+}
+
+PAYMENT_METHODS = ["débito", "crédito", "efectivo", "transferencia"]
+PAYMENT_WEIGHTS = [0.45, 0.35, 0.10, 0.10]
+
+
+def generate_rows(user_id: int, count: int, rng: random.Random, *, years: int = 3, now=None) -> list[dict]:
+    """Fully populated rows for ``user_id`` ready for ``expense_service._insert_expense_rows``."""
+    now = now or datetime.utcnow()
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+    horizon_days = years * 365
+    rows = []
+    for category in rng.choices(categories, weights, k=count):
+        # Triangular with the mode at 0 days ago: recent months are denser, like real histories.
+        transaction_date = now - timedelta(
+            days=int(rng.triangular(0, horizon_days, 0)),
+            minutes=rng.randint(0, 24 * 60 - 1),
+        )
+        amount = Decimal(round(rng.lognormvariate(math.log(AMOUNT_MEDIANS[category]), 0.6)))
+        installments = None
+        if category == ExpenseCategory.CREDIT_CARD and rng.random() < 0.3:
+            installments = rng.choice([3, 6, 12])
+        rows.append(
+            {
+                "user_id": user_id,
+                "category": category,
+                "description": rng.choice(DESCRIPTIONS[category]),
+                "amount": max(amount, Decimal("1")).quantize(Decimal("0.01")),
+                "quantity": 1 if rng.random() < 0.8 else rng.randint(2, 6),
+                "installments": installments,
+                "payment_method": rng.choices(PAYMENT_METHODS, PAYMENT_WEIGHTS)[0],
+                "status": ExpenseStatus.PLANNED if transaction_date > now - timedelta(days=3) else ExpenseStatus.POSTED,
+                "transaction_date": transaction_date,
+                "is_recurring": category == ExpenseCategory.SERVICE_BASIC,
+                "created_at": transaction_date,
+                "updated_at": transaction_date,
+            }
+        )
+    return rows
+
+
+def seed(session_factory, *, users: int, rows_per_user: int, years: int = 3, seed_value: int = 42) -> int:
+    """Insert the synthetic rows user by user and rebuild their rollups; returns the row count."""
+    from app.services import expense_service, rollup_service
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow().replace(microsecond=0)
+    inserted = 0
+    for user_id in range(1, users + 1):
+        rows = generate_rows(user_id, rows_per_user, rng, years=years, now=now)
+        with session_factory() as db:
+            expense_service._insert_expense_rows(db, rows)
+            rollup_service.rebuild_rollups(db, user_id)
+            db.commit()
+        inserted += len(rows)
+    return inserted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rows-per-user", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.core.database import Base, SessionLocal, engine
+
+    engine.echo = False
+    Base.metadata.create_all(bind=engine)
+    inserted = seed(
+        SessionLocal,
+        users=args.users,
+        rows_per_user=args.rows_per_user,
+        years=args.years,
+        seed_value=args.seed,
+    )
+    print(f"Inserted {inserted} expenses for {args.users} users into {engine.url.render_as_string()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Micro-benchmark of the GET /expenses/ read path: ORM + from_orm vs column tuples + fast encoder.
+
+    python -m benchmarks.serialization [--rows 1000] [--seconds 3]
+
+Reports service-level requests per second for one page of ``--rows`` expenses and the
+peak memory traced (tracemalloc) per row while building that page.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from benchmarks.common import sqlite_session_factory
+from app.core import serialization
+from app.models.expense_model import Expense, ExpenseCategory
+from app.schemas.expense_schema import ExpenseResponse
+from app.services import expense_service
+
+try:
+    from pydantic import TypeAdapter
+except ImportError:  # Pydantic v1
+    TypeAdapter = None
+
+
+def _seed(session_factory, rows: int) -> None:
+    start = datetime(2024, 1, 1)
+    categories = list(ExpenseCategory)
+    with session_factory() as db:
+        db.add_all(
+            Expense(
+                user_id=1,
+                category=categories[index % len(categories)],
+                description=f"Compra número {index}",
+                amount=Decimal("1234.50") + index,
+                quantity=1 + index % 4,
+                payment_method="débito",
+                transaction_date=start + timedelta(minutes=index),
+                created_at=start,
+                updated_at=start,
+            )
+            for index in range(rows)
+        )
+        db.commit()
+
+
+def _from_orm_page(db, rows: int) -> bytes:
+    """The previous read path: hydrate ORM objects, validate each through ExpenseResponse, encode."""
+    expenses = (
+        db.query(Expense)
+        .filter(Expense.user_id == 1)
+        .order_by(Expense.transaction_date.desc(), Expense.id.desc())
+        .limit(rows)
+        .all()
+    )
+    items = [ExpenseResponse.from_orm(expense) for expense in expenses]
+    if TypeAdapter is not None:
+        return TypeAdapter(list[ExpenseResponse]).dump_json(items)
+    return json.dumps([item.dict() for item in items], default=str).encode()
+
+
+def _column_page(db, rows: int) -> bytes:
+    return expense_service.list_expenses(db, user_id=1, limit=rows).body
+
+
+def _measure(label: str, session_factory, call, rows: int, seconds: float) -> None:
+    with session_factory() as db:
+        call(db, rows)  # warm up statement caches
+
+        tracemalloc.start()
+        call(db, rows)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db.expunge_all()
+
+        calls = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            call(db, rows)
+            db.expunge_all()
+            calls += 1
+        elapsed = time.perf_counter() - started
+    print(
+        f"{label:<28} rows={rows:<6} req/s={calls / elapsed:8.1f} "
+        f"peak_kib={peak / 1024:9.1f} peak_bytes_per_row={peak / rows:8.0f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000, help="Page size, at most EXPENSES_MAX_PAGE_SIZE")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    _, session_factory = sqlite_session_factory()
+    _seed(session_factory, args.rows)
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    _measure("from_orm (before)", session_factory, _from_orm_page, args.rows, args.seconds)
+    _measure(f"column tuples + {encoder}", session_factory, _column_page, args.rows, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Cold-start time and per-worker memory of the gunicorn entry point.
+
+    python -m benchmarks.startup [--workers 1,4] [--rows-per-user 1000] [--requests 200]
+
+Seeds a fresh SQLite file (or uses ``DATABASE_URL``), then starts
+``gunicorn -c gunicorn.conf.py app.main:app`` for every worker count with the app
+preloaded in the master and without. For each run it reports the time until the first
+``/health/ready`` answers 200 and until every worker logged its startup complete, the
+memory of the master and of each worker (RSS, PSS and private bytes from
+``/proc/<pid>/smaps_rollup``, Linux only) when idle and after ``--requests`` listing
+requests, and how long the graceful shutdown takes. PSS splits the pages shared after
+the fork between the processes sharing them, so it is the number to add up per host.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='expenses-bench-')}/bench.db"
+
+from app.core import database  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=2) as response:
+            response.read()
+            return response.status
+    except OSError:  # refused, reset or timed out while the workers boot
+        return 0
+
+
+def _children(pid: int) -> list[int]:
+    return [int(child) for child in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()]
+
+
+def _memory_kb(pid: int) -> dict:
+    """RSS, PSS and private (unshared) kB of ``pid``."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _report_memory(label: str, master: int) -> None:
+    workers = [_memory_kb(pid) for pid in _children(master)]
+    master_kb = _memory_kb(master)
+    mean = {key: sum(worker[key] for worker in workers) / len(workers) for key in ("rss", "pss", "private")}
+    total_pss = master_kb["pss"] + sum(worker["pss"] for worker in workers)
+    print(
+        f"  {label:<13} master rss={master_kb['rss'] / 1024:6.1f}MB pss={master_kb['pss'] / 1024:6.1f}MB | "
+        f"per worker rss={mean['rss'] / 1024:6.1f}MB pss={mean['pss'] / 1024:6.1f}MB "
+        f"private={mean['private'] / 1024:6.1f}MB | total pss={total_pss / 1024:6.1f}MB"
+    )
+
+
+def _run(workers: int, preload: bool, requests: int) -> None:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+        "BIND": f"127.0.0.1:{port}",
+        "DB_CREATE_SCHEMA": "0",
+        "METRICS_ENABLED": "0",
+    }
+    with tempfile.TemporaryFile(mode="w+") as log:
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+            cwd=ROOT,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            first_ready = all_ready = None
+            while all_ready is None:
+                if server.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"gunicorn exited with {server.returncode}:\n{log.read()}")
+                if first_ready is None and _get(f"{base}/health/ready") == 200:
+                    first_ready = time.perf_counter() - started
+                log.seek(0)
+                if log.read().count("Application startup complete") >= workers and first_ready is not None:
+                    all_ready = time.perf_counter() - started
+                time.sleep(0.01)
+
+            print(
+                f"workers={workers} preload={'on' if preload else 'off'}: "
+                f"first ready {first_ready * 1000:7.0f}ms, all workers ready {all_ready * 1000:7.0f}ms"
+            )
+            _report_memory("idle", server.pid)
+            for index in range(requests):
+                _get(f"{base}/expenses/?user_id={index % 10 + 1}&limit=100")
+            _report_memory(f"{requests} requests", server.pid)
+        finally:
+            stopping = time.perf_counter()
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+    print(f"  shutdown {(time.perf_counter() - stopping) * 1000:7.0f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,4", help="comma-separated worker counts")
+    parser.add_argument("--rows-per-user", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    if database.engine.dialect.name == "sqlite":
+        database.Base.metadata.create_all(bind=database.engine)
+        seed(database.SessionLocal, users=10, rows_per_user=args.rows_per_user)
+    database.engine.dispose()
+    for workers in (int(value) for value in args.workers.split(",")):
+        for preload in (True, False):
+            _run(workers, preload, args.requests)
+
+
+if __name__ == "__main__":
+    main()
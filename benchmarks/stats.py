@@ -0,0 +1,20 @@
+"""Latency statistics shared by the load benchmarks."""
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def latency_summary(latencies: list[float], elapsed: float) -> dict:
+    """Throughput and p50/p95/p99 (milliseconds) for one scenario."""
+    if not latencies:
+        return {"requests": 0}
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
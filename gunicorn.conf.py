@@ -0,0 +1,45 @@
+"""Gunicorn settings for production: ``gunicorn -c gunicorn.conf.py app.main:app``.
+
+Uvicorn workers serve the ASGI app. With ``preload_app`` the master imports the app
+once and forks the workers from it, so the import cost is paid once and the code pages
+stay shared between workers; ``post_fork`` then gives each worker database pools of its
+own before it serves anything.
+"""
+import gc
+import multiprocessing
+import os
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+# The app reads the count too: its default CACHE_BACKEND depends on whether there is more than one worker.
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = _env_bool("GUNICORN_PRELOAD", True)
+# Seconds a silent worker lives before it is restarted, and a stopping one has to finish its requests
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+
+
+def pre_fork(server, worker):
+    # Objects imported by the master move to the permanent generation: the workers' collections
+    # then skip them instead of writing to their headers and un-sharing the pages they live on.
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Without preload the app is imported after the fork and its engines are already the worker's.
+    if preload_app:
+        from app.core import database
+
+        database.dispose_after_fork()
@@ -0,0 +1,34 @@
+-- Agrega índices compuestos para las consultas de listado y resumen por usuario y fecha
+SET @schema := DATABASE();
+
+-- Índice para listar por usuario ordenando por (transaction_date, id)
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND index_name = 'ix_expenses_user_date_id'
+    ),
+    'SELECT "ix_expenses_user_date_id ya existe";',
+    'ALTER TABLE expenses ADD INDEX ix_expenses_user_date_id (user_id, transaction_date, id);'
+) INTO @add_user_date_id;
+PREPARE stmt FROM @add_user_date_id;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Índice para filtros por usuario + categoría + rango de fechas
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND index_name = 'ix_expenses_user_category_date'
+    ),
+    'SELECT "ix_expenses_user_category_date ya existe";',
+    'ALTER TABLE expenses ADD INDEX ix_expenses_user_category_date (user_id, category, transaction_date);'
+) INTO @add_user_category_date;
+PREPARE stmt FROM @add_user_category_date;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,21 @@
+-- Crea la tabla de acumulados mensuales usada por /expenses/summary/by-category.
+-- Después de aplicarla ejecuta el backfill: python -m app.commands.rollups rebuild
+-- YEAR_MONTH es palabra reservada en MySQL, por eso la columna va siempre entre backticks.
+CREATE TABLE IF NOT EXISTS expense_monthly_rollups (
+    user_id INT NOT NULL,
+    `year_month` INT NOT NULL,
+    category ENUM(
+        'service_basic',
+        'supermarket',
+        'credit_card',
+        'bank_debts',
+        'others'
+    ) NOT NULL,
+    status ENUM(
+        'planned',
+        'posted'
+    ) NOT NULL,
+    total_amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    expense_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, `year_month`, category, status)
+);
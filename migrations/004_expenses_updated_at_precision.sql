@@ -0,0 +1,27 @@
+-- updated_at con microsegundos y sin nulos: es la base del ETag de las lecturas (conteo + max(updated_at))
+SET @schema := DATABASE();
+
+-- Completa las filas antiguas que no tienen updated_at
+UPDATE expenses
+SET updated_at = COALESCE(created_at, transaction_date)
+WHERE updated_at IS NULL;
+
+-- DATETIME(6): dos escrituras dentro del mismo segundo deben cambiar el ETag.
+-- Sin ON UPDATE CURRENT_TIMESTAMP: usa la zona horaria del servidor y el servicio guarda UTC.
+ALTER TABLE expenses MODIFY COLUMN updated_at DATETIME(6) NOT NULL;
+
+-- Índice para calcular count(*) y max(updated_at) por usuario solo desde el índice
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND index_name = 'ix_expenses_user_updated'
+    ),
+    'SELECT "ix_expenses_user_updated ya existe";',
+    'ALTER TABLE expenses ADD INDEX ix_expenses_user_updated (user_id, updated_at);'
+) INTO @add_user_updated;
+PREPARE stmt FROM @add_user_updated;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
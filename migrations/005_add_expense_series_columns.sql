@@ -0,0 +1,65 @@
+-- Columnas e índices para las cuotas y gastos recurrentes generados por python -m app.commands.expand
+SET @schema := DATABASE();
+
+-- parent_id: gasto de origen de la fila generada (sin llave foránea a propósito)
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND column_name = 'parent_id'
+    ),
+    'SELECT "parent_id ya existe";',
+    'ALTER TABLE expenses ADD COLUMN parent_id INT NULL, ADD COLUMN period_index INT NULL;'
+) INTO @add_series_columns;
+PREPARE stmt FROM @add_series_columns;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Una sola fila por serie y período: el proceso puede repetirse sin duplicar
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND index_name = 'uq_expenses_parent_period'
+    ),
+    'SELECT "uq_expenses_parent_period ya existe";',
+    'ALTER TABLE expenses ADD UNIQUE INDEX uq_expenses_parent_period (parent_id, period_index);'
+) INTO @add_parent_period;
+PREPARE stmt FROM @add_parent_period;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Índices para encontrar los gastos recurrentes y en cuotas sin recorrer la tabla
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND index_name = 'ix_expenses_recurring_user'
+    ),
+    'SELECT "ix_expenses_recurring_user ya existe";',
+    'ALTER TABLE expenses ADD INDEX ix_expenses_recurring_user (is_recurring, user_id);'
+) INTO @add_recurring_user;
+PREPARE stmt FROM @add_recurring_user;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND index_name = 'ix_expenses_installments_user'
+    ),
+    'SELECT "ix_expenses_installments_user ya existe";',
+    'ALTER TABLE expenses ADD INDEX ix_expenses_installments_user (installments, user_id);'
+) INTO @add_installments_user;
+PREPARE stmt FROM @add_installments_user;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,123 @@
+-- Particiona expenses por mes de transaction_date y crea expenses_archive para python -m app.commands.archive.
+-- Reescribe la tabla completa: aplícala en una ventana de mantenimiento.
+SET @schema := DATABASE();
+
+-- Tabla de archivo: mismas columnas que expenses, los ids se conservan al mover las filas
+CREATE TABLE IF NOT EXISTS expenses_archive (
+    id INT NOT NULL,
+    user_id INT NOT NULL,
+    category ENUM(
+        'service_basic',
+        'supermarket',
+        'credit_card',
+        'bank_debts',
+        'others'
+    ) NOT NULL,
+    description VARCHAR(255) NULL,
+    amount DECIMAL(12, 2) NOT NULL,
+    quantity INT NOT NULL DEFAULT 1,
+    installments INT NULL,
+    payment_method VARCHAR(50) NULL,
+    status ENUM(
+        'planned',
+        'posted'
+    ) NOT NULL,
+    transaction_date DATETIME NOT NULL,
+    is_recurring TINYINT(1) NULL,
+    parent_id INT NULL,
+    period_index INT NULL,
+    created_at DATETIME NULL,
+    updated_at DATETIME(6) NOT NULL,
+    PRIMARY KEY (id),
+    INDEX ix_expenses_archive_user_date_id (user_id, transaction_date, id)
+);
+
+-- Una tabla particionada no admite llaves foráneas: se elimina la de user_id hacia users
+SELECT IFNULL(
+    (
+        SELECT CONCAT('ALTER TABLE expenses DROP FOREIGN KEY `', constraint_name, '`;')
+        FROM information_schema.referential_constraints
+        WHERE constraint_schema = @schema
+          AND table_name = 'expenses'
+          AND referenced_table_name = 'users'
+        LIMIT 1
+    ),
+    'SELECT "expenses no tiene llave foránea hacia users";'
+) INTO @drop_user_fk;
+PREPARE stmt FROM @drop_user_fk;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Toda llave única debe incluir la columna de partición: la primaria pasa a (id, transaction_date)
+SELECT IF(
+    (
+        SELECT COUNT(*)
+        FROM information_schema.key_column_usage
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND constraint_name = 'PRIMARY'
+    ) > 1,
+    'SELECT "la llave primaria ya incluye transaction_date";',
+    'ALTER TABLE expenses DROP PRIMARY KEY, ADD PRIMARY KEY (id, transaction_date);'
+) INTO @extend_primary_key;
+PREPARE stmt FROM @extend_primary_key;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Lo mismo para (parent_id, period_index): la fecha de cada período la fija su gasto de origen
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND index_name = 'uq_expenses_parent_period'
+          AND column_name = 'transaction_date'
+    ),
+    'SELECT "uq_expenses_parent_period ya incluye transaction_date";',
+    'ALTER TABLE expenses DROP INDEX uq_expenses_parent_period, ADD UNIQUE INDEX uq_expenses_parent_period (parent_id, period_index, transaction_date);'
+) INTO @extend_parent_period;
+PREPARE stmt FROM @extend_parent_period;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Una partición por mes desde el gasto más antiguo hasta 12 meses adelante, más pmax para el resto.
+-- El comando de archivo agrega los meses siguientes y elimina las particiones antiguas que quedan vacías.
+SET SESSION group_concat_max_len = 1048576;
+SET SESSION cte_max_recursion_depth = 100000;
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.partitions
+        WHERE table_schema = @schema
+          AND table_name = 'expenses'
+          AND partition_name IS NOT NULL
+    ),
+    'SELECT "expenses ya está particionada";',
+    (
+        WITH RECURSIVE months (month_start) AS (
+            SELECT CAST(DATE_FORMAT(COALESCE(MIN(transaction_date), CURRENT_DATE), '%Y-%m-01') AS DATE)
+            FROM expenses
+            UNION ALL
+            SELECT month_start + INTERVAL 1 MONTH
+            FROM months
+            WHERE month_start < CAST(DATE_FORMAT(CURRENT_DATE, '%Y-%m-01') AS DATE) + INTERVAL 12 MONTH
+        )
+        SELECT CONCAT(
+            'ALTER TABLE expenses PARTITION BY RANGE COLUMNS (transaction_date) (',
+            GROUP_CONCAT(
+                CONCAT(
+                    'PARTITION p', DATE_FORMAT(month_start, '%Y%m'),
+                    ' VALUES LESS THAN (''', DATE_FORMAT(month_start + INTERVAL 1 MONTH, '%Y-%m-%d'), ''')'
+                )
+                ORDER BY month_start
+                SEPARATOR ', '
+            ),
+            ', PARTITION pmax VALUES LESS THAN (MAXVALUE));'
+        )
+        FROM months
+    )
+) INTO @partition_expenses;
+PREPARE stmt FROM @partition_expenses;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,16 @@
+-- Crea la tabla de eventos del feed de cambios usada por GET /expenses/changes.
+-- Solo registra los cambios posteriores a su creación: los consumidores hacen una carga completa inicial.
+CREATE TABLE IF NOT EXISTS expense_changes (
+    seq BIGINT NOT NULL AUTO_INCREMENT,
+    expense_id INT NOT NULL,
+    user_id INT NOT NULL,
+    operation ENUM(
+        'insert',
+        'update',
+        'delete'
+    ) NOT NULL,
+    changed_at DATETIME(6) NOT NULL,
+    PRIMARY KEY (seq),
+    INDEX ix_expense_changes_user_seq (user_id, seq),
+    INDEX ix_expense_changes_changed_at (changed_at)
+);
@@ -0,0 +1,46 @@
+-- Guarda en cada evento del feed la fecha del gasto: GET /expenses/changes busca el gasto por (id, transaction_date),
+-- la llave primaria completa de expenses particionada, y MySQL lee una sola partición en vez de todas.
+SET @schema := DATABASE();
+
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = @schema
+          AND table_name = 'expense_changes'
+          AND column_name = 'transaction_date'
+    ),
+    'SELECT "expense_changes.transaction_date ya existe";',
+    'ALTER TABLE expense_changes ADD COLUMN transaction_date DATETIME NULL AFTER user_id;'
+) INTO @add_transaction_date;
+PREPARE stmt FROM @add_transaction_date;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Al cambiar la fecha de un gasto se actualizan sus eventos anteriores
+SELECT IF(
+    EXISTS (
+        SELECT 1
+        FROM information_schema.statistics
+        WHERE table_schema = @schema
+          AND table_name = 'expense_changes'
+          AND index_name = 'ix_expense_changes_expense'
+    ),
+    'SELECT "ix_expense_changes_expense ya existe";',
+    'ALTER TABLE expense_changes ADD INDEX ix_expense_changes_expense (expense_id);'
+) INTO @add_expense_index;
+PREPARE stmt FROM @add_expense_index;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Completa los eventos existentes con la fecha actual del gasto, vigente o archivado.
+-- Los de gastos ya eliminados quedan en NULL: el feed los muestra sin estado, igual que antes.
+UPDATE expense_changes
+JOIN expenses ON expenses.id = expense_changes.expense_id
+SET expense_changes.transaction_date = expenses.transaction_date
+WHERE expense_changes.transaction_date IS NULL;
+
+UPDATE expense_changes
+JOIN expenses_archive ON expenses_archive.id = expense_changes.expense_id
+SET expense_changes.transaction_date = expenses_archive.transaction_date
+WHERE expense_changes.transaction_date IS NULL;
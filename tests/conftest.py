@@ -0,0 +1,84 @@
+"""Shared fixtures: the app on a SQLite file recreated for every test.
+
+The engines are created when ``app.core.database`` is imported, so the environment is
+set here, before any test module imports the app. ``DB_ASYNC=1 python -m pytest``
+runs the same suite through the async engine.
+"""
+import os
+import tempfile
+import warnings
+
+_DB_DIR = tempfile.mkdtemp(prefix="expenses-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/primary.db"
+os.environ["REPLICA_DATABASE_URLS"] = ""
+os.environ["CACHE_BACKEND"] = "local"
+os.environ["METRICS_ENABLED"] = "0"
+os.environ["WRITE_COALESCING"] = "0"
+os.environ["EXPANSION_WORKER_ENABLED"] = "0"
+os.environ["EXPENSES_CHANGES_SETTLE_SECONDS"] = "0"
+os.environ.setdefault("DB_ASYNC", "0")
+
+warnings.filterwarnings("ignore", message=".*starlette.testclient.*")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+from app.core import database  # noqa: E402
+from app.core.cache import response_cache  # noqa: E402
+from app.main import app  # noqa: E402
+
+DB_DIR = _DB_DIR
+
+
+@pytest.fixture(autouse=True)
+def fresh_database():
+    database.Base.metadata.drop_all(bind=database.engine)
+    database.Base.metadata.create_all(bind=database.engine)
+    response_cache.backend.clear()
+    database.recent_writes.clear()
+    yield
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """An empty replica with the schema: any row read from it means the read went to the primary."""
+    url = f"sqlite:///{DB_DIR}/replica.db"
+    schema = create_engine(url)
+    database.Base.metadata.drop_all(bind=schema)
+    database.Base.metadata.create_all(bind=schema)
+    schema.dispose()
+    replicas = database.ReplicaSet([url])
+    monkeypatch.setattr(database, "replicas", replicas)
+    yield
+    for replica in replicas.replicas:
+        replica.engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def create_expenses(client, user_id: int, items: list[dict], **batch) -> list[dict]:
+    """Store ``items`` (ExpenseItemPayload aliases) through POST /expenses/bulk; returns the created rows."""
+    response = client.post("/expenses/bulk", json={"user_id": user_id, "items": items, **batch})
+    assert response.status_code == 201, response.text
+    return response.json()["created"]
+
+
+def post_expense(client, user_id: int, amount, transaction_date: str, **fields) -> dict:
+    """Store one expense through POST /expenses/; returns the created row."""
+    payload = {"user_id": user_id, "amount": str(amount), "transaction_date": transaction_date, **fields}
+    response = client.post("/expenses/", json=payload)
+    assert response.status_code == 201, response.text
+    return response.json()
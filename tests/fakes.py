@@ -0,0 +1,72 @@
+"""In-memory stand-ins for external services used by the tests."""
+import time
+from typing import Optional
+
+
+class FakeRedis:
+    """The subset of ``redis.Redis`` used by RedisCacheBackend: get, set(ex=), incr, expire, pipeline.
+
+    Values are stored as bytes like Redis returns them; expiry follows ``time.monotonic``.
+    """
+
+    def __init__(self):
+        self._values: dict[str, bytes] = {}
+        self._expires: dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._values
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._values[key] if self._alive(key) else None
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        self._values[key] = value if isinstance(value, bytes) else str(value).encode()
+        self._expires.pop(key, None)
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        return True
+
+    def incr(self, key: str) -> int:
+        value = int(self._values[key]) + 1 if self._alive(key) else 1
+        self._values[key] = str(value).encode()
+        return value
+
+    def expire(self, key: str, seconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    def ttl(self, key: str) -> int:
+        if not self._alive(key):
+            return -2
+        expires = self._expires.get(key)
+        return -1 if expires is None else round(expires - time.monotonic())
+
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on ``execute``, like a redis-py pipeline."""
+
+    def __init__(self, client: FakeRedis):
+        self._client = client
+        self._commands: list = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
@@ -0,0 +1,124 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.core import database
+from app.models.expense_model import Expense, ExpenseArchive
+from app.services import expense_service, rollup_service
+from app.services.archive_service import ArchiveReport, archive_expenses
+from tests.conftest import post_expense
+
+CUTOFF = datetime(2022, 1, 1)
+
+
+@pytest.fixture
+def archived(client):
+    """Three old expenses of user 1 and one of user 2 archived in batches of two; returns every row by name."""
+    rows = {
+        "march": post_expense(client, 1, "10", "2020-03-05T00:00:00"),
+        "late_march": post_expense(client, 1, "20", "2020-03-20T00:00:00"),
+        "april": post_expense(client, 1, "30", "2020-04-10T00:00:00"),
+        "recent": post_expense(client, 1, "40", "2024-05-10T00:00:00"),
+        "source": post_expense(client, 1, "100", "2020-01-15T00:00:00", installments=3),
+        "other_user": post_expense(client, 2, "50", "2020-02-01T00:00:00"),
+    }
+    report = archive_expenses(database.SessionLocal, cutoff=CUTOFF, batch_size=2)
+    assert report == ArchiveReport(cutoff=CUTOFF, moved=4, batches=2, users=2)
+    return rows
+
+
+def test_archive_moves_old_rows_in_batches_and_keeps_their_ids(archived, db):
+    old = {archived[name]["id"] for name in ("march", "late_march", "april", "other_user")}
+    assert set(db.execute(select(ExpenseArchive.id)).scalars()) == old
+    # Installment sources stay whatever their age: the expansion worker reads them.
+    assert set(db.execute(select(Expense.id)).scalars()) == {archived["recent"]["id"], archived["source"]["id"]}
+
+    again = archive_expenses(database.SessionLocal, cutoff=CUTOFF, batch_size=2)
+    assert again == ArchiveReport(cutoff=CUTOFF, moved=0, batches=0, users=0)
+
+
+@pytest.fixture
+def archive_reads(monkeypatch):
+    """Whether each list, summary and timeseries read added expenses_archive, in order."""
+    calls = []
+    keyset, union = expense_service._keyset_query, expense_service._union_with_archive
+    summarize = rollup_service.summarize_by_category
+
+    def spy_keyset(*args, archive=False, **kwargs):
+        calls.append(("list", archive))
+        return keyset(*args, archive=archive, **kwargs)
+
+    def spy_union(*args, **kwargs):
+        calls.append(("timeseries", True))
+        return union(*args, **kwargs)
+
+    def spy_summarize(*args, include_archive=False, **kwargs):
+        calls.append(("summary", include_archive))
+        return summarize(*args, include_archive=include_archive, **kwargs)
+
+    monkeypatch.setattr(expense_service, "_keyset_query", spy_keyset)
+    monkeypatch.setattr(expense_service, "_union_with_archive", spy_union)
+    monkeypatch.setattr(rollup_service, "summarize_by_category", spy_summarize)
+    return calls
+
+
+def _listed_ids(client, **params):
+    response = client.get("/expenses/", params={"user_id": 1, **params})
+    assert response.status_code == 200, response.text
+    return {row["id"] for row in response.json()}
+
+
+def test_listing_reads_the_archive_only_when_date_from_reaches_it(client, archived, archive_reads):
+    live = {archived["recent"]["id"], archived["source"]["id"]}
+
+    assert _listed_ids(client, date_from="2020-04-11") == {archived["recent"]["id"]}
+
+    # The newest archived expense of the user is on 2020-04-10.
+    assert _listed_ids(client, date_from="2020-04-10") == {archived["april"]["id"], archived["recent"]["id"]}
+    assert _listed_ids(client) == live | {archived[name]["id"] for name in ("march", "late_march", "april")}
+    assert archive_reads == [("list", False), ("list", True), ("list", True)]
+
+
+def test_summary_and_timeseries_read_the_archive_only_when_date_from_reaches_it(client, archived, archive_reads):
+    def summary(date_from):
+        response = client.get("/expenses/summary/by-category", params={"user_id": 1, "date_from": date_from})
+        return sum(Decimal(row["total_amount"]) for row in response.json())
+
+    def counted(date_from):
+        params = {"user_id": 1, "bucket": "month", "date_from": date_from}
+        series = client.get("/expenses/summary/timeseries", params=params).json()["series"]
+        return sum(point["count"] for item in series for point in item["points"])
+
+    assert summary("2020-05-01") == Decimal("40")
+    assert counted("2020-05-01") == 1
+    assert archive_reads == [("summary", False)]
+    archive_reads.clear()
+
+    # March is an edge month scanned row by row, so the archived 2020-03-20 expense must come from the archive.
+    assert summary("2020-03-10") == Decimal("90")
+    assert counted("2020-03-10") == 3
+    assert archive_reads == [("summary", True), ("timeseries", True)]
+
+
+def test_archived_expenses_are_read_only(client, archived):
+    expense_id = archived["april"]["id"]
+    response = client.get(f"/expenses/{expense_id}", params={"user_id": 1})
+    assert response.status_code == 200
+    assert response.json() == archived["april"]
+
+    for response in (
+        client.patch(f"/expenses/{expense_id}", params={"user_id": 1}, json={"amount": "1"}),
+        client.patch(f"/expenses/{expense_id}", params={"user_id": 1}, json={}),
+        client.delete(f"/expenses/{expense_id}", params={"user_id": 1}),
+    ):
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Expense is archived and read-only"
+    # Another user's id stays indistinguishable from an unknown one.
+    assert client.delete(f"/expenses/{expense_id}", params={"user_id": 2}).json()["detail"] == "Expense not found"
+
+    bulk = client.request("DELETE", "/expenses/bulk", json={"user_id": 1, "ids": [expense_id]}).json()
+    assert bulk["matched"] == 0
+    assert [item["status"] for item in bulk["results"]] == ["not_found"]
+    assert client.get(f"/expenses/{expense_id}", params={"user_id": 1}).json() == archived["april"]
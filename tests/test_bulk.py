@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from tests.conftest import create_expenses, post_expense
+
+ITEMS = [
+    {"name": "Luz", "monto": "12000", "cantidad": 1},
+    {"name": "Pan", "monto": "1500", "cantidad": 3},
+    {"name": "Cuota auto", "total": "250000", "cuotas": 12},
+]
+
+
+def test_bulk_create_returns_the_stored_rows_in_order(client):
+    response = client.post(
+        "/expenses/bulk",
+        json={"user_id": 1, "category": "supermarket", "transaction_date": "2024-03-10T12:00:00", "items": ITEMS},
+    )
+    assert response.status_code == 201
+    body = response.json()
+    assert [row["description"] for row in body["created"]] == ["Luz", "Pan", "Cuota auto"]
+    assert [Decimal(row["amount"]) for row in body["created"]] == [Decimal("12000"), Decimal("4500"), Decimal("250000")]
+    assert Decimal(body["total_amount"]) == Decimal("266500")
+    assert len({row["id"] for row in body["created"]}) == 3
+
+    for row in body["created"]:
+        stored = client.get(f"/expenses/{row['id']}", params={"user_id": 1}).json()
+        assert stored == row
+
+
+def test_columnar_bulk_matches_the_item_payload(client):
+    by_items = create_expenses(client, 1, ITEMS, transaction_date="2024-03-10T12:00:00")
+    response = client.post(
+        "/expenses/bulk/columns",
+        json={
+            "user_id": 2,
+            "transaction_date": "2024-03-10T12:00:00",
+            "columns": {
+                "name": ["Luz", "Pan", "Cuota auto"],
+                "monto": ["12000", "1500", None],
+                "total": [None, None, "250000"],
+                "cantidad": [1, 3, 1],
+                "cuotas": [None, None, 12],
+            },
+        },
+    )
+    assert response.status_code == 201
+    by_columns = response.json()["created"]
+    ignored = {"id", "user_id", "created_at", "updated_at"}
+    assert [{k: v for k, v in row.items() if k not in ignored} for row in by_columns] == [
+        {k: v for k, v in row.items() if k not in ignored} for row in by_items
+    ]
+
+
+def test_columnar_bulk_rejects_columns_of_different_length(client):
+    response = client.post(
+        "/expenses/bulk/columns",
+        json={"user_id": 1, "columns": {"name": ["a", "b"], "total": ["1"]}},
+    )
+    assert response.status_code == 400
+
+
+def test_bulk_fields_narrow_the_created_rows(client):
+    response = client.post("/expenses/bulk", params={"fields": "id,amount"}, json={"user_id": 1, "items": ITEMS[:2]})
+    assert [set(row) for row in response.json()["created"]] == [{"id", "amount"}, {"id", "amount"}]
+
+
+def test_bulk_patch_and_delete_report_each_id(client):
+    own = create_expenses(client, 1, ITEMS)
+    foreign = post_expense(client, 2, 10, "2024-01-01T00:00:00")
+    ids = [own[0]["id"], foreign["id"], own[1]["id"], 999_999]
+
+    patched = client.request(
+        "PATCH", "/expenses/bulk", json={"user_id": 1, "ids": ids, "changes": {"description": "editado"}}
+    ).json()
+    assert patched["matched"] == 2
+    assert [(item["id"], item["status"]) for item in patched["results"]] == [
+        (ids[0], "updated"),
+        (ids[1], "not_found"),
+        (ids[2], "updated"),
+        (ids[3], "not_found"),
+    ]
+    assert patched["results"][0]["expense"]["description"] == "editado"
+    assert client.get(f"/expenses/{foreign['id']}").json()["description"] is None
+
+    deleted = client.request("DELETE", "/expenses/bulk", json={"user_id": 1, "ids": ids}).json()
+    assert deleted["matched"] == 2
+    assert [item["status"] for item in deleted["results"]] == ["deleted", "not_found", "deleted", "not_found"]
+    assert client.get(f"/expenses/{own[0]['id']}").status_code == 404
+    assert client.get(f"/expenses/{foreign['id']}").status_code == 200
+
+
+def test_batch_get_keeps_the_requested_order(client):
+    own = create_expenses(client, 1, ITEMS)
+    foreign = post_expense(client, 2, 10, "2024-01-01T00:00:00")
+    ids = [own[2]["id"], foreign["id"], own[0]["id"], 424242]
+    body = client.post("/expenses/batch-get", json={"user_id": 1, "ids": ids}).json()
+    assert [row["id"] for row in body["found"]] == [own[2]["id"], own[0]["id"]]
+    assert body["missing"] == [foreign["id"], 424242]
@@ -0,0 +1,188 @@
+import importlib
+import pickle
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.core import config
+from app.core.cache import JsonCodec, LocalCacheBackend, RedisCacheBackend, cache_codec, response_cache
+from app.models.expense_model import Expense
+from app.schemas.expense_schema import ExpenseSummary
+from app.services.expense_service import EncodedPage
+from tests.conftest import create_expenses, post_expense
+from tests.fakes import FakeRedis
+
+
+@pytest.fixture(params=["local", "redis"])
+def backend(request, monkeypatch):
+    if request.param == "local":
+        backend = LocalCacheBackend(max_entries=1000, ttl_seconds=300)
+    else:
+        backend = RedisCacheBackend(FakeRedis(), ttl_seconds=300)
+    monkeypatch.setattr(response_cache, "backend", backend)
+    return backend
+
+
+def _amounts(client, user_id):
+    return sorted(Decimal(row["amount"]) for row in client.get("/expenses/", params={"user_id": user_id}).json())
+
+
+def _summary(client, user_id):
+    rows = client.get("/expenses/summary/by-category", params={"user_id": user_id}).json()
+    return {row["category"]: Decimal(row["total_amount"]) for row in rows}
+
+
+def test_reads_are_served_from_the_cache(client, backend):
+    post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    hits = response_cache.hits
+    assert _amounts(client, 1) == [Decimal("10.00")]
+    assert _amounts(client, 1) == [Decimal("10.00")]
+    assert response_cache.hits > hits
+
+
+def test_every_write_bumps_only_its_users_version(client, backend):
+    expense = post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    other = backend.version(2)
+    steps = [
+        lambda: post_expense(client, 1, 20, "2024-01-02T00:00:00"),
+        lambda: create_expenses(client, 1, [{"name": "a", "total": "1"}]),
+        lambda: client.patch(f"/expenses/{expense['id']}", json={"amount": "11"}),
+        lambda: client.request("PATCH", "/expenses/bulk", json={"user_id": 1, "ids": [expense["id"]], "changes": {"description": "x"}}),
+        lambda: client.delete(f"/expenses/{expense['id']}"),
+    ]
+    for step in steps:
+        before = backend.version(1)
+        step()
+        assert backend.version(1) > before
+    assert backend.version(2) == other
+
+
+def test_cached_reads_follow_every_kind_of_write(client, backend):
+    first = post_expense(client, 1, 10, "2024-01-01T00:00:00", category="supermarket")
+    post_expense(client, 2, 99, "2024-01-01T00:00:00", category="supermarket")
+    assert _amounts(client, 1) == [Decimal("10.00")]
+    assert _summary(client, 1) == {"supermarket": Decimal("10.00")}
+    assert _amounts(client, 2) == [Decimal("99.00")]
+
+    second = post_expense(client, 1, 20, "2024-01-02T00:00:00", category="supermarket")
+    assert _amounts(client, 1) == [Decimal("10.00"), Decimal("20.00")]
+    assert _summary(client, 1) == {"supermarket": Decimal("30.00")}
+
+    client.patch(f"/expenses/{first['id']}", json={"amount": "15"})
+    assert _amounts(client, 1) == [Decimal("15.00"), Decimal("20.00")]
+    assert client.get(f"/expenses/{first['id']}", params={"user_id": 1}).json()["amount"] == "15.00"
+
+    bulk = create_expenses(client, 1, [{"name": "a", "total": "1"}, {"name": "b", "total": "2"}], category="others")
+    assert _summary(client, 1) == {"supermarket": Decimal("35.00"), "others": Decimal("3.00")}
+
+    client.request(
+        "PATCH", "/expenses/bulk", json={"user_id": 1, "ids": [row["id"] for row in bulk], "changes": {"amount": "5"}}
+    )
+    assert _summary(client, 1)["others"] == Decimal("10.00")
+
+    client.request("DELETE", "/expenses/bulk", json={"user_id": 1, "ids": [row["id"] for row in bulk]})
+    assert _summary(client, 1) == {"supermarket": Decimal("35.00")}
+
+    client.delete(f"/expenses/{second['id']}")
+    assert _amounts(client, 1) == [Decimal("15.00")]
+    assert client.get(f"/expenses/{second['id']}", params={"user_id": 1}).status_code == 404
+    assert _amounts(client, 2) == [Decimal("99.00")]
+
+
+def test_timeseries_round_trips_through_the_cache(client, backend):
+    post_expense(client, 1, 10, "2024-01-15T00:00:00", category="supermarket")
+    post_expense(client, 1, 20, "2024-02-15T00:00:00", category="others")
+    params = {"user_id": 1, "bucket": "month", "group_by": "category"}
+    first = client.get("/expenses/summary/timeseries", params=params).json()
+    hits = response_cache.hits
+    assert client.get("/expenses/summary/timeseries", params=params).json() == first
+    assert response_cache.hits > hits
+
+
+def test_codec_round_trips_the_cached_types():
+    value = [
+        EncodedPage(b'[{"id":1}]', None),
+        (3, datetime(2024, 1, 2, 3, 4, 5, 678901)),
+        [ExpenseSummary(category="supermarket", total_amount=Decimal("10.50"))],
+        {"$bytes": date(2024, 1, 1), "amount": Decimal("1.10")},
+        None,
+    ]
+    decoded = cache_codec.loads(cache_codec.dumps(value))
+    assert decoded == value
+    assert type(decoded[0]) is EncodedPage
+    assert type(decoded[2][0]) is ExpenseSummary
+
+
+def test_codec_only_rebuilds_registered_types():
+    with pytest.raises(TypeError):
+        JsonCodec().dumps(EncodedPage(b"", None))
+    with pytest.raises(KeyError):
+        JsonCodec().loads(cache_codec.dumps(EncodedPage(b"", None)))
+
+
+_PLANTED_CALLS = []
+
+
+def _planted():
+    _PLANTED_CALLS.append(True)
+
+
+class _Planted:
+    def __reduce__(self):
+        return _planted, ()
+
+
+def test_foreign_redis_entries_are_misses_and_never_unpickled():
+    redis = FakeRedis()
+    backend = RedisCacheBackend(redis, ttl_seconds=60)
+    redis.set("expenses:1:0:planted", pickle.dumps(_Planted()))
+    redis.set("expenses:1:0:unknown", b'{"$model": "Popen", "value": ["id"]}')
+    assert backend.get("1:0:planted") is backend.get("1:0:unknown") is backend.get("1:0:absent")
+    assert _PLANTED_CALLS == []
+
+
+def test_redis_keys_expire():
+    client = FakeRedis()
+    backend = RedisCacheBackend(client, ttl_seconds=60)
+    backend.set("1:0:key", {"value": 1})
+    backend.bump_version(1)
+    assert backend.get("1:0:key") == {"value": 1}
+    assert backend.version(1) == 1
+    assert 0 < client.ttl("expenses:1:0:key") <= 60
+    # The version outlives every entry stored under it.
+    assert client.ttl("expenses:version:1") >= 2 * 60
+
+
+def test_etag_fingerprint_is_cached_only_in_a_shared_backend(client, backend, db):
+    expense = post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    list_tag = client.get("/expenses/", params={"user_id": 1}).headers["ETag"]
+    detail_tag = client.get(f"/expenses/{expense['id']}", params={"user_id": 1}).headers["ETag"]
+
+    # Another worker's write: committed to the database; only a shared backend sees its version bump.
+    db.query(Expense).filter(Expense.id == expense["id"]).update({"updated_at": datetime(2030, 1, 1)})
+    db.commit()
+    if backend.shared:
+        backend.bump_version(1)
+
+    list_status = client.get("/expenses/", params={"user_id": 1}, headers={"If-None-Match": list_tag}).status_code
+    detail_status = client.get(
+        f"/expenses/{expense['id']}", params={"user_id": 1}, headers={"If-None-Match": detail_tag}
+    ).status_code
+    assert (list_status, detail_status) == (200, 200)
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    [({}, "local"), ({"WEB_CONCURRENCY": "4"}, "none"), ({"WEB_CONCURRENCY": "4", "CACHE_BACKEND": "Redis"}, "redis")],
+)
+def test_default_backend_depends_on_the_worker_count(monkeypatch, env, expected):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.delenv("CACHE_BACKEND", raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    try:
+        assert importlib.reload(config).CACHE_BACKEND == expected
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
@@ -0,0 +1,117 @@
+import json
+import os
+
+import pytest
+
+from app.models.expense_model import ExpenseCategory
+from app.services.categorization_service import PREFIX, CategoryRule, CategoryRules, _Automaton
+from tests.conftest import create_expenses
+
+SUPERMARKET = ExpenseCategory.SUPERMARKET
+SERVICE = ExpenseCategory.SERVICE_BASIC
+CARD = ExpenseCategory.CREDIT_CARD
+DEBT = ExpenseCategory.BANK_DEBTS
+
+
+def _match(rules, text):
+    return _Automaton(rules).categorize(text)
+
+
+def test_the_longest_overlapping_pattern_wins():
+    rules = [CategoryRule("credito", DEBT), CategoryRule("tarjeta de credito", CARD), CategoryRule("gas", SERVICE)]
+    assert _match(rules, "Pago tarjeta de credito") == CARD
+    assert _match(rules, "Credito de consumo") == DEBT
+    # "metrogas" shares its suffix with "gas": the failure links report both, the longer one wins.
+    assert _match([*rules, CategoryRule("metrogas", SUPERMARKET)], "Cuenta Metrogas") == SUPERMARKET
+
+
+def test_equal_lengths_go_to_the_rule_listed_first():
+    rules = [CategoryRule("jumbo", SUPERMARKET), CategoryRule("visa1", CARD)]
+    assert _match(rules, "visa1 jumbo") == SUPERMARKET
+    assert _match(rules[::-1], "visa1 jumbo") == CARD
+
+
+def test_case_accents_and_whitespace_are_folded():
+    rules = [CategoryRule("Líder", SUPERMARKET), CategoryRule("aguas andinas", SERVICE)]
+    assert _match(rules, "SUPERMERCADO LIDER") == SUPERMARKET
+    assert _match(rules, "lider express") == SUPERMARKET
+    assert _match(rules, "Aguas   Andinas\tS.A.") == SERVICE
+
+
+def test_keywords_match_whole_words_only():
+    rules = [CategoryRule("wom", SERVICE), CategoryRule("claro", SERVICE)]
+    assert _match(rules, "Pago WOM") == SERVICE
+    assert _match(rules, "wom-123") == SERVICE
+    assert _match(rules, "Women store") is None
+    assert _match(rules, "Claroscuro") is None
+    assert _match(rules, "ex-claro") == SERVICE
+
+
+def test_prefix_rules_match_only_the_start():
+    rules = [CategoryRule("pago tc", CARD, PREFIX)]
+    assert _match(rules, "PAGO TC 1234") == CARD
+    assert _match(rules, "pago tcx") == CARD
+    assert _match(rules, "Reverso pago tc") is None
+
+
+def test_default_rules_categorize_a_batch(client):
+    created = create_expenses(
+        client,
+        1,
+        [
+            {"name": "Compra Jumbo La Florida", "total": "1"},
+            {"name": "Cuenta de luz Enel", "total": "1"},
+            {"name": "Pago tarjeta de crédito", "total": "1"},
+            {"name": "Dividendo crédito hipotecario", "total": "1"},
+            {"name": "Regalo", "total": "1"},
+        ],
+    )
+    assert [row["category"] for row in created] == [
+        "supermarket",
+        "service_basic",
+        "credit_card",
+        "bank_debts",
+        "others",
+    ]
+
+
+def _write_rules(path, rules, mtime_ns):
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    path = tmp_path / "rules.json"
+    _write_rules(path, [{"pattern": "kiosko", "category": "supermarket"}], 1_000_000_000)
+    return path
+
+
+def test_rules_file_replaces_the_defaults_and_reloads_on_change(rules_file):
+    rules = CategoryRules(str(rules_file), reload_seconds=0)
+    assert rules.categorize(["Kiosko Don Pepe", "Jumbo"]) == [SUPERMARKET, None]
+
+    _write_rules(rules_file, [{"pattern": "kiosko", "category": "others"}], 2_000_000_000)
+    assert rules.categorize(["Kiosko Don Pepe"]) == [ExpenseCategory.OTHERS]
+
+
+def test_reload_waits_for_the_interval(rules_file):
+    rules = CategoryRules(str(rules_file), reload_seconds=3600)
+    assert rules.categorize(["kiosko"]) == [SUPERMARKET]
+    _write_rules(rules_file, [{"pattern": "kiosko", "category": "others"}], 2_000_000_000)
+    assert rules.categorize(["kiosko"]) == [SUPERMARKET]
+    assert rules.reload() == 1
+    assert rules.categorize(["kiosko"]) == [ExpenseCategory.OTHERS]
+
+
+def test_an_invalid_or_missing_file_keeps_the_last_valid_rules(rules_file):
+    rules = CategoryRules(str(rules_file), reload_seconds=0)
+    assert rules.categorize(["kiosko"]) == [SUPERMARKET]
+
+    _write_rules(rules_file, [{"pattern": "kiosko", "category": "no-existe"}], 2_000_000_000)
+    assert rules.categorize(["kiosko"]) == [SUPERMARKET]
+    rules_file.unlink()
+    assert rules.categorize(["kiosko"]) == [SUPERMARKET]
+
+    _write_rules(rules_file, [{"pattern": "kiosko", "category": "others", "match": "prefix"}], 3_000_000_000)
+    assert rules.categorize(["kiosko", "el kiosko"]) == [ExpenseCategory.OTHERS, None]
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.core import database
+from app.main import app
+from app.models.expense_model import ExpenseChange
+from app.services import change_feed_service
+from tests.conftest import create_expenses, post_expense
+
+
+def _feed(client, **params):
+    response = client.get("/expenses/changes", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_feed_lists_every_change_in_order_with_the_current_state(client):
+    kept = post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    gone = post_expense(client, 2, 20, "2024-01-02T00:00:00")
+    client.patch(f"/expenses/{kept['id']}", json={"description": "editado"})
+    client.delete(f"/expenses/{gone['id']}")
+
+    feed = _feed(client)
+    events = [(event["operation"], event["expense_id"], event["user_id"]) for event in feed["changes"]]
+    assert events == [
+        ("insert", kept["id"], 1),
+        ("insert", gone["id"], 2),
+        ("update", kept["id"], 1),
+        ("delete", gone["id"], 2),
+    ]
+    seqs = [event["seq"] for event in feed["changes"]]
+    assert seqs == sorted(seqs)
+    assert feed["next_cursor"] == seqs[-1]
+    assert feed["has_more"] is False
+    assert feed["changes"][0]["expense"]["description"] == "editado"
+    assert feed["changes"][1]["expense"] is None
+
+    assert _feed(client, since=feed["next_cursor"]) == {"changes": [], "next_cursor": seqs[-1], "has_more": False}
+    assert [event["expense_id"] for event in _feed(client, user_id=2)["changes"]] == [gone["id"], gone["id"]]
+
+
+def test_feed_pages_follow_the_cursor(client):
+    created = create_expenses(client, 1, [{"name": f"g{index}", "total": "1"} for index in range(5)])
+    seen = []
+    since = 0
+    while True:
+        page = _feed(client, since=since, limit=2)
+        seen += [event["expense_id"] for event in page["changes"]]
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == [row["id"] for row in created]
+
+
+def test_unsettled_events_are_held_back(client, monkeypatch):
+    post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    monkeypatch.setattr(change_feed_service, "EXPENSES_CHANGES_SETTLE_SECONDS", 3600)
+    assert _feed(client) == {"changes": [], "next_cursor": 0, "has_more": False}
+
+
+def test_events_follow_the_expense_when_its_date_changes(client, db):
+    expense = post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    client.patch(f"/expenses/{expense['id']}", json={"transaction_date": "2024-05-01T00:00:00"})
+    changes = {"transaction_date": "2024-06-01T00:00:00"}
+    client.request("PATCH", "/expenses/bulk", json={"user_id": 1, "ids": [expense["id"]], "changes": changes})
+
+    stored = db.execute(select(ExpenseChange.transaction_date).order_by(ExpenseChange.seq)).scalars().all()
+    assert stored == [datetime(2024, 6, 1)] * 3
+    feed = _feed(client)["changes"]
+    assert [event["expense"]["transaction_date"] for event in feed] == ["2024-06-01T00:00:00"] * 3
+
+
+def test_feed_reads_the_primary_and_stamps_events_with_the_database_clock(client, db, replica):
+    before = datetime.utcnow()
+    expense = post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    database.recent_writes.clear()
+
+    [event] = TestClient(app).get("/expenses/changes").json()["changes"]
+    assert event["expense"]["id"] == expense["id"]
+    changed_at = db.execute(select(ExpenseChange.changed_at)).scalar_one()
+    assert before - timedelta(seconds=5) < changed_at < datetime.utcnow() + timedelta(seconds=5)
@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.coalescing import WriteCoalescer
+from app.core.consistency import LAST_WRITE_HEADER
+from app.main import app
+from app.routers import expense_router
+
+
+def _post_concurrently(payloads: list[dict]) -> list[httpx.Response]:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.post("/expenses/", json=payload) for payload in payloads))
+            await expense_router.create_coalescer.drain()
+            return responses
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    sizes = []
+
+    async def flush(rows):
+        sizes.append(len(rows))
+        return await expense_router._flush_creates(rows)
+
+    monkeypatch.setattr(
+        expense_router, "create_coalescer", WriteCoalescer(flush, max_batch=4, max_wait_ms=50)
+    )
+    return sizes
+
+
+def test_concurrent_creates_share_a_commit_and_get_their_own_rows(client, batches):
+    payloads = [
+        {"user_id": index % 2 + 1, "amount": str(index + 1), "transaction_date": "2024-01-01T00:00:00"}
+        for index in range(6)
+    ]
+    responses = _post_concurrently(payloads)
+
+    assert [response.status_code for response in responses] == [201] * 6
+    assert all(LAST_WRITE_HEADER in response.headers for response in responses)
+    assert sorted(batches) == [2, 4]
+    created = [response.json() for response in responses]
+    assert [(row["user_id"], row["amount"]) for row in created] == [
+        (payload["user_id"], f"{int(payload['amount'])}.00") for payload in payloads
+    ]
+    assert len({row["id"] for row in created}) == 6
+    for row in created:
+        assert client.get(f"/expenses/{row['id']}").json() == row
+    assert len(client.get("/expenses/", params={"user_id": 1}).json()) == 3
+
+
+def test_invalid_payloads_are_rejected_before_queueing(client, batches):
+    responses = _post_concurrently(
+        [
+            {"user_id": 1, "amount": "10", "transaction_date": "2024-01-01T00:00:00"},
+            {"user_id": 1, "amount": "-5", "transaction_date": "2024-01-01T00:00:00"},
+        ]
+    )
+    assert [response.status_code for response in responses] == [201, 422]
+    assert batches == [1]
+
+
+def test_a_failed_item_fails_only_its_own_caller():
+    async def flush(items):
+        return [ValueError(item) if item == "bad" else item.upper() for item in items]
+
+    async def run():
+        coalescer = WriteCoalescer(flush, max_batch=3, max_wait_ms=1000)
+        return await asyncio.gather(*(coalescer.submit(item) for item in ("a", "bad", "c")), return_exceptions=True)
+
+    first, failed, last = asyncio.run(run())
+    assert (first, last) == ("A", "C")
+    assert isinstance(failed, ValueError)
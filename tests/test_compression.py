@@ -0,0 +1,85 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+
+from app.core import compression
+from tests.conftest import create_expenses
+
+ITEMS = [{"name": f"Gasto número {index}", "total": str(index + 1)} for index in range(200)]
+
+
+@pytest.fixture
+def seeded(client):
+    return create_expenses(client, 1, ITEMS, transaction_date="2024-01-01T00:00:00")
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_large_json_is_compressed_with_the_negotiated_encoding(client, seeded, encoding):
+    if encoding == "br" and compression.brotli is None:
+        pytest.skip("brotli is not installed")
+    plain = client.get("/expenses/", params={"user_id": 1, "limit": 200})
+    response = client.get("/expenses/", params={"user_id": 1, "limit": 200}, headers={"Accept-Encoding": encoding})
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.json() == plain.json()
+    assert int(response.headers["Content-Length"]) < len(plain.content)
+
+
+def test_small_bodies_and_identity_are_sent_as_is(client, seeded):
+    small = client.get(f"/expenses/{seeded[0]['id']}", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    identity = client.get("/expenses/", params={"user_id": 1}, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+
+
+def test_streamed_ndjson_is_compressed_incrementally(client, seeded):
+    response = client.get("/expenses/", params={"user_id": 1, "stream": True}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == len(ITEMS)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_each_streamed_chunk_decodes_before_the_stream_ends(encoding):
+    if encoding == "br" and compression.brotli is None:
+        pytest.skip("brotli is not installed")
+    chunks = [b'{"id": 1}\n', b'{"id": 2}\n']
+
+    async def app(scope, receive, send):
+        headers = [(b"content-type", b"application/x-ndjson")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", encoding.encode())]}
+    asyncio.run(compression.CompressionMiddleware(app)(scope, None, send))
+
+    bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    decoder = compression.brotli.Decompressor() if encoding == "br" else zlib.decompressobj(31)
+    decode = decoder.process if encoding == "br" else decoder.decompress
+    assert [decode(body) for body in bodies[:2]] == chunks
+
+
+def test_gzip_export_is_not_compressed_twice(client, seeded):
+    response = client.get(
+        "/expenses/export", params={"user_id": 1, "gzip": True}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert "Content-Encoding" not in response.headers
+    assert gzip.decompress(response.content).decode().count("\n") == len(ITEMS) + 1
+
+
+def test_negotiate_prefers_the_highest_weight():
+    assert compression.negotiate("gzip;q=0.5, br;q=0.9") == ("br" if compression.brotli else "gzip")
+    assert compression.negotiate("gzip, br;q=0") == "gzip"
+    assert compression.negotiate("identity") is None
+    assert compression.negotiate("*;q=0") is None
@@ -0,0 +1,56 @@
+from tests.conftest import post_expense
+
+
+def test_list_answers_304_until_the_user_writes(client):
+    post_expense(client, 1, 100, "2024-02-01T00:00:00")
+    first = client.get("/expenses/", params={"user_id": 1})
+    tag = first.headers["ETag"]
+    assert tag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    cached = client.get("/expenses/", params={"user_id": 1}, headers={"If-None-Match": tag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    post_expense(client, 2, 100, "2024-02-01T00:00:00")  # another user's write keeps the tag
+    assert client.get("/expenses/", params={"user_id": 1}, headers={"If-None-Match": tag}).status_code == 304
+
+    post_expense(client, 1, 200, "2024-02-02T00:00:00")
+    changed = client.get("/expenses/", params={"user_id": 1}, headers={"If-None-Match": tag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != tag
+    assert len(changed.json()) == 2
+
+
+def test_tag_depends_on_the_request_parameters(client):
+    post_expense(client, 1, 100, "2024-02-01T00:00:00")
+    full = client.get("/expenses/", params={"user_id": 1}).headers["ETag"]
+    narrow = client.get("/expenses/", params={"user_id": 1, "fields": "amount"}).headers["ETag"]
+    summary = client.get("/expenses/summary/by-category", params={"user_id": 1}).headers["ETag"]
+    assert len({full, narrow, summary}) == 3
+    assert client.get("/expenses/", params={"user_id": 1, "fields": "amount"}, headers={"If-None-Match": full}).status_code == 200
+
+
+def test_detail_tag_changes_with_patch_and_delete(client):
+    expense = post_expense(client, 1, 100, "2024-02-01T00:00:00")
+    url = f"/expenses/{expense['id']}"
+    tag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": f'"other", {tag}'}).status_code == 304
+
+    client.patch(url, json={"description": "nuevo"})
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 200
+
+    client.delete(url)
+    assert client.get(url, headers={"If-None-Match": tag}).status_code == 404
+
+
+def test_summary_answers_304_and_changes_after_a_delete(client):
+    expense = post_expense(client, 1, 100, "2024-02-01T00:00:00")
+    tag = client.get("/expenses/summary/by-category", params={"user_id": 1}).headers["ETag"]
+    params = {"user_id": 1}
+    assert client.get("/expenses/summary/by-category", params=params, headers={"If-None-Match": tag}).status_code == 304
+    client.delete(f"/expenses/{expense['id']}")
+    response = client.get("/expenses/summary/by-category", params=params, headers={"If-None-Match": tag})
+    assert response.status_code == 200
+    assert response.json() == []
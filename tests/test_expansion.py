@@ -0,0 +1,102 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.core import database
+from app.models.expense_model import Expense
+from app.services.expansion_service import ExpansionReport, expand_all, expand_users
+from tests.conftest import post_expense
+
+NOW = datetime(2024, 1, 15, 9, 30)
+
+
+def _expand(db, now=NOW, horizon_months=12) -> int:
+    inserted = expand_users(db, [1], now=now, horizon_months=horizon_months)
+    db.commit()
+    return len(inserted)
+
+
+def _periods(db, source_id: int) -> list[tuple[int, datetime]]:
+    stmt = (
+        select(Expense.period_index, Expense.transaction_date)
+        .where(Expense.parent_id == source_id)
+        .order_by(Expense.period_index)
+    )
+    return [tuple(row) for row in db.execute(stmt)]
+
+
+def test_installments_stop_at_the_last_one_and_reruns_insert_nothing(client, db):
+    source = post_expense(client, 1, "100", "2024-01-10T00:00:00", installments=3)
+    post_expense(client, 1, "5", "2024-01-10T00:00:00")
+
+    assert _expand(db) == 2
+    assert _periods(db, source["id"]) == [(1, datetime(2024, 2, 10)), (2, datetime(2024, 3, 10))]
+    assert _expand(db) == 0
+    assert _expand(db, now=datetime(2025, 6, 1)) == 0
+
+    rows = db.execute(select(Expense).where(Expense.parent_id == source["id"])).scalars().all()
+    assert {(row.status.value, row.amount, row.installments, row.is_recurring) for row in rows} == {
+        ("planned", Decimal(source["amount"]), None, False)
+    }
+
+
+def test_month_end_sources_clamp_to_shorter_months(client, db):
+    source = post_expense(client, 1, "10", "2024-01-31T00:00:00", is_recurring=True)
+    assert _expand(db, now=datetime(2024, 1, 31), horizon_months=3) == 3
+    # Each period is counted from the source, so March is back on the 31st after February's 29th.
+    assert _periods(db, source["id"]) == [
+        (1, datetime(2024, 2, 29)),
+        (2, datetime(2024, 3, 31)),
+        (3, datetime(2024, 4, 30)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "now, first",
+    [
+        (datetime(2024, 1, 20, 18, 0), (10, datetime(2024, 1, 20))),
+        (datetime(2024, 1, 21), (11, datetime(2024, 2, 20))),
+    ],
+)
+def test_the_first_expansion_starts_at_the_first_period_not_in_the_past(client, db, now, first):
+    source = post_expense(client, 1, "10", "2023-03-20T00:00:00", is_recurring=True)
+    _expand(db, now=now, horizon_months=1)
+    assert _periods(db, source["id"])[0] == first
+
+
+def test_later_runs_continue_after_the_last_generated_period(client, db):
+    source = post_expense(client, 1, "10", "2024-01-10T00:00:00", is_recurring=True)
+    assert _expand(db, horizon_months=1) == 1
+
+    # A run after months without expansion catches up from the last period, past ones included.
+    assert _expand(db, now=datetime(2024, 5, 15), horizon_months=1) == 4
+    assert [period for period, _ in _periods(db, source["id"])] == [1, 2, 3, 4, 5]
+
+
+def test_turning_off_is_recurring_stops_the_series(client, db):
+    source = post_expense(client, 1, "10", "2024-01-10T00:00:00", is_recurring=True)
+    assert _expand(db, horizon_months=2) == 2
+
+    response = client.patch(f"/expenses/{source['id']}", params={"user_id": 1}, json={"is_recurring": False})
+    assert response.status_code == 200, response.text
+    assert _expand(db, now=datetime(2024, 6, 1), horizon_months=2) == 0
+    assert [period for period, _ in _periods(db, source["id"])] == [1, 2]
+
+
+def test_expand_all_reports_each_batch(client):
+    post_expense(client, 1, "10", "2024-01-10T00:00:00", installments=4)
+    post_expense(client, 2, "10", "2024-01-10T00:00:00", is_recurring=True)
+    post_expense(client, 3, "10", "2024-01-10T00:00:00")
+
+    run = dict(now=NOW, horizon_months=2, batch_users=1, workers=2)
+    assert expand_all(database.SessionLocal, **run) == ExpansionReport(users=2, batches=2, failed_batches=0, inserted=4)
+    assert expand_all(database.SessionLocal, **run) == ExpansionReport(users=2, batches=2, failed_batches=0, inserted=0)
+
+    listed = client.get("/expenses/", params={"user_id": 2}).json()
+    assert [(row["status"], row["period_index"]) for row in listed] == [
+        ("planned", 2),
+        ("planned", 1),
+        ("posted", None),
+    ]
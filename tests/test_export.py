@@ -0,0 +1,76 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from app.schemas.expense_schema import FileFormat
+from app.services import expense_service
+from tests.conftest import create_expenses
+
+DESCRIPTIONS = ["Pan, leche y huevos", 'Cuota "auto"', "Línea uno\nlínea dos", "Simple"]
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # Several yield_per batches and several flushed chunks for a handful of rows.
+    monkeypatch.setattr(expense_service, "EXPENSES_STREAM_CHUNK_SIZE", 3)
+    monkeypatch.setattr(expense_service, "_EXPORT_FLUSH_BYTES", 200)
+
+
+def _seed(client, count: int = 10) -> list[dict]:
+    items = [{"name": DESCRIPTIONS[index % len(DESCRIPTIONS)], "total": str(index + 1)} for index in range(count)]
+    return create_expenses(client, 1, items, transaction_date="2024-01-01T00:00:00")
+
+
+def _newest_first(rows):
+    return sorted(rows, key=lambda row: (row["transaction_date"], row["id"]), reverse=True)
+
+
+def test_csv_export_has_the_header_and_escapes_descriptions(client):
+    created = _seed(client, count=len(DESCRIPTIONS))
+    create_expenses(client, 2, [{"name": "ajeno", "total": "1"}])
+    response = client.get("/expenses/export", params={"user_id": 1, "format": "csv"})
+
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == 'attachment; filename="expenses-1.csv"'
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert tuple(header) == tuple(expense_service._RESPONSE_FIELDS)
+    assert [dict(zip(header, row))["description"] for row in rows] == [
+        row["description"] for row in _newest_first(created)
+    ]
+    assert '"Pan, leche y huevos"' in response.text
+    assert '"Cuota ""auto"""' in response.text
+
+
+def test_ndjson_export_matches_the_listing(client):
+    _seed(client, count=5)
+    response = client.get("/expenses/export", params={"user_id": 1, "format": "ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="expenses-1.ndjson"'
+    listing = client.get("/expenses/", params={"user_id": 1}).json()
+    assert [json.loads(line) for line in response.text.splitlines()] == listing
+
+
+@pytest.mark.parametrize("fmt", [FileFormat.CSV, FileFormat.NDJSON])
+def test_every_row_is_exported_once_across_batches(client, db, small_batches, fmt):
+    created = _seed(client, count=10)
+    chunks = list(expense_service.export_expenses(db, fmt=fmt, user_id=1))
+    assert len(chunks) > 1
+
+    text = b"".join(chunks).decode()
+    if fmt == FileFormat.CSV:
+        ids = [int(row["id"]) for row in csv.DictReader(io.StringIO(text))]
+    else:
+        ids = [json.loads(line)["id"] for line in text.splitlines()]
+    assert ids == [row["id"] for row in _newest_first(created)]
+
+
+def test_gzip_export_decompresses_to_the_plain_export(client, small_batches):
+    _seed(client, count=10)
+    plain = client.get("/expenses/export", params={"user_id": 1, "format": "csv"})
+    packed = client.get("/expenses/export", params={"user_id": 1, "format": "csv", "gzip": True})
+    assert packed.headers["content-type"] == "application/gzip"
+    assert packed.headers["content-disposition"] == 'attachment; filename="expenses-1.csv.gz"'
+    assert gzip.decompress(packed.content) == plain.content
@@ -0,0 +1,137 @@
+from decimal import Decimal
+
+from sqlalchemy.exc import IntegrityError
+
+from app.services import import_service
+
+
+def _import(client, body: str, content_type: str = "text/csv", **params):
+    response = client.post(
+        "/expenses/import",
+        params={"user_id": 1, **params},
+        content=body.encode(),
+        headers={"Content-Type": content_type},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_csv_rows_are_imported_in_chunks_and_bad_rows_reported(client, monkeypatch):
+    monkeypatch.setattr(import_service, "EXPENSES_IMPORT_CHUNK_SIZE", 2)
+    body = (
+        "Fecha;Descripción;Cargo;Categoría\n"
+        "01/02/2024;Supermercado Lider;12.345;supermercado\n"
+        "02/02/2024;Enel;1.234,50;\n"
+        "no es fecha;Pan;100;\n"
+        "03/02/2024;Agua;-5;\n"
+        "04/02/2024;Cuota;2000;Tarjetas de crédito\n"
+        "05/02/2024;Cuota;10;tarjeta\n"
+    )
+    report = _import(client, body)
+    assert report["imported"] == 3
+    assert report["failed"] == 3
+    assert report["chunks"] == 2
+    assert Decimal(report["total_amount"]) == Decimal("15579.50")
+    assert [error["line"] for error in report["errors"]] == [4, 5, 7]
+
+    rows = client.get("/expenses/", params={"user_id": 1}).json()
+    assert sorted(Decimal(row["amount"]) for row in rows) == [Decimal("1234.50"), Decimal("2000.00"), Decimal("12345.00")]
+    categories = {row["description"]: row["category"] for row in rows}
+    assert categories == {"Supermercado Lider": "supermarket", "Enel": "service_basic", "Cuota": "credit_card"}
+
+
+def test_ndjson_rows_use_the_query_defaults(client):
+    body = (
+        '{"name": "Pan", "monto": "1500", "cantidad": 2}\n'
+        "\n"
+        "[1, 2]\n"
+        '{"total": "300", "fecha": "2024-05-01", "categoria": "otros"}\n'
+    )
+    report = _import(client, body, "application/x-ndjson", transaction_date="2024-04-30")
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["line"] == 3
+
+    rows = client.get("/expenses/", params={"user_id": 1}).json()
+    by_amount = {Decimal(row["amount"]): row for row in rows}
+    assert by_amount[Decimal("3000")]["transaction_date"].startswith("2024-04-30")
+    assert by_amount[Decimal("3000")]["quantity"] == 2
+    assert by_amount[Decimal("300")]["transaction_date"].startswith("2024-05-01")
+
+
+def test_csv_without_known_columns_is_rejected(client):
+    response = client.post(
+        "/expenses/import", params={"user_id": 1}, content=b"foo,bar\n1,2\n", headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 400
+
+
+def test_ndjson_values_of_the_wrong_type_are_rejected_per_row(client):
+    body = "\n".join(
+        [
+            '{"total": "10", "category": 5}',
+            '{"total": "10", "estado": 5}',
+            '{"total": "10", "fecha": 20240101}',
+            '{"total": "10", "categoria": true}',
+            '{"total": 99999999999999}',
+            '{"monto": "9999999999", "cantidad": 2}',
+            '{"total": "10", "cuotas": 3000000000}',
+            '{"total": "9999999999.99", "category": "others", "estado": "planned", "fecha": "2024-01-02"}',
+        ]
+    )
+    report = _import(client, body, "application/x-ndjson")
+    assert (report["imported"], report["failed"]) == (1, 7)
+    assert [error["line"] for error in report["errors"]] == [1, 2, 3, 4, 5, 6, 7]
+    [row] = client.get("/expenses/", params={"user_id": 1}).json()
+    assert (row["amount"], row["status"]) == ("9999999999.99", "planned")
+
+
+def test_a_chunk_the_database_rejects_is_bisected_to_the_bad_rows(client, monkeypatch):
+    insert_rows = import_service._insert_expense_rows
+
+    def failing_insert(db, rows, *args):
+        if any(row["description"] == "rompe" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("rejected"))
+        return insert_rows(db, rows, *args)
+
+    monkeypatch.setattr(import_service, "_insert_expense_rows", failing_insert)
+    lines = [f'{{"name": "{"rompe" if index in (3, 6) else f"g{index}"}", "total": "1"}}' for index in range(1, 9)]
+    report = _import(client, "\n".join(lines), "application/x-ndjson")
+
+    assert (report["imported"], report["failed"]) == (6, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 6]
+    descriptions = sorted(row["description"] for row in client.get("/expenses/", params={"user_id": 1}).json())
+    assert descriptions == ["g1", "g2", "g4", "g5", "g7", "g8"]
+
+
+
+def test_lines_end_only_at_newlines():
+    chunks = ["uno\r", '\n"dos \x0c\x0b\u0085"\r\n', "tres"]
+    lines = list(import_service.iter_text_lines(chunk.encode() for chunk in chunks))
+    assert lines == ["uno\r\n", '"dos \x0c\x0b\u0085"\r\n', "tres"]
+
+
+def test_separators_inside_values_keep_rows_and_line_numbers(client):
+    body = (
+        "Fecha,Descripción,Cargo\r\n"
+        '01/02/2024,"Pan integral\x0c",100\r\n'
+        "no es fecha,Leche,200\r\n"
+        '02/02/2024,"Café\u0085molido",300\r\n'
+    )
+    report = _import(client, body)
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert [error["line"] for error in report["errors"]] == [3]
+
+    ndjson = '{"name": "Té\u2028verde", "total": "5"}\r\n[1]\r\n{"name": "Agua", "total": "1"}\r\n'
+    report = _import(client, ndjson, "application/x-ndjson")
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert [error["line"] for error in report["errors"]] == [2]
+
+    descriptions = {row["description"] for row in client.get("/expenses/", params={"user_id": 1}).json()}
+    assert descriptions == {"Pan integral\x0c", "Café\u0085molido", "Té\u2028verde", "Agua"}
+
+
+def test_dates_with_an_offset_are_stored_in_utc(client):
+    body = '{"total": "10", "fecha": "2024-01-01T23:00:00-03:00"}\n{"total": "20", "fecha": "2024-01-01T23:00:00"}'
+    _import(client, body, "application/x-ndjson")
+    rows = client.get("/expenses/", params={"user_id": 1}).json()
+    assert sorted(row["transaction_date"] for row in rows) == ["2024-01-01T23:00:00", "2024-01-02T02:00:00"]
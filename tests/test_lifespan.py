@@ -0,0 +1,33 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app
+
+
+def test_probes_and_shutdown_waits_for_the_expansion_task(monkeypatch):
+    events = []
+
+    async def run_periodically(session_factory, interval_seconds):
+        events.append("started")
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)  # cleanup that must finish before the pools are disposed
+            events.append("cancelled")
+            raise
+
+    async def dispose_engines():
+        events.append("disposed")
+
+    monkeypatch.setattr(main, "EXPANSION_WORKER_ENABLED", True)
+    monkeypatch.setattr(main.expansion_service, "run_periodically", run_periodically)
+    monkeypatch.setattr(main.database, "dispose_engines", dispose_engines)
+
+    with TestClient(app) as client:
+        assert client.get("/health/live").json() == {"status": "ok"}
+        assert client.get("/health/ready").json()["status"] == "ready"
+    assert app.state.ready is False
+    assert events == ["started", "cancelled", "disposed"]
+    assert app.state.expansion_task.cancelled()
@@ -0,0 +1,79 @@
+import json
+
+from tests.conftest import post_expense
+
+
+def _seed(client, user_id=1, count=25):
+    # Every third expense shares its date with the previous one: ties are broken by id.
+    return [
+        post_expense(client, user_id, 1000 + index, f"2024-01-{1 + index - index // 3:02d}T10:00:00")
+        for index in range(count)
+    ]
+
+
+def _newest_first(rows):
+    return sorted(rows, key=lambda row: (row["transaction_date"], row["id"]), reverse=True)
+
+
+def test_cursor_pages_cover_every_row_once_in_keyset_order(client):
+    rows = _seed(client)
+    other = post_expense(client, 2, 50, "2024-01-05T10:00:00")
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"user_id": 1, "limit": 10, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/expenses/", params=params)
+        assert response.status_code == 200
+        seen += response.json()
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert [row["id"] for row in seen] == [row["id"] for row in _newest_first(rows)]
+    assert other["id"] not in {row["id"] for row in seen}
+
+
+def test_a_write_between_pages_does_not_shift_the_next_page(client):
+    rows = _seed(client, count=12)
+    first = client.get("/expenses/", params={"user_id": 1, "limit": 5})
+    post_expense(client, 1, 1, "2030-01-01T00:00:00")  # newer than every row, lands before the cursor
+    second = client.get("/expenses/", params={"user_id": 1, "limit": 5, "cursor": first.headers["X-Next-Cursor"]})
+    expected = [row["id"] for row in _newest_first(rows)]
+    assert [row["id"] for row in first.json() + second.json()] == expected[:10]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/expenses/", params={"user_id": 1, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_date_range_filters_the_listing(client):
+    rows = _seed(client, count=10)
+    response = client.get("/expenses/", params={"user_id": 1, "date_from": "2024-01-03", "date_to": "2024-01-05"})
+    expected = [row for row in rows if "2024-01-03" <= row["transaction_date"][:10] <= "2024-01-05"]
+    assert [row["id"] for row in response.json()] == [row["id"] for row in _newest_first(expected)]
+
+
+def test_stream_returns_the_whole_listing_as_ndjson(client):
+    _seed(client)
+    listing = client.get("/expenses/", params={"user_id": 1, "limit": 1000}).json()
+    response = client.get("/expenses/", params={"user_id": 1, "stream": "true"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == listing
+
+
+def test_fields_narrow_pages_and_stream(client):
+    _seed(client, count=5)
+    full = client.get("/expenses/", params={"user_id": 1}).json()
+    narrow = client.get("/expenses/", params={"user_id": 1, "fields": "amount, description"}).json()
+    assert narrow == [{"description": row["description"], "amount": row["amount"]} for row in full]
+
+    streamed = client.get("/expenses/", params={"user_id": 1, "stream": "true", "fields": "id"})
+    assert [json.loads(line) for line in streamed.text.splitlines()] == [{"id": row["id"]} for row in full]
+
+
+def test_fields_must_name_known_fields(client):
+    assert client.get("/expenses/", params={"user_id": 1, "fields": "amount,secret"}).status_code == 400
+    assert client.get("/expenses/", params={"user_id": 1, "fields": " , "}).status_code == 400
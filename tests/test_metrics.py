@@ -0,0 +1,32 @@
+import os
+
+from app.core.metrics import Counter, Histogram, db_pool_checkouts, http_request_duration, render_metrics
+
+
+def test_series_render_with_the_common_labels_first():
+    histogram = Histogram("t_seconds", "T.", ("route",), (0.1,))
+    histogram.observe(("/a",), 0.05)
+    assert histogram.render('worker="7"')[2:] == [
+        't_seconds_bucket{worker="7",route="/a",le="0.1"} 1',
+        't_seconds_bucket{worker="7",route="/a",le="+Inf"} 1',
+        't_seconds_sum{worker="7",route="/a"} 0.05',
+        't_seconds_count{worker="7",route="/a"} 1',
+    ]
+    counter = Counter("t_total", "T.", ())
+    counter.inc(())
+    assert counter.render('worker="7"')[2:] == ['t_total{worker="7"} 1']
+    assert counter.render()[2:] == ["t_total 1"]
+
+
+def test_every_exposed_series_names_the_worker_that_answered():
+    http_request_duration.observe(("GET", "/metrics-test", "200"), 0.01)
+    db_pool_checkouts.inc(("metrics-test",))
+    samples = [line for line in render_metrics().splitlines() if not line.startswith("#")]
+    assert samples
+    assert all(f'{{worker="{os.getpid()}"' in line for line in samples)
+
+
+def test_cache_stats_name_the_worker(client):
+    stats = client.get("/cache/stats").json()
+    assert stats["worker"] == os.getpid()
+    assert stats["backend"] == "local"
@@ -0,0 +1,53 @@
+import re
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.mysql.reserved_words import RESERVED_WORDS_MYSQL
+
+from app.commands.migrate import apply_migrations, split_statements
+from app.core import database
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / "migrations"
+
+
+def test_reserved_column_names_are_quoted_in_the_migrations():
+    # SQLAlchemy quotes these in its own DDL and queries; the hand-written migrations must too.
+    reserved = {
+        column.name
+        for table in database.Base.metadata.tables.values()
+        for column in table.columns
+        if column.name.lower() in RESERVED_WORDS_MYSQL
+    }
+    assert reserved
+    unquoted = []
+    for path in sorted(MIGRATIONS.glob("*.sql")):
+        sql = re.sub(r"--[^\n]*", "", path.read_text(encoding="utf-8"))
+        unquoted += [(path.name, name) for name in reserved if re.search(rf"(?<![`\w]){name}(?![`\w])", sql, re.I)]
+    assert unquoted == []
+
+
+def test_scripts_split_on_semicolons_outside_strings_and_comments():
+    assert split_statements("SELECT 'a;b'; -- uno; dos\nSELECT `c;d`, \"e;f\";\n\nSELECT 'it''s; ok'") == [
+        "SELECT 'a;b'",
+        'SELECT `c;d`, "e;f"',
+        "SELECT 'it''s; ok'",
+    ]
+    statements = split_statements((MIGRATIONS / "001_update_expenses_table.sql").read_text(encoding="utf-8"))
+    assert any("'ALTER TABLE expenses DROP COLUMN notes;'" in statement for statement in statements)
+    for path in sorted(MIGRATIONS.glob("*.sql")):
+        assert all(statement.count("'") % 2 == 0 for statement in split_statements(path.read_text(encoding="utf-8")))
+
+
+def test_each_script_is_applied_once(tmp_path):
+    (tmp_path / "001_create.sql").write_text("-- Crea t\nCREATE TABLE t (v TEXT);\nINSERT INTO t VALUES ('a;b');\n")
+    (tmp_path / "002_fill.sql").write_text("INSERT INTO t VALUES ('100%');")
+    bind = create_engine(f"sqlite:///{tmp_path}/schema.db")
+    try:
+        assert apply_migrations(bind, tmp_path) == ["001_create.sql", "002_fill.sql"]
+        assert apply_migrations(bind, tmp_path) == []
+        (tmp_path / "003_more.sql").write_text("INSERT INTO t VALUES ('c');")
+        assert apply_migrations(bind, tmp_path) == ["003_more.sql"]
+        with bind.connect() as connection:
+            assert connection.exec_driver_sql("SELECT v FROM t ORDER BY rowid").scalars().all() == ["a;b", "100%", "c"]
+    finally:
+        bind.dispose()
@@ -0,0 +1,17 @@
+from app.core import cache
+from benchmarks.query_plans import check_plans
+
+
+def test_no_service_query_scans_a_whole_table(monkeypatch):
+    # A cached read would skip its query and leave its plan unchecked.
+    monkeypatch.setattr(cache.response_cache, "backend", cache.NullCacheBackend())
+    results = check_plans()
+    assert results
+    assert [(result.label, result.details) for result in results if result.full_scan] == []
+
+
+def test_the_change_feed_looks_expenses_up_by_their_full_primary_key(monkeypatch):
+    monkeypatch.setattr(cache.response_cache, "backend", cache.NullCacheBackend())
+    probes = {result.label for result in check_plans() if result.all_partitions}
+    assert "get_expense" in probes  # by id only: the caller cannot supply the date
+    assert not {label for label in probes if label.startswith("list_changes_json")}
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import database
+from app.core.consistency import LAST_WRITE_COOKIE, LAST_WRITE_HEADER
+from app.main import app
+from tests.conftest import post_expense
+
+pytestmark = pytest.mark.usefixtures("replica")
+
+
+def _other_worker():
+    """Forget the per-process marker, as a worker that did not serve the write would."""
+    database.recent_writes.clear()
+
+
+def test_reads_go_to_the_replica_without_a_recent_write(client):
+    post_expense(TestClient(app), 1, 10, "2024-01-01T00:00:00")
+    _other_worker()
+    assert client.get("/expenses/", params={"user_id": 1}).json() == []
+
+
+def test_writes_hand_out_a_token_that_pins_reads_on_any_worker(client):
+    expense = post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    assert client.cookies.get(LAST_WRITE_COOKIE)
+    _other_worker()
+
+    assert [row["id"] for row in client.get("/expenses/", params={"user_id": 1}).json()] == [expense["id"]]
+    assert client.get(f"/expenses/{expense['id']}").json() == expense
+    stream = client.get("/expenses/", params={"user_id": 1, "stream": True})
+    assert stream.text.count("\n") == 1
+    found = client.post("/expenses/batch-get", json={"user_id": 1, "ids": [expense["id"]]}).json()["found"]
+    assert [row["id"] for row in found] == [expense["id"]]
+
+    # Another client without the token still reads the (lagging) replica.
+    assert TestClient(app).get(f"/expenses/{expense['id']}").status_code == 404
+
+
+def test_the_header_token_works_without_cookies(client):
+    response = client.post(
+        "/expenses/", json={"user_id": 1, "amount": "10", "transaction_date": "2024-01-01T00:00:00"}
+    )
+    token = response.headers[LAST_WRITE_HEADER]
+    expense_id = response.json()["id"]
+    _other_worker()
+
+    fresh = TestClient(app)
+    assert fresh.get(f"/expenses/{expense_id}", headers={LAST_WRITE_HEADER: token}).status_code == 200
+    stale = str(time.time() - 3600)
+    assert fresh.get(f"/expenses/{expense_id}", headers={LAST_WRITE_HEADER: stale}).status_code == 404
+    assert fresh.get(f"/expenses/{expense_id}", headers={LAST_WRITE_HEADER: "nan"}).status_code == 404
+
+
+def test_reads_and_failed_writes_do_not_hand_out_a_token(client):
+    expense = post_expense(TestClient(app), 1, 10, "2024-01-01T00:00:00")
+    read = client.post("/expenses/batch-get", json={"user_id": 1, "ids": [expense["id"]]})
+    missing = client.patch("/expenses/424242", json={"description": "x"})
+    assert missing.status_code == 404
+    for response in (read, missing):
+        assert LAST_WRITE_HEADER not in response.headers
+    assert client.cookies.get(LAST_WRITE_COOKIE) is None
+
+
+def test_the_per_process_marker_still_pins_the_writer(client):
+    expense = post_expense(TestClient(app), 1, 10, "2024-01-01T00:00:00")
+    assert client.get(f"/expenses/{expense['id']}", params={"user_id": 1}).status_code == 200
+
+
+def test_replica_reads_are_never_stored_in_the_cache(client):
+    expense = post_expense(client, 1, 10, "2024-01-01T00:00:00")
+    token = client.cookies.get(LAST_WRITE_COOKIE)
+    _other_worker()
+
+    # A client without the token reads the lagging replica after the version bump...
+    stale = TestClient(app)
+    assert stale.get("/expenses/", params={"user_id": 1}).json() == []
+    assert stale.get(f"/expenses/{expense['id']}", params={"user_id": 1}).status_code == 404
+    assert stale.get("/expenses/summary/by-category", params={"user_id": 1}).json() == []
+
+    # ...and the writer, pinned to the primary, must not be served what it read.
+    pinned = {LAST_WRITE_HEADER: token}
+    fresh = TestClient(app)
+    listing = fresh.get("/expenses/", params={"user_id": 1}, headers=pinned).json()
+    assert [row["id"] for row in listing] == [expense["id"]]
+    assert fresh.get(f"/expenses/{expense['id']}", params={"user_id": 1}, headers=pinned).status_code == 200
+    assert fresh.get("/expenses/summary/by-category", params={"user_id": 1}, headers=pinned).json() != []
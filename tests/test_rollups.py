@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from app.services import rollup_service
+from tests.conftest import create_expenses, post_expense
+
+
+def _summary(client, user_id, **params):
+    response = client.get("/expenses/summary/by-category", params={"user_id": user_id, **params})
+    assert response.status_code == 200
+    return {row["category"]: Decimal(row["total_amount"]) for row in response.json()}
+
+
+def test_rollups_follow_creates_patches_and_deletes(client, db):
+    first = post_expense(client, 1, "100.50", "2024-01-15T10:00:00", category="supermarket")
+    post_expense(client, 1, "20", "2024-02-03T10:00:00", category="supermarket")
+    create_expenses(
+        client,
+        1,
+        [{"name": "Luz", "total": "30"}, {"name": "Agua", "total": "12.25"}],
+        category="service_basic",
+        transaction_date="2024-02-10T09:00:00",
+    )
+    moved = post_expense(client, 1, "5", "2024-03-01T00:00:00", category="others")
+    client.patch(f"/expenses/{moved['id']}", json={"category": "supermarket", "transaction_date": "2024-01-20T00:00:00"})
+    client.patch(f"/expenses/{first['id']}", json={"amount": "90"})
+    planned = post_expense(client, 1, "999", "2024-02-01T00:00:00", category="others", status="planned")
+    gone = post_expense(client, 1, "7", "2024-02-01T00:00:00", category="credit_card")
+    client.delete(f"/expenses/{gone['id']}")
+
+    assert rollup_service.find_rollup_mismatches(db) == []
+    assert _summary(client, 1) == {
+        "supermarket": Decimal("115.00"),
+        "service_basic": Decimal("42.25"),
+        "others": Decimal("999.00"),
+    }
+    client.patch(f"/expenses/{planned['id']}", json={"status": "posted", "category": "credit_card"})
+    assert _summary(client, 1)["credit_card"] == Decimal("999.00")
+    assert rollup_service.find_rollup_mismatches(db) == []
+
+
+def test_partial_months_read_the_raw_rows(client):
+    post_expense(client, 1, "10", "2024-01-01T00:00:00", category="supermarket")
+    post_expense(client, 1, "20", "2024-01-20T00:00:00", category="supermarket")
+    post_expense(client, 1, "40", "2024-02-10T00:00:00", category="supermarket")
+    post_expense(client, 1, "80", "2024-03-05T00:00:00", category="supermarket")
+
+    assert _summary(client, 1, date_from="2024-01-15", date_to="2024-03-05") == {"supermarket": Decimal("140.00")}
+    assert _summary(client, 1, date_from="2024-02-01", date_to="2024-02-29") == {"supermarket": Decimal("40.00")}
+    assert _summary(client, 1, date_to="2024-01-10") == {"supermarket": Decimal("10.00")}
+
+
+def test_reversed_range_is_empty(client):
+    post_expense(client, 1, "10", "2024-01-20T00:00:00", category="supermarket")
+    post_expense(client, 1, "20", "2024-02-10T00:00:00", category="supermarket")
+    post_expense(client, 1, "40", "2024-03-05T00:00:00", category="supermarket")
+    params = {"date_from": "2024-03-01", "date_to": "2024-01-20"}
+
+    assert _summary(client, 1, **params) == {}
+    body = client.post("/expenses/summary/batch", json={"user_ids": [1], **params}).json()
+    assert body == {"totals": {"1": {}}}
+
+
+def test_batch_summary_matches_the_single_user_summary(client):
+    post_expense(client, 1, "10", "2024-01-01T00:00:00", category="supermarket")
+    post_expense(client, 1, "15", "2024-02-11T00:00:00", category="others")
+    post_expense(client, 2, "25", "2024-02-12T00:00:00", category="others")
+    params = {"date_from": "2024-01-01", "date_to": "2024-02-11"}
+
+    body = client.post("/expenses/summary/batch", json={"user_ids": [1, 2, 3], **params}).json()
+    totals = {int(user): {c: Decimal(v) for c, v in values.items()} for user, values in body["totals"].items()}
+    assert totals == {user: _summary(client, user, **params) for user in (1, 2, 3)}
+    assert totals[3] == {}
+
+
+def test_rebuild_restores_drifted_rollups(client, db):
+    post_expense(client, 1, "10", "2024-01-01T00:00:00", category="supermarket")
+    db.execute(rollup_service.ExpenseMonthlyRollup.__table__.update().values(total_amount=1))
+    db.commit()
+    assert len(rollup_service.find_rollup_mismatches(db)) == 1
+
+    rollup_service.rebuild_rollups(db)
+    db.commit()
+    assert rollup_service.find_rollup_mismatches(db) == []
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.core import database
+from app.services import analytics_service
+from tests.conftest import post_expense
+
+
+def _series(client, **params):
+    return client.get("/expenses/summary/timeseries", params={"user_id": 1, **params})
+
+
+def test_monthly_series_is_zero_filled(client):
+    post_expense(client, 1, "10", "2024-01-05T00:00:00", category="supermarket")
+    post_expense(client, 1, "30", "2024-01-25T00:00:00", category="supermarket")
+    post_expense(client, 1, "5", "2024-03-02T00:00:00", category="others")
+
+    [series] = _series(client).json()["series"]
+    points = [(point["bucket_start"], Decimal(point["total_amount"]), point["count"]) for point in series["points"]]
+    assert points == [
+        ("2024-01-01", Decimal("40.00"), 2),
+        ("2024-02-01", Decimal("0.00"), 0),
+        ("2024-03-01", Decimal("5.00"), 1),
+    ]
+    grouped = _series(client, group_by="category", date_from="2024-02-01").json()["series"]
+    assert [(item["key"], len(item["points"])) for item in grouped] == [({"category": "others"}, 2)]
+    assert _series(client, date_from="2024-04-01").json()["series"] == []
+
+
+def test_open_ranges_are_capped_before_the_group_by(client, monkeypatch):
+    post_expense(client, 1, "10", "2020-01-01T00:00:00")
+    post_expense(client, 1, "10", "2024-01-01T00:00:00")
+    monkeypatch.setattr(analytics_service, "EXPENSES_TIMESERIES_MAX_BUCKETS", 10)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = database.async_engine.sync_engine if database.async_engine is not None else database.engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = _series(client, bucket="month")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert response.status_code == 400
+    assert not any("GROUP BY" in statement for statement in statements)
+    assert _series(client, bucket="month", date_from="2023-06-01").status_code == 200